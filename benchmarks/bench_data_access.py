@@ -0,0 +1,554 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import re
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional
+
+import numpy as np
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import Session
+
+from api_books.database.books import BookDataBase
+from api_books.database.connection import (
+    apply_sqlite_profile,
+    get_async_database_url,
+    get_async_session,
+    get_async_write_session,
+    get_read_only_database_url,
+    get_session,
+    get_stream_session,
+    get_write_session,
+)
+from api_books.database.pagination import encode_cursor
+from api_books.database.users import UserDataBase
+from api_books.health_check import health_prober
+from api_books.main import app
+from api_books.middlewares.cache import response_cache
+from api_books.models import Book, User, table_registry
+from api_books.schemas import SearchMode
+from api_books.security.auth import get_user_tokenizer
+from api_books.settings import Settings
+
+# Tempo dos métodos do BookDataBase/UserDataBase e das rotas GET (via TestClient)
+# sobre catálogos sintéticos de 10k, 100k e 1M livros. Os resultados (mínimo,
+# mediana e p95 por caso) podem ser gravados como baseline em JSON; nas execuções seguintes
+# o script compara com a baseline e termina com status 1 se algum caso ficar
+# mais lento que a tolerância.
+#
+#   python benchmarks/bench_data_access.py [--sizes 10000 100000 1000000] [--only get_books]
+#   python benchmarks/bench_data_access.py --save-baseline   # grava a baseline desta máquina
+#
+# Os catálogos são gerados uma vez (determinísticos pela --seed) em --data-dir e
+# copiados a cada execução, já que os casos de escrita alteram o banco. Sem
+# snapshot de estatísticas o cache de respostas fica de fora e as rotas de
+# /stats calculam tudo no banco, que é o caminho medido aqui.
+
+BASELINE_PATH = Path(__file__).parent / 'baselines' / 'data_access.json'
+
+# as 50 categorias do books.toscrape.com, das mais para as menos frequentes
+CATEGORIES = [
+    'Default', 'Nonfiction', 'Sequential Art', 'Add a comment', 'Fiction', 'Young Adult',
+    'Fantasy', 'Romance', 'Mystery', 'Food and Drink', 'Childrens', 'Historical Fiction',
+    'Poetry', 'Classics', 'Science Fiction', 'History', 'Womens Fiction', 'Horror',
+    'Science', 'Music', 'Business', 'Thriller', 'Philosophy', 'Biography', 'Humor',
+    'Autobiography', 'Art', 'Religion', 'Psychology', 'New Adult', 'Christian Fiction',
+    'Sports and Games', 'Self Help', 'Spirituality', 'Travel', 'Contemporary', 'Christian',
+    'Politics', 'Health', 'Parenting', 'Adult Fiction', 'Suspense', 'Historical',
+    'Short Stories', 'Cultural', 'Novels', 'Academic', 'Paranormal', 'Erotica', 'Crime',
+]  # fmt: skip
+ADJECTIVES = [
+    'Silent', 'Lost', 'Hidden', 'Last', 'Broken', 'Golden', 'Dark', 'Little', 'Secret',
+    'Wild', 'Forgotten', 'Burning', 'Endless', 'Quiet', 'Crimson', 'Distant', 'Bright',
+]  # fmt: skip
+NOUNS = [
+    'Love', 'Night', 'House', 'War', 'Girl', 'Heart', 'City', 'River', 'King', 'Garden',
+    'Shadow', 'Star', 'Road', 'Queen', 'Sea', 'Fire', 'Moon', 'Dream', 'Light', 'Summer',
+    'Winter', 'Storm', 'Island', 'Kingdom', 'Mountain', 'Book', 'Letter', 'Child', 'Song',
+]  # fmt: skip
+RATING_WEIGHTS = [0.12, 0.18, 0.25, 0.27, 0.18]  # notas 1 a 5
+PAGE = 20
+USERS = 1_000
+INSERT_CHUNK = 50_000
+STAGING_BATCH = 10_000  # mesmo tamanho do lote da ingestão (INGEST_BATCH_SIZE)
+
+
+def generate_catalog(size: int, seed: int) -> Iterator[List[Dict]]:
+    """
+    Livros sintéticos em lotes: categorias com frequência de Zipf (como no site),
+    preços log-normais em torno de £30 e notas concentradas em 3 e 4.
+    """
+    rng = np.random.default_rng(seed)
+    zipf = 1 / np.arange(1, len(CATEGORIES) + 1)
+    category_weights = zipf / zipf.sum()
+    for start in range(0, size, INSERT_CHUNK):
+        count = min(INSERT_CHUNK, size - start)
+        categories = rng.choice(len(CATEGORIES), count, p=category_weights)
+        prices = np.clip(rng.lognormal(np.log(30), 0.45, count), 5, 150).round(2)
+        ratings = rng.choice(np.arange(1, 6), count, p=RATING_WEIGHTS)
+        availability = rng.poisson(8, count)
+        adjectives = rng.integers(0, len(ADJECTIVES), count)
+        nouns = rng.integers(0, len(NOUNS), (count, 2))
+        yield [
+            {
+                'id': start + i + 1,
+                'title': (
+                    f'The {ADJECTIVES[adjectives[i]]} {NOUNS[nouns[i, 0]]}'
+                    f' of the {NOUNS[nouns[i, 1]]}'
+                ),
+                'price': float(prices[i]),
+                'rating': float(ratings[i]),
+                'category': CATEGORIES[categories[i]],
+                'image_url': f'https://books.example/media/{start + i + 1}.jpg',
+                'availability': int(availability[i]),
+            }
+            for i in range(count)
+        ]
+
+
+def build_database(path: Path, size: int, seed: int):
+    engine = create_engine(f'sqlite:///{path}')
+    table_registry.metadata.create_all(engine)
+    with engine.begin() as connection:
+        for chunk in generate_catalog(size, seed):
+            connection.execute(insert(Book.__table__), chunk)
+        connection.execute(
+            insert(User.__table__),
+            [
+                {
+                    'username': f'user{i}',
+                    'password': 'bench-hash',
+                    'email': f'user{i}@books.example',
+                    'is_admin': i == 0,
+                }
+                for i in range(USERS)
+            ],
+        )
+    with engine.connect() as connection:
+        connection.exec_driver_sql('ANALYZE')
+    engine.dispose()
+
+
+def prepare_database(data_dir: Path, size: int, seed: int) -> Path:
+    """Gera o catálogo (uma vez) e devolve uma cópia de trabalho para esta execução."""
+    data_dir.mkdir(parents=True, exist_ok=True)
+    source = data_dir / f'books_{size}_seed{seed}.sqlite'
+    if not source.exists():
+        start = time.perf_counter()
+        partial = source.with_suffix('.partial')
+        partial.unlink(missing_ok=True)
+        build_database(partial, size, seed)
+        partial.rename(source)
+        print(f'  catálogo de {size} livros gerado em {time.perf_counter() - start:.1f}s')
+
+    work = data_dir / f'books_{size}_seed{seed}_work.sqlite'
+    for suffix in ('', '-wal', '-shm'):
+        Path(f'{work}{suffix}').unlink(missing_ok=True)
+    shutil.copyfile(source, work)
+    return work
+
+
+class Case(NamedTuple):
+    name: str
+    run: Callable[[], object]
+    setup: Optional[Callable[[], object]] = None
+    teardown: Optional[Callable[[], object]] = None
+
+
+def measure(case: Case, min_time: float, min_calls: int = 3, max_calls: int = 2_000) -> Dict:
+    """
+    Chamadas até somar `min_time` segundos medidos (mínimo `min_calls`), após um
+    aquecimento. Como no timeit, o GC fica desligado durante a chamada: as coletas
+    da geração 2 caíam em chamadas aleatórias e deixavam a mediana bimodal. Os
+    objetos já existentes são congelados (`gc.freeze`) e a coleta roda entre as
+    chamadas, fora do tempo medido, percorrendo só o que a chamada alocou.
+    """
+    durations = []
+    measured = 0.0
+    gc.collect()
+    gc.freeze()
+    try:
+        for call in range(max_calls + 1):
+            if call > min_calls and measured > min_time:
+                break
+            if case.setup is not None:
+                case.setup()
+            gc.disable()
+            try:
+                start = time.perf_counter()
+                case.run()
+                elapsed = time.perf_counter() - start
+            finally:
+                gc.enable()
+            if case.teardown is not None:
+                case.teardown()
+            gc.collect()
+            if call:  # a primeira chamada só aquece caches e o plano de consulta
+                durations.append(elapsed * 1000)
+                measured += elapsed
+    finally:
+        gc.unfreeze()
+
+    durations.sort()
+    return {
+        'min_ms': round(durations[0], 4),
+        'median_ms': round(statistics.median(durations), 4),
+        'p95_ms': round(durations[min(len(durations) - 1, int(len(durations) * 0.95))], 4),
+        'calls': len(durations),
+    }
+
+
+class Databases:
+    """Engines e sessões sobre a cópia de trabalho, com o mesmo perfil SQLite da aplicação."""
+
+    def __init__(self, path: Path):
+        settings = Settings()
+        self.url = f'sqlite:///{path}'
+        read_url = get_read_only_database_url(self.url)
+        self.write_engine = apply_sqlite_profile(create_engine(self.url), settings, writer=True)
+        self.read_engine = apply_sqlite_profile(create_engine(read_url), settings, writer=False)
+        self.async_read_engine = create_async_engine(get_async_database_url(read_url))
+        apply_sqlite_profile(self.async_read_engine.sync_engine, settings, writer=False)
+        self.async_write_engine = create_async_engine(get_async_database_url(self.url))
+        apply_sqlite_profile(self.async_write_engine.sync_engine, settings, writer=True)
+
+    def dispose(self):
+        self.write_engine.dispose()
+        self.read_engine.dispose()
+
+
+def read_call(engine, repository, method: str, *args, **kwargs) -> Callable[[], object]:
+    """Uma chamada como numa requisição: sessão nova, método, resultado materializado."""
+
+    def run():
+        with Session(engine) as session:
+            result = getattr(repository(session), method)(*args, **kwargs)
+            if method == 'iter_books':
+                return sum(len(batch) for batch in result)
+            return result
+
+    return run
+
+
+def db_cases(databases: Databases, size: int) -> List[Case]:
+    read = databases.read_engine
+    middle = size // 2
+    cases = [
+        Case('db books.get_books page', read_call(read, BookDataBase, 'get_books', limit=PAGE)),
+        Case(
+            'db books.get_books deep offset',
+            read_call(read, BookDataBase, 'get_books', offset=middle, limit=PAGE),
+        ),
+        Case(
+            'db books.get_books cursor',
+            read_call(
+                read,
+                BookDataBase,
+                'get_books',
+                limit=PAGE,
+                cursor=encode_cursor({'id': middle}),
+            ),
+        ),
+        Case(
+            'db books.get_books fts',
+            read_call(read, BookDataBase, 'get_books', title='love', limit=PAGE),
+        ),
+        Case(
+            'db books.get_books substring',
+            read_call(
+                read,
+                BookDataBase,
+                'get_books',
+                title='love',
+                search_mode=SearchMode.SUBSTRING,
+                limit=PAGE,
+            ),
+        ),
+        Case(
+            'db books.get_books category',
+            read_call(read, BookDataBase, 'get_books', category='Mystery', limit=PAGE),
+        ),
+        Case('db books.get_book_by_id', read_call(read, BookDataBase, 'get_book_by_id', middle)),
+        Case(
+            'db books.get_books_top_rated page',
+            read_call(read, BookDataBase, 'get_books_top_rated', offset=0, limit=PAGE),
+        ),
+        Case(
+            'db books.get_books_top_rated cursor',
+            read_call(
+                read,
+                BookDataBase,
+                'get_books_top_rated',
+                offset=None,
+                limit=PAGE,
+                cursor=encode_cursor({'rating': 3.0, 'id': middle}),
+            ),
+        ),
+        Case('db books.get_categories', read_call(read, BookDataBase, 'get_categories', '')),
+        Case(
+            'db books.get_categories filter',
+            read_call(read, BookDataBase, 'get_categories', 'Fic'),
+        ),
+        Case('db books.get_stats_overview', read_call(read, BookDataBase, 'get_stats_overview')),
+        Case(
+            'db books.get_stats_categories',
+            read_call(read, BookDataBase, 'get_stats_categories'),
+        ),
+        Case(
+            'db books.get_stats_by_price_range',
+            read_call(read, BookDataBase, 'get_stats_by_price_range', 20.0, 20.5),
+        ),
+        Case('db books.get_stats_snapshot', read_call(read, BookDataBase, 'get_stats_snapshot')),
+        Case(
+            'db books.get_dataset_version',
+            read_call(read, BookDataBase, 'get_dataset_version'),
+        ),
+        Case('db books.iter_books', read_call(read, BookDataBase, 'iter_books')),
+        Case(
+            'db books.get_training_columns',
+            read_call(read, BookDataBase, 'get_training_columns'),
+        ),
+        Case(
+            'db users.find_user_by_username',
+            read_call(read, UserDataBase, 'find_user_by_username', f'user{USERS // 2}'),
+        ),
+        Case(
+            'db users.find_user_by_username_or_email',
+            read_call(
+                read,
+                UserDataBase,
+                'find_user_by_username_or_email',
+                username='missing',
+                email=f'user{USERS // 2}@books.example',
+            ),
+        ),
+        Case('db users.get_all_users', read_call(read, UserDataBase, 'get_all_users')),
+    ]
+    return cases + write_cases(databases)
+
+
+def write_cases(databases: Databases) -> List[Case]:
+    """
+    Escritas: as que não fazem commit (snapshot e staging) são desfeitas com
+    rollback fora do tempo medido; as que fazem (usuários) ficam na cópia de trabalho.
+    """
+    session = Session(databases.write_engine)
+    books, users = BookDataBase(session), UserDataBase(session)
+    created = iter(range(sys.maxsize))
+    staging_batch = [
+        {**book, 'id': book['id'] + 10_000_000}
+        for book in next(generate_catalog(STAGING_BATCH, seed=1))
+    ]
+    copy_books_to_staging = text(
+        'INSERT INTO books_staging (id, title, price, rating, category, image_url, availability) '
+        'SELECT id, title, price, rating, category, image_url, availability FROM books'
+    )
+
+    def create_user():
+        number = next(created)
+        users.create_user(f'bench{number}', 'bench-hash', f'bench{number}@books.example', False)
+
+    return [
+        Case(
+            'db books.save_stats_snapshot',
+            lambda: books.save_stats_snapshot('bench'),
+            teardown=session.rollback,
+        ),
+        Case(
+            'db books.load_staging batch',
+            lambda: books.load_staging(staging_batch),
+            teardown=session.rollback,
+        ),
+        Case(
+            'db books.merge_staging unchanged',
+            books.merge_staging,
+            setup=lambda: session.execute(copy_books_to_staging),
+            teardown=session.rollback,
+        ),
+        Case('db users.create_user', create_user),
+        Case('db users.update_password', lambda: users.update_password(1, 'bench-hash-2')),
+    ]
+
+
+def http_cases(client: TestClient, size: int) -> List[Case]:
+    middle = size // 2
+    paths = [
+        f'/api/v1/books/?limit={PAGE}',
+        f'/api/v1/books/?limit={PAGE}&offset={middle}',
+        f'/api/v1/books/?limit={PAGE}&cursor={encode_cursor({"id": middle})}',
+        f'/api/v1/books/?limit={PAGE}&title=love',
+        f'/api/v1/books/?limit={PAGE}&title=love&search_mode=substring',
+        f'/api/v1/books/{middle}',
+        '/api/v1/categories/',
+        '/api/v1/stats/overview/',
+        f'/api/v1/stats/top-rated/?limit={PAGE}',
+        '/api/v1/stats/price-range/?min_price=20&max_price=20.5',
+        '/api/v1/stats/categories/',
+        f'/api/v1/ml/features/?limit={PAGE}',
+        '/api/v1/ml/training-data/?format=npz',
+        '/api/v1/download/books?format=csv',
+        '/api/v1/users/',
+    ]
+
+    def get(path: str) -> Callable[[], object]:
+        def run():
+            response = client.get(path)
+            if response.status_code != 200:  # noqa: PLR2004
+                raise RuntimeError(f'GET {path}: {response.status_code} {response.text[:200]}')
+            return response
+
+        return run
+
+    return [Case(f'GET {path}', get(path)) for path in paths]
+
+
+def install_overrides(databases: Databases):
+    def get_session_override():
+        with Session(databases.read_engine) as session:
+            yield session
+
+    def get_write_session_override():
+        with Session(databases.write_engine) as session:
+            yield session
+
+    async def get_async_session_override():
+        async with AsyncSession(databases.async_read_engine, expire_on_commit=False) as session:
+            yield session
+
+    async def get_async_write_session_override():
+        async with AsyncSession(databases.async_write_engine, expire_on_commit=False) as session:
+            yield session
+
+    app.dependency_overrides.update({
+        get_session: get_session_override,
+        get_write_session: get_write_session_override,
+        get_stream_session: lambda: Session(databases.read_engine),
+        get_async_session: get_async_session_override,
+        get_async_write_session: get_async_write_session_override,
+        get_user_tokenizer: lambda: None,
+    })
+    # sem ingestão registrada o cache de respostas não entra: cada GET vai ao banco
+    response_cache.version_provider = lambda: None
+    response_cache.clear()
+    health_prober.engine = databases.read_engine
+    health_prober.connectivity_url = None
+    app.state.write_engine = databases.write_engine
+
+
+def run_size(size: int, args) -> Dict[str, Dict]:
+    path = prepare_database(Path(args.data_dir), size, args.seed)
+    databases = Databases(path)
+    install_overrides(databases)
+    only = re.compile(args.only) if args.only else None
+
+    results = {}
+    with TestClient(app) as client:
+        for case in db_cases(databases, size) + http_cases(client, size):
+            if only is not None and not only.search(case.name):
+                continue
+            results[case.name] = measure(case, args.min_time)
+            result = results[case.name]
+            print(
+                f'  {case.name:<72} {result["min_ms"]:>10.3f} {result["median_ms"]:>10.3f}'
+                f' {result["p95_ms"]:>10.3f}'
+            )
+
+    app.dependency_overrides.clear()
+    databases.dispose()
+    return results
+
+
+def machine_info() -> Dict[str, str]:
+    return {
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+    }
+
+
+def compare(
+    results: Dict[str, Dict[str, Dict]], baseline: Dict, tolerance: float, min_delta_ms: float
+) -> List[str]:
+    """
+    Casos cujo melhor tempo passou de baseline * (1 + tolerance) e de baseline +
+    min_delta_ms. O mínimo é bem mais estável entre execuções que a mediana, que
+    varia com a carga da máquina; a mediana e o p95 ficam no JSON para consulta.
+    """
+    regressions = []
+    for size, cases in results.items():
+        for name, result in cases.items():
+            reference = baseline['results'].get(size, {}).get(name)
+            if reference is None:
+                continue
+            before, after = reference['min_ms'], result['min_ms']
+            if after > before * (1 + tolerance) and after - before > min_delta_ms:
+                regressions.append(
+                    f'{size:>8} {name}: {before:.3f} ms -> {after:.3f} ms'
+                    f' (+{(after / before - 1) * 100:.0f}%)'
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark da camada de dados e das rotas')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000])
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--min-time', type=float, default=0.5, help='segundos por caso')
+    parser.add_argument('--only', help='regex sobre o nome dos casos')
+    parser.add_argument('--data-dir', default=str(Path(tempfile.gettempdir()) / 'api_books_bench'))
+    parser.add_argument('--baseline', default=str(BASELINE_PATH))
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.5, help='piora relativa aceita')
+    parser.add_argument('--min-delta-ms', type=float, default=0.1, help='piora absoluta aceita')
+    args = parser.parse_args()
+
+    # o log de requisições (console e arquivo) distorceria o tempo das rotas
+    os.environ.setdefault('LOG_REQUESTS_ENABLED', 'false')
+
+    results = {}
+    for size in args.sizes:
+        print(f'{size} livros{"":<57} {"mín (ms)":>10} {"mediana":>10} {"p95":>10}')
+        results[str(size)] = run_size(size, args)
+
+    baseline_path = Path(args.baseline)
+    if args.save_baseline:
+        baseline = {'results': {}}
+        if baseline_path.exists():
+            baseline = json.loads(baseline_path.read_text(encoding='utf-8'))
+        baseline['machine'] = machine_info()
+        baseline['created_at'] = datetime.now(timezone.utc).isoformat(timespec='seconds')
+        baseline['results'].update(results)
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(baseline, indent=2) + '\n', encoding='utf-8')
+        print(f'Baseline gravada em {baseline_path}')
+        return
+
+    if not baseline_path.exists():
+        print(f'Sem baseline em {baseline_path}; use --save-baseline para criar uma.')
+        return
+
+    baseline = json.loads(baseline_path.read_text(encoding='utf-8'))
+    if baseline.get('machine') != machine_info():
+        print('Aviso: baseline gravada em outra máquina/versão; compare com cautela.')
+    regressions = compare(results, baseline, args.tolerance, args.min_delta_ms)
+    if regressions:
+        print(f'Regressões (tolerância {args.tolerance:.0%}):')
+        print('\n'.join(regressions))
+        sys.exit(1)
+    print('Sem regressões em relação à baseline.')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+import argparse
+import asyncio
+import os
+import time
+from typing import Callable, List
+
+from fastapi import FastAPI, Request
+from loguru import logger
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from api_books.logging_config import json_request_format
+from api_books.middlewares.logging import LoggingMiddleware
+
+# Overhead do log de requisições por requisição: aplicação sem middleware, o
+# middleware antigo (BaseHTTPMiddleware + time.time() + str(request.url)) e o
+# middleware ASGI puro com amostragem. As requisições são enviadas direto ao
+# app ASGI (sem rede), com os logs indo para os mesmos sinks (enqueue) em os.devnull.
+#
+#   python benchmarks/bench_logging.py [--requests 5000] [--repeat 5]
+
+
+class LegacyLoggingMiddleware(BaseHTTPMiddleware):
+    """Cópia do LoggingMiddleware anterior, para comparação."""
+
+    @staticmethod
+    async def dispatch(request: Request, call_next):
+        start_time = time.time()
+        response = await call_next(request)
+        process_time = (time.time() - start_time) * 1000
+        with logger.contextualize(
+            ip=request.client.host,
+            method=request.method,
+            url=str(request.url),
+            status_code=response.status_code,
+            process_time=process_time,
+        ):
+            logger.info('Request handled')
+        return response
+
+
+def configure_sinks():
+    logger.remove()
+    devnull = open(os.devnull, 'w', encoding='utf-8')
+    # mesmo formato do sink de arquivo antigo
+    logger.add(
+        devnull,
+        format=(
+            '{time:DD/MM/YYYY HH:mm:ss} | {level: <8} | '
+            '{extra[ip]} | {extra[method]}-{extra[url]: <50} | {extra[status_code]} | '
+            'process_time: {extra[process_time]:.2f}ms'
+        ),
+        filter=lambda record: 'url' in record['extra'],
+        enqueue=True,
+    )
+    logger.add(
+        devnull,
+        format=json_request_format,
+        filter=lambda record: 'request' in record['extra'],
+        enqueue=True,
+    )
+
+
+def build_app(middleware: Callable = None, **options) -> FastAPI:
+    app = FastAPI()
+
+    @app.get('/api/v1/books/')
+    async def books():
+        return {'total': 0, 'books': []}
+
+    if middleware is not None:
+        app.add_middleware(middleware, **options)
+    return app
+
+
+async def call(app, path: bytes = b'/api/v1/books/'):
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path.decode(),
+        'raw_path': path,
+        'query_string': b'limit=10&offset=0',
+        'root_path': '',
+        'headers': [(b'host', b'localhost')],
+        'client': ('127.0.0.1', 50000),
+        'server': ('localhost', 8000),
+    }
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        pass
+
+    await app(scope, receive, send)
+
+
+async def best_us_per_request(app, requests: int, repeat: int) -> float:
+    await call(app)  # aquece rotas e middlewares
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        for _ in range(requests):
+            await call(app)
+        best = min(best, time.perf_counter_ns() - start)
+    return best / requests / 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark do middleware de log')
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    configure_sinks()
+    variants: List = [
+        ('sem middleware', build_app()),
+        ('BaseHTTPMiddleware (antigo)', build_app(LegacyLoggingMiddleware)),
+        ('ASGI, amostra 100%', build_app(LoggingMiddleware, sample_rate=1.0, excluded_paths=[])),
+        ('ASGI, amostra 1%', build_app(LoggingMiddleware, sample_rate=0.01, excluded_paths=[])),
+    ]
+
+    async def run():
+        return [
+            (name, await best_us_per_request(app, args.requests, args.repeat))
+            for name, app in variants
+        ]
+
+    results = asyncio.run(run())
+    baseline = results[0][1]
+    print(f'{"variante":<30} {"us/req":>10} {"overhead (us)":>14}')
+    for name, us in results:
+        print(f'{name:<30} {us:>10.1f} {us - baseline:>14.1f}')
+    logger.complete()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+import argparse
+import sqlite3
+import time
+from pathlib import Path
+from typing import Callable, Iterable, List, Tuple
+
+from replay_server import synthetic_site
+
+from api_books.services.http_cache import HttpCache
+from api_books.services.scraper_parsers import available_backends, get_backend
+
+# Compara os backends de parsing do scraper sobre páginas salvas no cache HTTP
+# (data/http_cache.sqlite, preenchido por um scraping). Sem cache, usa as páginas
+# sintéticas do replay_server, com a mesma estrutura do books.toscrape.com.
+#
+#   python benchmarks/bench_parsers.py [--cache data/http_cache.sqlite] [--repeat 5]
+
+
+def split_pages(pages: Iterable[Tuple[str, str]]) -> Tuple[List[str], List[str]]:
+    """Separa pares (URL ou caminho, HTML) em páginas de listagem e de detalhe."""
+    listings, details = [], []
+    for url, html in pages:
+        if '/catalogue/page-' in url or url.endswith('/'):
+            listings.append(html)
+        elif url.endswith('/index.html'):
+            details.append(html)
+    return listings, details
+
+
+def synthetic_pages(pages: int = 5) -> Tuple[List[str], List[str]]:
+    return split_pages(synthetic_site(pages).items())
+
+
+def cached_pages(cache_path: str) -> Tuple[List[str], List[str]]:
+    cache = HttpCache(cache_path)
+    urls = [url for (url,) in cache.connection.execute('SELECT url FROM http_cache')]
+    pages = [(url, cache.get(url).html) for url in urls]
+    cache.close()
+    return split_pages(pages)
+
+
+def best_time_per_page(parse: Callable[[str], object], pages: List[str], repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for html in pages:
+            parse(html)
+        best = min(best, time.perf_counter() - start)
+    return best / len(pages) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark dos backends de parsing do scraper')
+    parser.add_argument('--cache', default='data/http_cache.sqlite')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    listings, details = [], []
+    if Path(args.cache).exists():
+        try:
+            listings, details = cached_pages(args.cache)
+        except sqlite3.DatabaseError:
+            pass
+    source = f'cache {args.cache}'
+    if not listings or not details:
+        listings, details = synthetic_pages()
+        source = 'páginas sintéticas'
+
+    print(f'Fonte: {source} ({len(listings)} listagens, {len(details)} detalhes)')
+    print(f'{"backend":<12} {"listagem (ms/pág)":>18} {"detalhe (ms/pág)":>18}')
+    for name in available_backends():
+        backend = get_backend(name)
+        listing_ms = best_time_per_page(backend.listing, listings, args.repeat)
+        detail_ms = best_time_per_page(backend.detail, details, args.repeat)
+        print(f'{name:<12} {listing_ms:>18.3f} {detail_ms:>18.3f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,193 @@
+import argparse
+import asyncio
+import contextlib
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import urllib.request
+from functools import partial
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from replay_server import MANIFEST, STATS_PATH, serve, synthesize_corpus
+
+from api_books.services.http_cache import HttpCache
+from api_books.services.scraper import AsyncBookScraper, PipelineConfig
+
+try:  # resource não existe no Windows
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None
+
+# Um `run()` completo do AsyncBookScraper contra o servidor de replay local
+# (benchmarks/replay_server.py), sem rede: páginas/s, livros/s, CPU de parsing,
+# retentativas e pico de memória. O servidor roda em outro processo, então o
+# tempo e a memória medidos são só do scraper (e dos processos de parsing).
+#
+#   python benchmarks/bench_scraper.py [--latency-ms 20] [--jitter-ms 10] [--error-rate 0.02]
+#   python benchmarks/bench_scraper.py --detail-workers 30 --concurrency 30 --parse-processes 4
+#   python benchmarks/bench_scraper.py --warm   # 2ª execução com o cache HTTP (304s)
+#
+# Sem --corpus, usa (e gera na primeira vez) um corpus sintético de 50 páginas x
+# 20 livros; para usar páginas reais, grave um corpus com `replay_server.py record`.
+
+
+def timed_parse(parse_function: Callable, backend: str, html: str):
+    """Roda o parsing (no processo que for) e devolve também o tempo de CPU gasto."""
+    start = time.process_time()
+    result = parse_function(backend, html)
+    return result, time.process_time() - start
+
+
+class BenchScraper(AsyncBookScraper):
+    """Scraper instrumentado: conta as páginas obtidas (baixadas ou 304) e a CPU do parsing."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pages_fetched = 0
+        self.parse_cpu_time = 0.0
+
+    async def _fetch_page(self, url: str):
+        fetched = await super()._fetch_page(url)
+        if fetched is not None:
+            self.pages_fetched += 1
+        return fetched
+
+    async def _parse(self, parse_function: Callable, html: str):
+        result, cpu_time = await super()._parse(partial(timed_parse, parse_function), html)
+        self.parse_cpu_time += cpu_time
+        return result
+
+
+def start_server(corpus: Path, options: Dict) -> tuple:
+    context = multiprocessing.get_context('spawn')
+    ready = context.Queue()
+    process = context.Process(
+        target=serve, args=(str(corpus), '127.0.0.1', 0, options, ready), daemon=True
+    )
+    process.start()
+    return process, ready.get(timeout=30)
+
+
+def server_stats(url: str) -> Dict[str, int]:
+    with urllib.request.urlopen(url.rstrip('/') + STATS_PATH, timeout=5) as response:
+        return json.loads(response.read())
+
+
+def peak_rss_mb() -> Dict[str, Optional[float]]:
+    """Pico de memória do processo e do maior processo filho já encerrado (parsing)."""
+    if resource is None:
+        return {'self': None, 'children': None}
+    scale = 1024 if sys.platform != 'darwin' else 1024 * 1024  # KiB no Linux, bytes no macOS
+    return {
+        'self': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale,
+        'children': resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale,
+    }
+
+
+async def scrape(args, url: str, csv_path: Path, http_cache: Optional[HttpCache]):
+    # os prints do scraper (URLs, caminhos do CSV) poluiriam o relatório
+    with open(os.devnull, 'w', encoding='utf-8') as devnull, contextlib.redirect_stdout(devnull):
+        scraper = BenchScraper(
+            max_concurrent_requests=args.concurrency,
+            http_cache=http_cache,
+            pipeline=PipelineConfig(
+                listing_workers=args.listing_workers,
+                detail_workers=args.detail_workers,
+                parse_workers=args.parse_workers,
+                queue_size=args.queue_size,
+            ),
+            parser_backend=args.parser_backend,
+        )
+        scraper.TARGET_URL = url
+        scraper.OUTPUT_CSV_FILE = str(csv_path)
+        scraper.PARSE_PROCESSES = args.parse_processes
+        scraper.HTTP_CACHE_ENABLED = False  # só o cache passado explicitamente (--warm)
+
+        start = time.perf_counter()
+        await scraper.run()
+    # run() termina com um sleep(0.5) fixo para o aiohttp encerrar as conexões
+    return scraper, time.perf_counter() - start - 0.5
+
+
+def report(label: str, scraper: BenchScraper, elapsed: float, before: Dict, after: Dict):
+    def delta(name: str) -> int:
+        return after.get(name, 0) - before.get(name, 0)
+
+    rss = peak_rss_mb()
+    lines = [
+        ('tempo (s)', f'{elapsed:.2f}'),
+        ('páginas', f'{scraper.pages_fetched} ({delta("bytes") / 1e6:.1f} MB transferidos)'),
+        ('páginas/s', f'{scraper.pages_fetched / elapsed:.1f}'),
+        ('livros', scraper.books_written),
+        ('livros/s', f'{scraper.books_written / elapsed:.1f}'),
+        ('CPU de parsing (s)', f'{scraper.parse_cpu_time:.2f}'),
+        ('requisições', delta('requests')),
+        ('retentativas (erros injetados)', delta('errors_injected')),
+        ('respostas 304', delta('not_modified')),
+        ('detalhes reaproveitados', scraper.reused_details),
+        ('pico de RSS (MB)', f'{rss["self"]:.0f}' if rss['self'] else 'n/d'),
+        (
+            'pico de RSS, parsing (MB)',
+            f'{rss["children"]:.0f}' if rss['children'] and scraper.PARSE_PROCESSES else '-',
+        ),
+    ]
+    print(label)
+    for name, value in lines:
+        print(f'  {name:<32} {value}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark do scraper contra o replay local')
+    parser.add_argument('--corpus', help='corpus gravado (padrão: sintético em --data-dir)')
+    parser.add_argument('--data-dir', default=str(Path(tempfile.gettempdir()) / 'api_books_bench'))
+    parser.add_argument('--pages', type=int, default=50, help='páginas do corpus sintético')
+    parser.add_argument('--latency-ms', type=float, default=20.0)
+    parser.add_argument('--jitter-ms', type=float, default=10.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--concurrency', type=int, default=15)
+    parser.add_argument('--listing-workers', type=int, default=PipelineConfig.listing_workers)
+    parser.add_argument('--detail-workers', type=int, default=PipelineConfig.detail_workers)
+    parser.add_argument('--parse-workers', type=int, default=PipelineConfig.parse_workers)
+    parser.add_argument('--queue-size', type=int, default=PipelineConfig.queue_size)
+    parser.add_argument('--parse-processes', type=int, default=2, help='0 = no event loop')
+    parser.add_argument('--parser-backend', default='auto')
+    parser.add_argument('--warm', action='store_true', help='repete com o cache HTTP')
+    args = parser.parse_args()
+
+    data_dir = Path(args.data_dir)
+    corpus = Path(args.corpus) if args.corpus else data_dir / f'scraper_corpus_{args.pages}'
+    if not (corpus / MANIFEST).exists():
+        if args.corpus:
+            parser.error(f'{corpus} não é um corpus (falta {MANIFEST})')
+        synthesize_corpus(corpus, pages=args.pages)
+
+    options = {
+        'latency_ms': args.latency_ms,
+        'jitter_ms': args.jitter_ms,
+        'error_rate': args.error_rate,
+    }
+    process, url = start_server(corpus, options)
+    http_cache = HttpCache(':memory:') if args.warm else None
+    csv_path = data_dir / 'bench_scraper.csv'
+    print(
+        f'Corpus {corpus} em {url} (latência {args.latency_ms} ± {args.jitter_ms} ms, '
+        f'erros {args.error_rate:.0%}); backend {args.parser_backend}, '
+        f'{args.parse_processes} processos de parsing'
+    )
+    try:
+        runs = ['execução fria'] + (['execução com cache HTTP'] if args.warm else [])
+        for label in runs:
+            before = server_stats(url)
+            scraper, elapsed = asyncio.run(scrape(args, url, csv_path, http_cache))
+            report(label, scraper, elapsed, before, server_stats(url))
+    finally:
+        process.terminate()
+        process.join()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+import argparse
+import contextlib
+import tempfile
+from pathlib import Path
+from typing import Dict, List
+
+from bench_data_access import Case, Databases, measure, prepare_database
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from sqlalchemy.orm import Session
+
+from api_books import serialization
+from api_books.database.books import BookDataBase
+from api_books.main import app
+
+# Respostas com milhares de livros (GET /api/v1/books/ sem limit e /stats/price-range/)
+# pelos dois caminhos: o padrão do FastAPI (objetos Book validados pelo response_model,
+# BooksList/StatsPriceRange, e codificados pelo JSONResponse) e o rápido (tuplas do
+# banco escritas direto em JSON por `book_list_response`, com orjson ou json).
+#
+#   python benchmarks/bench_serialization.py [--sizes 10000 100000] [--min-time 1]
+#
+# "serialização" mede só a montagem do corpo, com os livros já carregados;
+# "consulta + serialização" inclui a consulta, numa sessão nova por chamada.
+# Os catálogos são os mesmos do bench_data_access (gerados uma vez em --data-dir).
+
+# rota, método do BookDataBase e argumentos que devolvem o catálogo inteiro
+# (com max_price o método não consulta nem imprime o maior preço do banco)
+ROUTES = {
+    'books': ('/api/v1/books/', 'get_books', {}),
+    'price-range': (
+        '/api/v1/stats/price-range/',
+        'get_stats_by_price_range',
+        {'min_price': 0.0, 'max_price': 1e9},
+    ),
+}
+
+
+def response_field(path: str):
+    """ModelField do response_model da rota, o mesmo que o FastAPI usa para validar a saída."""
+    for route in app.routes:
+        if isinstance(route, APIRoute) and route.path == path:
+            return route.response_field
+    raise LookupError(path)
+
+
+def pydantic_body(field, total: int, books: List, extra: Dict) -> bytes:
+    # o que o FastAPI faz com o dict retornado pelo endpoint (routing.serialize_response)
+    value, errors = field.validate(
+        {'total': total, 'books': books, **extra}, {}, loc=('response',)
+    )
+    assert not errors, errors
+    return JSONResponse(field.serialize(value)).body
+
+
+@contextlib.contextmanager
+def encoder(name: str):
+    """Força o codificador do caminho rápido (orjson ou o módulo json)."""
+    original = serialization.orjson
+    if name == 'json':
+        serialization.orjson = None
+    try:
+        yield
+    finally:
+        serialization.orjson = original
+
+
+def fetch(engine, method: str, kwargs: Dict, as_rows: bool):
+    """Consulta numa sessão nova: (total, livros, demais campos da resposta)."""
+    with Session(engine) as session:
+        total, books, *rest = getattr(BookDataBase(session), method)(as_rows=as_rows, **kwargs)
+    return total, books, dict(zip(('next_cursor',), rest))
+
+
+def body_builders(route: str) -> Dict[str, tuple]:
+    """Para cada caminho, a função que monta o corpo e se ela recebe tuplas do banco."""
+    field = response_field(ROUTES[route][0])
+
+    def pydantic(total, books, extra):
+        return pydantic_body(field, total, books, extra)
+
+    def rows(total, books, extra):
+        return serialization.book_list_response(total, books, **extra).body
+
+    return {'pydantic': (pydantic, False), 'rows': (rows, True)}
+
+
+def cases(engine, route: str) -> List[Case]:
+    _, method, kwargs = ROUTES[route]
+    builders = body_builders(route)
+    encoders = ['json'] + (['orjson'] if serialization.orjson is not None else [])
+    variants = [('pydantic', 'json')] + [('rows', name) for name in encoders]
+
+    result = []
+    for path_name, encoder_name in variants:
+        build, as_rows = builders[path_name]
+        loaded = fetch(engine, method, kwargs, as_rows)
+        label = f'{route} {path_name}/{encoder_name}'
+
+        def serialize(build=build, loaded=loaded, encoder_name=encoder_name):
+            with encoder(encoder_name):
+                return build(*loaded)
+
+        def fetch_and_serialize(build=build, as_rows=as_rows, encoder_name=encoder_name):
+            with encoder(encoder_name):
+                return build(*fetch(engine, method, kwargs, as_rows))
+
+        result.append(Case(f'{label} serialização', serialize))
+        result.append(Case(f'{label} consulta + serialização', fetch_and_serialize))
+    return result
+
+
+def check_wire_format(engine, route: str):
+    """Os dois caminhos precisam gerar exatamente os mesmos bytes."""
+    _, method, kwargs = ROUTES[route]
+    bodies = {}
+    for path_name, (build, as_rows) in body_builders(route).items():
+        with encoder('json'):
+            bodies[path_name] = build(*fetch(engine, method, kwargs, as_rows))
+    same = bodies['pydantic'] == bodies['rows']
+    print(f'  {route}: {len(bodies["rows"]) / 1e6:.1f} MB, bytes idênticos: {same}')
+    if not same:
+        raise SystemExit(f'{route}: o caminho rápido mudou o formato da resposta')
+
+
+def run_size(size: int, args):
+    path = prepare_database(Path(args.data_dir), size, args.seed)
+    databases = Databases(path)
+    engine = databases.read_engine
+    print(f'{size} livros')
+    for route in ROUTES:
+        check_wire_format(engine, route)
+
+    print(f'  {"":<52} {"mín (ms)":>10} {"mediana":>10} {"livros/s":>12} {"ganho":>7}')
+    for route in ROUTES:
+        reference = {}
+        for case in cases(engine, route):
+            result = measure(case, args.min_time)
+            stage = case.name.split(' ', 2)[2]
+            reference.setdefault(stage, result['min_ms'])
+            print(
+                f'  {case.name:<52} {result["min_ms"]:>10.2f} {result["median_ms"]:>10.2f}'
+                f' {size / result["min_ms"] * 1000:>12,.0f}'
+                f' {reference[stage] / result["min_ms"]:>6.1f}x'
+            )
+    databases.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark da serialização das listas de livros')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000])
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--min-time', type=float, default=1.0, help='segundos por caso')
+    parser.add_argument('--data-dir', default=str(Path(tempfile.gettempdir()) / 'api_books_bench'))
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        run_size(size, args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,378 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Optional
+
+from aiohttp import web
+
+from api_books.services.http_cache import HttpCache
+
+# Servidor local que reproduz um corpus de páginas no formato do books.toscrape.com,
+# para medir o scraper sem rede. O corpus é um espelho do site em disco (o caminho
+# da URL vira o caminho do arquivo; `/` vira `index.html`) e pode ser:
+#
+#   - gravado do cache HTTP de um scraping real (data/http_cache.sqlite):
+#       python benchmarks/replay_server.py record --cache data/http_cache.sqlite --corpus DIR
+#   - sintetizado com a mesma estrutura de páginas do site (50 páginas x 20 livros):
+#       python benchmarks/replay_server.py synthesize --corpus DIR [--pages 50]
+#
+# e servido com latência, jitter e erros injetados:
+#
+#   python benchmarks/replay_server.py serve --corpus DIR --port 8080 --latency-ms 50
+#
+# (SCRAPING_TARGET_URL=http://localhost:8080/ aponta a API para ele.)
+
+STATS_PATH = '/__replay__/stats'
+MANIFEST = 'corpus.json'
+
+CATEGORIES = [
+    ('Travel', 2), ('Mystery', 3), ('Historical Fiction', 4), ('Sequential Art', 5),
+    ('Classics', 6), ('Philosophy', 7), ('Romance', 8), ('Womens Fiction', 9),
+    ('Fiction', 10), ('Childrens', 11), ('Religion', 12), ('Nonfiction', 13),
+    ('Music', 14), ('Default', 15), ('Science Fiction', 16), ('Sports and Games', 17),
+    ('Add a comment', 18), ('Fantasy', 19), ('New Adult', 20), ('Young Adult', 21),
+    ('Science', 22), ('Poetry', 23), ('Paranormal', 24), ('Art', 25), ('Psychology', 26),
+    ('Autobiography', 27), ('Parenting', 28), ('Adult Fiction', 29), ('Humor', 30),
+    ('Horror', 31), ('History', 32), ('Food and Drink', 33), ('Christian Fiction', 34),
+    ('Business', 35), ('Biography', 36), ('Thriller', 37), ('Contemporary', 38),
+    ('Spirituality', 39), ('Academic', 40), ('Self Help', 41), ('Historical', 42),
+    ('Christian', 43), ('Suspense', 44), ('Short Stories', 45), ('Novels', 46),
+    ('Health', 47), ('Politics', 48), ('Cultural', 49), ('Erotica', 50), ('Crime', 51),
+]  # fmt: skip
+RATINGS = ['One', 'Two', 'Three', 'Four', 'Five']
+WORDS = (
+    'light attic velvet tipping soumission sharp objects sapiens requiem dead mountain '
+    'secret garden coming woman boys boat black maria starving hearts shakespeare sonnets '
+    'olio mesaerion stranger rip reckoning kill pattern stella night sea river song'
+).split()
+
+PAGE_HEAD = """<!DOCTYPE html>
+<!--[if lt IE 7]>      <html lang="en-us" class="no-js lt-ie9 lt-ie8 lt-ie7"> <![endif]-->
+<html lang="en-us" class="no-js">
+<head>
+  <title>{title} | Books to Scrape - Sandbox</title>
+  <meta http-equiv="content-type" content="text/html; charset=UTF-8" />
+  <meta name="created" content="24th Jun 2016 09:29" />
+  <meta name="description" content="" />
+  <meta name="viewport" content="width=device-width" />
+  <meta name="robots" content="NOARCHIVE,NOCACHE" />
+  <link rel="shortcut icon" href="{root}static/oscar/favicon.ico" />
+  <link rel="stylesheet" type="text/css" href="{root}static/oscar/css/styles.css" />
+  <link rel="stylesheet" href="{root}static/oscar/js/bootstrap-datetimepicker/bootstrap-datetimepicker.css" />
+</head>
+<body id="default" class="default">
+<header class="header container-fluid">
+  <div class="page_inner"><div class="row">
+    <div class="col-sm-8 h1"><a href="{root}index.html">Books to Scrape</a>
+      <small> We love being scraped!</small></div>
+  </div></div>
+</header>
+<div class="container-fluid page"><div class="page_inner">
+"""  # noqa: E501
+PAGE_TAIL = """
+</div></div>
+<footer class="footer container-fluid"></footer>
+<script src="http://ajax.googleapis.com/ajax/libs/jquery/1.9.1/jquery.min.js"></script>
+<script src="{root}static/oscar/js/bootstrap3/bootstrap.min.js" type="text/javascript"></script>
+<script src="{root}static/oscar/js/oscar/ui.js" type="text/javascript" charset="utf-8"></script>
+</body>
+</html>
+"""
+LISTING_BOOK = """
+<li class="col-xs-6 col-sm-4 col-md-3 col-lg-3">
+  <article class="product_pod">
+    <div class="image_container">
+      <a href="{prefix}{slug}/index.html"><img src="{root}media/cache/{image}.jpg" alt="{title}" class="thumbnail"></a>
+    </div>
+    <p class="star-rating {rating}">
+      <i class="icon-star"></i><i class="icon-star"></i><i class="icon-star"></i>
+      <i class="icon-star"></i><i class="icon-star"></i>
+    </p>
+    <h3><a href="{prefix}{slug}/index.html" title="{title}">{short_title}</a></h3>
+    <div class="product_price">
+      <p class="price_color">£{price}</p>
+      <p class="instock availability"><i class="icon-ok"></i> In stock</p>
+      <form><button type="submit" class="btn btn-primary btn-block" data-loading-text="Adding...">Add to basket</button></form>
+    </div>
+  </article>
+</li>
+"""  # noqa: E501
+DETAIL_BODY = """
+<ul class="breadcrumb">
+  <li><a href="../../index.html">Home</a></li>
+  <li><a href="../category/books_1/index.html">Books</a></li>
+  <li><a href="../category/books/{category_slug}/index.html">{category}</a></li>
+  <li class="active">{title}</li>
+</ul>
+<div id="messages"></div>
+<div class="content"><div id="content_inner">
+<article class="product_page"><div class="row">
+  <div class="col-sm-6"><div id="product_gallery" class="carousel"><div class="thumbnail">
+    <div class="carousel-inner"><div class="item active">
+      <img src="../../media/cache/{image}.jpg" alt="{title}" />
+    </div></div>
+  </div></div></div>
+  <div class="col-sm-6 product_main">
+    <h1>{title}</h1>
+    <p class="price_color">£{price}</p>
+    <p class="instock availability"><i class="icon-ok"></i> In stock ({stock} available)</p>
+    <p class="star-rating {rating}"><i class="icon-star"></i><i class="icon-star"></i></p>
+  </div>
+</div>
+<div id="product_description" class="sub-header"><h2>Product Description</h2></div>
+<p>{description}</p>
+<div class="sub-header"><h2>Product Information</h2></div>
+<table class="table table-striped">
+  <tr><th>UPC</th><td>{upc}</td></tr>
+  <tr><th>Product Type</th><td>Books</td></tr>
+  <tr><th>Price (excl. tax)</th><td>£{price}</td></tr>
+  <tr><th>Price (incl. tax)</th><td>£{price}</td></tr>
+  <tr><th>Tax</th><td>£0.00</td></tr>
+  <tr><th>Availability</th><td>In stock ({stock} available)</td></tr>
+  <tr><th>Number of reviews</th><td>0</td></tr>
+</table>
+</article>
+</div></div>
+"""
+
+
+def _category_slug(name: str, number: int) -> str:
+    return f'{name.lower().replace(" ", "-")}_{number}'
+
+
+def _sidebar(root: str) -> str:
+    items = ''.join(
+        f'<li><a href="{root}catalogue/category/books/{_category_slug(name, number)}/index.html">'
+        f'\n  {name}\n</a></li>\n'
+        for name, number in CATEGORIES
+    )
+    return (
+        '<aside class="sidebar col-sm-4 col-md-3"><div class="side_categories">'
+        f'<ul class="nav nav-list"><li><a href="{root}catalogue/category/books_1/index.html">'
+        f'Books</a><ul>{items}</ul></li></ul></div></aside>'
+    )
+
+
+def synthetic_site(pages: int = 50, books_per_page: int = 20, seed: int = 0) -> Dict[str, str]:
+    """
+    Páginas sintéticas do site, por caminho da URL: as de listagem (e `/`) e uma de
+    detalhe por livro. Também usadas pelo bench_parsers quando não há cache HTTP.
+    """
+    rng = random.Random(seed)
+    files: Dict[str, str] = {}
+    number = 0
+    listings = []
+    for page in range(1, pages + 1):
+        books = []
+        for _ in range(books_per_page):
+            number += 1
+            words = rng.sample(WORDS, rng.randint(2, 6))
+            title = ' '.join(words).title()
+            book = {
+                'title': title,
+                'short_title': title if len(title) < 30 else title[:27] + '...',  # noqa: PLR2004
+                'slug': f'{"-".join(words)}_{number}',
+                'image': hashlib.md5(str(number).encode(), usedforsecurity=False).hexdigest(),
+                'rating': rng.choice(RATINGS),
+                'price': f'{rng.uniform(10, 60):.2f}',
+                'stock': rng.randint(1, 22),
+                'upc': f'{rng.getrandbits(64):016x}',
+                'description': ' '.join(rng.choices(WORDS, k=rng.randint(80, 250))).capitalize(),
+            }
+            book['category'], category_number = rng.choice(CATEGORIES)
+            book['category_slug'] = _category_slug(book['category'], category_number)
+            books.append(book)
+            files[f'/catalogue/{book["slug"]}/index.html'] = (
+                PAGE_HEAD.format(title=title, root='../../')
+                + DETAIL_BODY.format(**book)
+                + PAGE_TAIL.format(root='../../')
+            )
+        listings.append(books)
+
+    def listing_html(page: int, root: str, prefix: str) -> str:
+        products = ''.join(
+            LISTING_BOOK.format(prefix=prefix, root=root, **book) for book in listings[page - 1]
+        )
+        pager = f'<li class="current">\n    Page {page} of {pages}\n</li>'
+        if page < pages:
+            pager += f'<li class="next"><a href="{prefix}page-{page + 1}.html">next</a></li>'
+        return (
+            PAGE_HEAD.format(title='All products', root=root)
+            + f'<div class="row">{_sidebar(root)}'
+            + '<div class="col-sm-8 col-md-9"><div class="page-header action">'
+            + f'<h1>All products</h1></div><section><ol class="row">{products}</ol>'
+            + f'<div><ul class="pager">{pager}</ul></div></section></div></div>'
+            + PAGE_TAIL.format(root=root)
+        )
+
+    files['/'] = listing_html(1, '', 'catalogue/')
+    for page in range(1, pages + 1):
+        files[f'/catalogue/page-{page}.html'] = listing_html(page, '../', '')
+    return files
+
+
+def synthesize_corpus(corpus: Path, pages: int = 50, books_per_page: int = 20, seed: int = 0):
+    """Grava como corpus o espelho sintético do site (`synthetic_site`)."""
+    files = synthetic_site(pages, books_per_page, seed)
+    metadata = {'source': 'synthetic', 'pages': pages, 'books': pages * books_per_page}
+    write_corpus(corpus, files, metadata)
+
+
+def record_corpus(corpus: Path, cache_path: str):
+    """Grava como corpus as páginas guardadas no cache HTTP de um scraping real."""
+    cache = HttpCache(cache_path)
+    urls = [url for (url,) in cache.connection.execute('SELECT url FROM http_cache')]
+    base = min(urls, key=len)  # a página inicial (SCRAPING_TARGET_URL)
+    files = {'/' + url[len(base) :]: cache.get(url).html for url in urls if url.startswith(base)}
+    cache.close()
+    details = sum(1 for path in files if path.endswith('/index.html'))
+    write_corpus(corpus, files, {'source': cache_path, 'pages': len(files), 'books': details})
+
+
+def _file_for(path: str) -> str:
+    return 'index.html' if path == '/' else path.lstrip('/')
+
+
+def write_corpus(corpus: Path, files: Dict[str, str], metadata: Dict):
+    for path, html in files.items():
+        target = corpus / _file_for(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text(html, encoding='utf-8')
+    (corpus / MANIFEST).write_text(
+        json.dumps({**metadata, 'paths': sorted(files)}, indent=2), encoding='utf-8'
+    )
+
+
+def load_corpus(corpus: Path) -> Dict[str, bytes]:
+    manifest = json.loads((corpus / MANIFEST).read_text(encoding='utf-8'))
+    return {path: (corpus / _file_for(path)).read_bytes() for path in manifest['paths']}
+
+
+class ReplaySite:
+    """
+    Serve o corpus da memória, com ETag (e 304 para `If-None-Match`), latência
+    `latency_ms` ± `jitter_ms` por resposta e uma fração `error_rate` de
+    respostas `error_status` (503 por padrão, que o scraper repete).
+    """
+
+    def __init__(  # noqa: PLR0913, PLR0917
+        self,
+        pages: Dict[str, bytes],
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        seed: Optional[int] = 0,
+    ):
+        self.pages = {
+            path: (body, '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"')
+            for path, body in pages.items()
+        }
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.random = random.Random(seed)
+        self.stats = Counter()
+        self.paths_served = set()
+
+    async def handle(self, request: web.Request) -> web.Response:
+        if request.path == STATS_PATH:
+            return web.json_response({**self.stats, 'distinct_paths': len(self.paths_served)})
+
+        self.stats['requests'] += 1
+        delay = self.latency + self.random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        page = self.pages.get(request.path)
+        if page is None:
+            self.stats['not_found'] += 1
+            return web.Response(status=404)
+        if self.random.random() < self.error_rate:
+            self.stats['errors_injected'] += 1
+            return web.Response(status=self.error_status)
+
+        body, etag = page
+        self.paths_served.add(request.path)
+        if request.headers.get('If-None-Match') == etag:
+            self.stats['not_modified'] += 1
+            return web.Response(status=304, headers={'ETag': etag})
+        self.stats['bytes'] += len(body)
+        return web.Response(
+            body=body, content_type='text/html', charset='utf-8', headers={'ETag': etag}
+        )
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_route('GET', '/{tail:.*}', self.handle)
+        return app
+
+
+async def start_site(site: ReplaySite, host: str = '127.0.0.1', port: int = 0) -> web.AppRunner:
+    runner = web.AppRunner(site.app(), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
+
+
+def serve(corpus: str, host: str, port: int, options: Dict, ready=None):
+    """Roda o servidor até ser encerrado; `ready` (uma Queue) recebe a URL base."""
+
+    async def main():
+        runner = await start_site(ReplaySite(load_corpus(Path(corpus)), **options), host, port)
+        bound_host, bound_port = runner.addresses[0][:2]
+        url = f'http://{bound_host}:{bound_port}/'
+        if ready is not None:
+            ready.put(url)
+        else:
+            print(f'Servindo {corpus} em {url}')
+        await asyncio.Event().wait()
+
+    asyncio.run(main())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Corpus e servidor de replay do scraper')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    record = commands.add_parser('record', help='grava o corpus a partir do cache HTTP')
+    record.add_argument('--cache', default='data/http_cache.sqlite')
+    record.add_argument('--corpus', required=True)
+
+    synthesize = commands.add_parser('synthesize', help='gera um corpus sintético')
+    synthesize.add_argument('--corpus', required=True)
+    synthesize.add_argument('--pages', type=int, default=50)
+    synthesize.add_argument('--books-per-page', type=int, default=20)
+    synthesize.add_argument('--seed', type=int, default=0)
+
+    serve_command = commands.add_parser('serve', help='serve o corpus')
+    serve_command.add_argument('--corpus', required=True)
+    serve_command.add_argument('--host', default='127.0.0.1')
+    serve_command.add_argument('--port', type=int, default=8080)
+    serve_command.add_argument('--latency-ms', type=float, default=0.0)
+    serve_command.add_argument('--jitter-ms', type=float, default=0.0)
+    serve_command.add_argument('--error-rate', type=float, default=0.0)
+    serve_command.add_argument('--error-status', type=int, default=503)
+
+    args = parser.parse_args()
+    if args.command == 'record':
+        record_corpus(Path(args.corpus), args.cache)
+    elif args.command == 'synthesize':
+        synthesize_corpus(Path(args.corpus), args.pages, args.books_per_page, args.seed)
+    else:
+        options = {
+            'latency_ms': args.latency_ms,
+            'jitter_ms': args.jitter_ms,
+            'error_rate': args.error_rate,
+            'error_status': args.error_status,
+        }
+        serve(args.corpus, args.host, args.port, options)
+
+
+if __name__ == '__main__':
+    main()
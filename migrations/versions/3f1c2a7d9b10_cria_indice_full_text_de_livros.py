@@ -0,0 +1,54 @@
+"""Cria índice full-text (FTS5) de livros
+
+Revision ID: 3f1c2a7d9b10
+Revises: 928b9df628c4
+Create Date: 2026-10-18 09:12:41.218306
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c2a7d9b10'
+down_revision: Union[str, Sequence[str], None] = '928b9df628c4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS books_fts USING fts5("
+        "title, category, content='books', content_rowid='id', "
+        "tokenize='unicode61 remove_diacritics 2')"
+    )
+    op.execute(
+        'CREATE TRIGGER IF NOT EXISTS books_fts_ai AFTER INSERT ON books BEGIN '
+        'INSERT INTO books_fts(rowid, title, category) '
+        'VALUES (new.id, new.title, new.category); END'
+    )
+    op.execute(
+        'CREATE TRIGGER IF NOT EXISTS books_fts_ad AFTER DELETE ON books BEGIN '
+        "INSERT INTO books_fts(books_fts, rowid, title, category) "
+        "VALUES ('delete', old.id, old.title, old.category); END"
+    )
+    op.execute(
+        'CREATE TRIGGER IF NOT EXISTS books_fts_au AFTER UPDATE ON books BEGIN '
+        "INSERT INTO books_fts(books_fts, rowid, title, category) "
+        "VALUES ('delete', old.id, old.title, old.category); "
+        'INSERT INTO books_fts(rowid, title, category) '
+        'VALUES (new.id, new.title, new.category); END'
+    )
+    # indexa os livros já existentes
+    op.execute("INSERT INTO books_fts(books_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute('DROP TRIGGER IF EXISTS books_fts_au')
+    op.execute('DROP TRIGGER IF EXISTS books_fts_ad')
+    op.execute('DROP TRIGGER IF EXISTS books_fts_ai')
+    op.execute('DROP TABLE IF EXISTS books_fts')
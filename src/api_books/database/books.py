@@ -1,11 +1,64 @@
-from typing import List, Tuple
+import re
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 from fastapi import Depends
-from sqlalchemy import ScalarResult, desc, distinct, func, select
-from sqlalchemy.orm import Session
+from sqlalchemy import (
+    Row,
+    and_,
+    delete,
+    desc,
+    distinct,
+    exists,
+    func,
+    insert,
+    literal_column,
+    or_,
+    select,
+    union_all,
+    update,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, aliased
 
-from api_books.database.connection import get_session
-from api_books.models import Book
+from api_books.database.connection import get_async_session, get_session
+from api_books.database.pagination import decode_cursor, encode_cursor
+from api_books.models import Book, BookStaging, StatsSnapshot, books_fts
+from api_books.schemas import BookSchema, SearchMode
+
+
+def fts_terms(value: str = None) -> List[str]:
+    """Quebra o texto de busca nas palavras usadas pelo índice full-text."""
+    return re.findall(r'\w+', value or '')
+
+
+def build_fts_query(title: str = None, category: str = None) -> Optional[str]:
+    """Monta a expressão MATCH do FTS5 a partir dos filtros de título e categoria.
+
+    Cada palavra vira um termo de prefixo entre aspas ("palavra"*), o que evita
+    injeção de operadores do FTS5 e mantém a busca por início de palavra.
+    Retorna None quando nenhum filtro possui palavras.
+    """
+    clauses = []
+    for column_name, value in (('title', title), ('category', category)):
+        terms = fts_terms(value)
+        if terms:
+            expression = ' AND '.join(f'"{term}"*' for term in terms)
+            clauses.append(f'{column_name} : ({expression})')
+
+    if not clauses:
+        return None
+
+    return ' AND '.join(clauses)
+
+
+# colunas carregadas para o treino de modelos (features, label e chaves do split)
+TRAINING_COLUMNS = ('id', 'availability', 'rating', 'category', 'price')
+
+# colunas (e ordem) dos arquivos exportados: as mesmas do CSV gerado pelo scraper
+EXPORT_COLUMNS = ('id', 'title', 'price', 'availability', 'rating', 'category', 'image_url')
+
+# colunas (e ordem) dos livros nas respostas da API: os campos do BookSchema
+BOOK_COLUMNS = tuple(BookSchema.model_fields)
 
 
 class BookDataBase:
@@ -13,27 +66,133 @@ class BookDataBase:
         self.session = session
         self.model = Book
 
-    def get_books(
-        self, offset: int = None, limit: int = None, title: str = None, category: str = None
-    ) -> Tuple[int, ScalarResult]:
-        query = select(self.model)
+    def get_books(  # noqa: PLR0913, PLR0917
+        self,
+        offset: int = None,
+        limit: int = None,
+        title: str = None,
+        category: str = None,
+        search_mode: SearchMode = SearchMode.FTS,
+        cursor: str = None,
+        as_rows: bool = False,
+    ) -> Tuple[int, List[Book | Row], Optional[str]]:
+        query = self._select_books(as_rows)
+        ranked = search_mode == SearchMode.FTS and bool(fts_terms(title))
+
+        if search_mode == SearchMode.FTS:
+            query = self._filter_fts(query, title, category)
+        else:
+            query = self._filter_substring(query, title, category)
+
+        if not ranked:
+            query = query.order_by(self.model.id)
+
+        if cursor is not None:
+            if ranked:
+                raise ValueError("'cursor' is not available for relevance-ranked searches")
+            if offset is not None:
+                raise ValueError("'cursor' and 'offset' cannot be used together")
+
+            # keyset: continua a partir do último id entregue, usando a chave primária
+            last = decode_cursor(cursor, {'id': int})
+            query = query.where(self.model.id > last['id'])
 
+        if offset is not None:
+            query = query.offset(offset)
+
+        if limit is not None:
+            query = query.limit(limit)
+
+        books = self._fetch_books(query, as_rows)
+        count_books = self.session.scalar(select(func.count()).select_from(query.subquery()))
+
+        next_cursor = None
+        if not ranked and limit and len(books) == limit:
+            next_cursor = encode_cursor({'id': books[-1].id})
+
+        return count_books, books, next_cursor
+
+    def _select_books(self, as_rows: bool, entity=None):
+        """
+        Select dos livros: objetos Book ou, com `as_rows`, tuplas com as colunas de
+        BOOK_COLUMNS, para as respostas serializadas sem passar pelo ORM nem pelo pydantic.
+        """
+        entity = self.model if entity is None else entity
+        if as_rows:
+            return select(*(getattr(entity, name) for name in BOOK_COLUMNS))
+        return select(entity)
+
+    def _fetch_books(self, query, as_rows: bool) -> List[Book | Row]:
+        if as_rows:
+            return self.session.execute(query).all()
+        return self.session.scalars(query).all()
+
+    def _filter_substring(self, query, title: str = None, category: str = None):
+        """Busca parcial (LIKE '%valor%'): percorre a tabela inteira."""
         if title is not None:
             query = query.filter(self.model.title.contains(title))
 
         if category is not None:
             query = query.filter(self.model.category.contains(category))
 
-        if offset is not None:
-            query = query.offset(offset)
+        return query
 
-        if limit is not None:
-            query = query.limit(limit)
+    def _filter_fts(self, query, title: str = None, category: str = None):
+        """Busca pelo índice FTS5.
 
-        books_scalar = self.session.scalars(query)
-        count_books = self.session.scalar(select(func.count()).select_from(query.subquery()))
+        Quando há termos no título os livros são ordenados pela relevância (bm25);
+        a categoria funciona apenas como filtro e mantém a ordem por id.
+        """
+        match = build_fts_query(title, category)
+        if match is None:
+            return query
+
+        query = query.join(books_fts, books_fts.c.rowid == self.model.id).where(
+            literal_column('books_fts').op('MATCH')(match)
+        )
+
+        if fts_terms(title):
+            return query.order_by(books_fts.c.rank, self.model.id)
+
+        return query
+
+    def iter_books(
+        self,
+        title: str = None,
+        category: str = None,
+        search_mode: SearchMode = SearchMode.FTS,
+        batch_size: int = 1000,
+    ) -> Iterator[List[Tuple]]:
+        """
+        Percorre os livros em lotes de `batch_size` tuplas (colunas de EXPORT_COLUMNS),
+        em ordem de id, sem carregar a tabela inteira nem criar objetos do ORM.
+        """
+        query = select(*(getattr(self.model, name) for name in EXPORT_COLUMNS))
+
+        if search_mode == SearchMode.FTS:
+            query = self._filter_fts(query, title, category)
+        else:
+            query = self._filter_substring(query, title, category)
+
+        query = query.order_by(None).order_by(self.model.id)
+
+        result = self.session.execute(query.execution_options(yield_per=batch_size))
+        yield from result.partitions()
+
+    def get_training_columns(self, category: str = None) -> Dict[str, tuple]:
+        """
+        Colunas usadas no treino de modelos (features + label), sem montar objetos
+        Book: uma tupla de valores por coluna, na ordem dos ids.
+        """
+        query = select(*(getattr(self.model, name) for name in TRAINING_COLUMNS)).order_by(
+            self.model.id
+        )
+        if category is not None:
+            query = query.where(self.model.category.contains(category))
 
-        return count_books, books_scalar
+        rows = self.session.execute(query).all()
+        columns = tuple(zip(*rows)) or tuple(() for _ in TRAINING_COLUMNS)
+        return dict(zip(TRAINING_COLUMNS, columns))
 
     def get_book_by_id(self, book_id: int):
         if book_id is None:
@@ -49,8 +208,18 @@ class BookDataBase:
 
         return book
 
-    def get_books_top_rated(self, offset: int, limit: int) -> Tuple[int, List[Book]]:
-        query = select(self.model).distinct().order_by(desc(self.model.rating))
+    def get_books_top_rated(
+        self, offset: int, limit: int, cursor: str = None, as_rows: bool = False
+    ) -> Tuple[int, List[Book | Row], Optional[str]]:
+        # (rating, id) decrescentes: percorre o índice ix_books_rating_id de trás para frente
+        query = self._select_books(as_rows).order_by(desc(self.model.rating), desc(self.model.id))
+
+        if cursor is not None:
+            if offset is not None:
+                raise ValueError("'cursor' and 'offset' cannot be used together")
+
+            last = decode_cursor(cursor, {'rating': float, 'id': int})
+            query = self._top_rated_after(last['rating'], last['id'], limit, as_rows)
 
         if offset is not None:
             query = query.offset(offset)
@@ -58,10 +227,39 @@ class BookDataBase:
         if limit is not None:
             query = query.limit(limit)
 
-        books = self.session.scalars(query).all()
+        books = self._fetch_books(query, as_rows)
         count_books = self.session.scalar(select(func.count()).select_from(query.subquery()))
 
-        return count_books, books
+        next_cursor = None
+        if limit and len(books) == limit:
+            next_cursor = encode_cursor({'rating': books[-1].rating, 'id': books[-1].id})
+
+        return count_books, books, next_cursor
+
+    def _top_rated_after(
+        self, rating: float, book_id: int, limit: int = None, as_rows: bool = False
+    ):
+        """
+        Página seguinte do ranking a partir de (rating, id).
+
+        Um único filtro `(rating, id) < (r, i)` faz o SQLite usar o índice só para
+        `rating <= r` e descartar linha a linha o restante da mesma nota. Separando em
+        "mesma nota, id menor" e "notas menores", cada parte é uma busca direta no índice.
+        """
+        same_rating = select(self.model).where(
+            self.model.rating == rating, self.model.id < book_id
+        )
+        lower_rating = select(self.model).where(self.model.rating < rating)
+
+        parts = []
+        for part in (same_rating, lower_rating):
+            ordered = part.order_by(desc(self.model.rating), desc(self.model.id))
+            if limit is not None:
+                ordered = ordered.limit(limit)
+            parts.append(select(ordered.subquery()))
+
+        page = aliased(self.model, union_all(*parts).subquery())
+        return self._select_books(as_rows, page).order_by(desc(page.rating), desc(page.id))
 
     def get_categories(self, name: str) -> Tuple[int, str]:
         query = select(self.model.category).distinct().order_by(self.model.category)
@@ -124,7 +322,104 @@ class BookDataBase:
 
         return total_categories, categories_count_dist, categories_avg_price_dist
 
-    def get_stats_by_price_range(self, min_price: float = 0.0, max_price: float | None = None):
+    def get_stats_snapshot(self) -> Optional[StatsSnapshot]:
+        """Retorna o snapshot de estatísticas gerado pela última ingestão (ou None)."""
+        query = select(StatsSnapshot).order_by(desc(StatsSnapshot.id)).limit(1)
+        return self.session.scalar(query)
+
+    def get_dataset_version(self) -> Optional[str]:
+        """Versão do dataset carregado pela última ingestão (ou None)."""
+        query = select(StatsSnapshot.dataset_version).order_by(desc(StatsSnapshot.id)).limit(1)
+        return self.session.scalar(query)
+
+    def save_stats_snapshot(self, dataset_version: str) -> StatsSnapshot:
+        """
+        Calcula as estatísticas da coleção e substitui o snapshot anterior.
+        Não faz commit: deve rodar na mesma transação da carga dos livros.
+        """
+        total_books, average_price, count_categories, rating_dist = self.get_stats_overview()
+        _, categories_count_dist, categories_avg_price_dist = self.get_stats_categories()
+
+        snapshot = StatsSnapshot(
+            dataset_version=dataset_version,
+            total_books=total_books,
+            average_price=average_price,
+            count_categories=count_categories,
+            # chaves em texto: é assim que ficam no JSON e na resposta da API
+            rating_distribution={str(rating): count for rating, count in rating_dist},
+            categories_count_distribution=dict(categories_count_dist),
+            categories_avg_price_distribution=dict(categories_avg_price_dist),
+        )
+
+        self.session.execute(delete(StatsSnapshot))
+        self.session.add(snapshot)
+        self.session.flush()
+
+        return snapshot
+
+    def clear_staging(self):
+        self.session.execute(delete(BookStaging))
+
+    def load_staging(self, records: Iterable[Dict]):
+        """Grava um lote do CSV na área de staging (linhas com chave repetida são ignoradas)."""
+        records = list(records)
+        if records:
+            # insert do Core (executemany direto), sem o custo do ORM por linha
+            self.session.execute(insert(BookStaging.__table__).prefix_with('OR IGNORE'), records)
+
+    def merge_staging(self) -> Dict[str, int]:
+        """
+        Aplica em `books` apenas as diferenças para a área de staging, pela chave
+        natural (título + URL da imagem): remove os livros que saíram, atualiza os
+        que mudaram e insere os novos. Livros existentes mantêm o id.
+        Não faz commit: deve rodar na mesma transação da carga.
+        """
+        staged = BookStaging
+        same_key = and_(staged.title == Book.title, staged.image_url == Book.image_url)
+        changed = or_(
+            staged.price != Book.price,
+            staged.rating != Book.rating,
+            staged.category != Book.category,
+            staged.availability != Book.availability,
+        )
+        no_sync = {'synchronize_session': False}
+
+        updated = self.session.execute(
+            update(Book)
+            .where(same_key, changed)
+            .values(
+                price=staged.price,
+                rating=staged.rating,
+                category=staged.category,
+                availability=staged.availability,
+            ),
+            execution_options=no_sync,
+        ).rowcount
+
+        columns = ['title', 'price', 'rating', 'category', 'image_url', 'availability']
+        new_books = (
+            select(*(getattr(staged, name) for name in columns))
+            .where(~exists().where(same_key))
+            .order_by(staged.id)
+        )
+        inserted = self.session.execute(insert(Book).from_select(columns, new_books)).rowcount
+
+        # remoção por último: os livros novos não reaproveitam ids dos removidos
+        deleted = self.session.execute(
+            delete(Book).where(~exists().where(same_key)), execution_options=no_sync
+        ).rowcount
+
+        staged_total = self.session.scalar(select(func.count()).select_from(staged))
+        return {
+            'inserted': inserted,
+            'updated': updated,
+            'deleted': deleted,
+            'unchanged': staged_total - inserted - updated,
+        }
+
+    def get_stats_by_price_range(
+        self, min_price: float = 0.0, max_price: float | None = None, as_rows: bool = False
+    ) -> Tuple[int, List[Book | Row]]:
         if min_price < 0:
             raise ValueError("'min_price' cannot be negative")
         if max_price is not None and max_price < 0:
@@ -152,11 +447,58 @@ class BookDataBase:
         total_books = self.session.scalar(count_query)
 
         query = (
-            select(self.model)
+            self._select_books(as_rows)
             .where(self.model.price.between(min_price, final_max_price))
             .order_by(self.model.price)
         )
 
-        books = self.session.scalars(query).all()
+        books = self._fetch_books(query, as_rows)
 
         return total_books, books
+
+
+class AsyncBookDataBase:
+    """
+    Versão assíncrona do BookDataBase, sobre AsyncSession (driver aiosqlite).
+
+    As consultas são as mesmas do BookDataBase: cada método executa a versão síncrona
+    com `AsyncSession.run_sync`, que roda o código num greenlet sobre a conexão
+    assíncrona. Assim o event loop fica livre durante o I/O do banco sem ocupar
+    uma thread do threadpool por requisição.
+    """
+
+    def __init__(self, session: AsyncSession = Depends(get_async_session)):
+        self.session = session
+
+    async def _run(self, method_name: str, *args, **kwargs):
+        def call(sync_session: Session):
+            return getattr(BookDataBase(sync_session), method_name)(*args, **kwargs)
+
+        return await self.session.run_sync(call)
+
+    async def get_books(self, **kwargs) -> Tuple[int, List[Book | Row], Optional[str]]:
+        return await self._run('get_books', **kwargs)
+
+    async def get_training_columns(self, **kwargs) -> Dict[str, tuple]:
+        return await self._run('get_training_columns', **kwargs)
+
+    async def get_book_by_id(self, book_id: int) -> Book:
+        return await self._run('get_book_by_id', book_id)
+
+    async def get_books_top_rated(self, **kwargs) -> Tuple[int, List[Book | Row], Optional[str]]:
+        return await self._run('get_books_top_rated', **kwargs)
+
+    async def get_categories(self, name: str) -> Tuple[int, str]:
+        return await self._run('get_categories', name)
+
+    async def get_stats_overview(self) -> Tuple[int, float, int, List[Tuple]]:
+        return await self._run('get_stats_overview')
+
+    async def get_stats_categories(self) -> Tuple[int, List[Tuple], List[Tuple]]:
+        return await self._run('get_stats_categories')
+
+    async def get_stats_snapshot(self) -> Optional[StatsSnapshot]:
+        return await self._run('get_stats_snapshot')
+
+    async def get_stats_by_price_range(self, **kwargs) -> Tuple[int, List[Book | Row]]:
+        return await self._run('get_stats_by_price_range', **kwargs)
@@ -1,11 +1,146 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, make_url
+from sqlalchemy.engine import URL, Engine
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import Session
 
+from api_books.metrics import instrument_engine
 from api_books.settings import Settings
 
-engine_conn = create_engine(Settings().DATABASE_URL)
+settings = Settings()
+
+# drivers assíncronos equivalentes aos drivers síncronos da DATABASE_URL
+ASYNC_DRIVERS = {'sqlite': 'sqlite+aiosqlite'}
+
+
+def get_async_database_url(database_url: str) -> str:
+    """Converte a DATABASE_URL síncrona (ex.: sqlite:///...) para o driver assíncrono."""
+    url = make_url(database_url)
+    drivername = ASYNC_DRIVERS.get(url.drivername, url.drivername)
+    return url.set(drivername=drivername).render_as_string(hide_password=False)
+
+
+def _is_sqlite_file(url: URL) -> bool:
+    return url.get_backend_name() == 'sqlite' and url.database not in {None, '', ':memory:'}
+
+
+def get_read_only_database_url(database_url: str) -> str:
+    """
+    URL do SQLite aberta em modo somente leitura (file:...?mode=ro).
+    Para bancos que não são arquivos SQLite, devolve a URL original.
+    """
+    url = make_url(database_url)
+    if not _is_sqlite_file(url) or url.database.startswith('file:'):
+        return database_url
+
+    read_only = url.set(database=f'file:{url.database}').update_query_dict({
+        'mode': 'ro',
+        'uri': 'true',
+    })
+    return read_only.render_as_string(hide_password=False)
+
+
+def sqlite_pragmas(settings: Settings, writer: bool) -> list[str]:
+    """PRAGMAs do perfil SQLite; journal_mode/synchronous só fazem sentido no writer."""
+    pragmas = [
+        f'PRAGMA busy_timeout = {settings.SQLITE_BUSY_TIMEOUT_MS}',
+        f'PRAGMA mmap_size = {settings.SQLITE_MMAP_SIZE}',
+        f'PRAGMA cache_size = {settings.SQLITE_CACHE_SIZE}',
+        f'PRAGMA temp_store = {settings.SQLITE_TEMP_STORE}',
+    ]
+    if writer:
+        pragmas += [
+            f'PRAGMA journal_mode = {settings.SQLITE_JOURNAL_MODE}',
+            f'PRAGMA synchronous = {settings.SQLITE_SYNCHRONOUS}',
+        ]
+    return pragmas
+
+
+def apply_sqlite_profile(engine: Engine, settings: Settings, writer: bool) -> Engine:
+    """Registra os PRAGMAs do perfil para cada nova conexão do engine."""
+    if not _is_sqlite_file(engine.url):
+        return engine
+
+    pragmas = sqlite_pragmas(settings, writer)
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+    return engine
+
+
+def _pool_options(database_url: str, pool_size: int, max_overflow: int) -> dict:
+    # SQLite em memória usa SingletonThreadPool/StaticPool, que não aceitam dimensionamento
+    if not _is_sqlite_file(make_url(database_url)):
+        return {}
+    return {'pool_size': pool_size, 'max_overflow': max_overflow}
+
+
+READ_DATABASE_URL = get_read_only_database_url(settings.DATABASE_URL)
+# SQLite aceita um único writer por vez: uma conexão só serializa as escritas no processo
+WRITE_POOL = _pool_options(settings.DATABASE_URL, pool_size=1, max_overflow=0)
+READ_POOL = _pool_options(
+    READ_DATABASE_URL, settings.DB_READ_POOL_SIZE, settings.DB_READ_POOL_MAX_OVERFLOW
+)
+
+# Writer: criação de usuários, ingestão (update_db) e scripts
+write_engine = apply_sqlite_profile(
+    create_engine(settings.DATABASE_URL, **WRITE_POOL), settings, writer=True
+)
+# Readers: pool de conexões somente leitura para os endpoints de consulta
+read_engine = apply_sqlite_profile(
+    create_engine(READ_DATABASE_URL, **READ_POOL), settings, writer=False
+)
+
+async_write_engine = create_async_engine(
+    get_async_database_url(settings.DATABASE_URL), **WRITE_POOL
+)
+apply_sqlite_profile(async_write_engine.sync_engine, settings, writer=True)
+
+async_read_engine = create_async_engine(get_async_database_url(READ_DATABASE_URL), **READ_POOL)
+apply_sqlite_profile(async_read_engine.sync_engine, settings, writer=False)
+
+# contagem e duração das consultas para o /metrics, o log de consultas lentas e o perfil de SQL
+for _engine in (write_engine, read_engine, async_write_engine, async_read_engine):
+    instrument_engine(getattr(_engine, 'sync_engine', _engine))
+
+
+def init_sqlite_profile(engine: Engine = write_engine):
+    """
+    Abre uma conexão no writer para fixar o journal_mode (WAL é persistente no arquivo).
+    As conexões somente leitura não podem alterá-lo.
+    """
+    with engine.connect():
+        pass
 
 
 def get_session():  # pragma: no cover
-    with Session(engine_conn) as session:
+    with Session(read_engine) as session:
+        yield session
+
+
+def get_write_session():  # pragma: no cover
+    with Session(write_engine) as session:
+        yield session
+
+
+def get_stream_session() -> Session:  # pragma: no cover
+    """
+    Sessão de leitura sem gerenciamento do FastAPI, para respostas em streaming:
+    dependências com `yield` são encerradas antes do corpo da resposta ser enviado,
+    então quem consome o stream é responsável por fechar a sessão.
+    """
+    return Session(read_engine)
+
+
+async def get_async_session():  # pragma: no cover
+    async with AsyncSession(async_read_engine, expire_on_commit=False) as session:
+        yield session
+
+
+async def get_async_write_session():  # pragma: no cover
+    async with AsyncSession(async_write_engine, expire_on_commit=False) as session:
         yield session
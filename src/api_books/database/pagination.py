@@ -0,0 +1,31 @@
+import base64
+import json
+from typing import Dict
+
+
+def encode_cursor(values: Dict) -> str:
+    """Gera um cursor opaco (base64 url-safe) com as chaves da última linha da página."""
+    raw = json.dumps(values, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode('ascii')
+
+
+def decode_cursor(cursor: str, keys: Dict[str, type]) -> Dict:
+    """
+    Decodifica um cursor gerado por `encode_cursor`.
+    `keys` mapeia cada chave esperada para o seu tipo (ex.: {'id': int}).
+    """
+    try:
+        padding = '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(cursor + padding))
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+
+    if not isinstance(values, dict) or sorted(values) != sorted(keys):
+        raise ValueError('Invalid cursor')
+
+    for key, key_type in keys.items():
+        value = values[key]
+        if isinstance(value, bool) or not isinstance(value, (key_type, int)):
+            raise ValueError('Invalid cursor')
+
+    return values
@@ -1,12 +1,18 @@
 from typing import List, Tuple
 
 from fastapi import Depends
-from sqlalchemy import func, select
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, defer
 
-from api_books.database.connection import get_session
+from api_books.database.connection import (
+    get_async_session,
+    get_async_write_session,
+    get_session,
+)
 from api_books.models import User
-from api_books.security.crypt import get_hash_from_password
+from api_books.security.principals import principal_cache
 
 
 class UserDataBase:
@@ -14,14 +20,32 @@ class UserDataBase:
         self.session = session
         self.model = User
 
-    def create_user(self, username: str, password: str, email: str, is_admin: bool) -> User:
-        hashed = get_hash_from_password(password)
-        new_user = self.model(username=username, password=hashed, email=email, is_admin=is_admin)
+    def create_user(self, username: str, hashed_password: str, email: str, is_admin: bool) -> User:
+        # o hash é calculado antes, no pool de hashing (security.crypt.password_hasher)
+        new_user = self.model(
+            username=username, password=hashed_password, email=email, is_admin=is_admin
+        )
         self.session.add(new_user)
-        self.session.commit()
+        try:
+            self.session.commit()
+        except IntegrityError:
+            # cadastro concorrente com o mesmo username/email, entre a checagem e o insert
+            self.session.rollback()
+            raise ValueError('Username or email already exists')
         self.session.refresh(new_user)
+        principal_cache.invalidate(new_user.username)
         return new_user
 
+    def update_password(self, user_id: int, hashed_password: str):
+        self.session.execute(
+            update(self.model).where(self.model.id == user_id).values(password=hashed_password)
+        )
+        self.session.commit()
+
+    def find_user_by_username(self, username: str) -> User:
+        # igualdade simples: usa o índice único de username (o OR com email não usa)
+        return self.session.scalar(select(self.model).where(self.model.username == username))
+
     def find_user_by_username_or_email(self, username: str = None, email: str = None) -> User:
         query = select(self.model)
         query = query.where((self.model.username == username) | (self.model.email == email))
@@ -33,3 +57,49 @@ class UserDataBase:
         users = self.session.scalars(query).all()
         count_users = self.session.scalar(select(func.count()).select_from(query.subquery()))
         return count_users, users
+
+
+class AsyncUserDataBase:
+    """Versão assíncrona do UserDataBase (ver AsyncBookDataBase)."""
+
+    def __init__(self, session: AsyncSession = Depends(get_async_session)):
+        self.session = session
+
+    async def _run(self, method_name: str, *args, **kwargs):
+        def call(sync_session: Session):
+            return getattr(UserDataBase(sync_session), method_name)(*args, **kwargs)
+
+        return await self.session.run_sync(call)
+
+    async def release(self):
+        """
+        Encerra a transação aberta pelas consultas (autobegin) e devolve a conexão
+        ao pool. Os objetos já carregados continuam acessíveis.
+        """
+        await self.session.close()
+
+    async def create_user(self, **kwargs) -> User:
+        return await self._run('create_user', **kwargs)
+
+    async def update_password(self, user_id: int, hashed_password: str):
+        return await self._run('update_password', user_id, hashed_password)
+
+    async def find_user_by_username(self, username: str) -> User:
+        return await self._run('find_user_by_username', username)
+
+    async def find_user_by_username_or_email(self, **kwargs) -> User:
+        return await self._run('find_user_by_username_or_email', **kwargs)
+
+    async def get_all_users(self) -> Tuple[int, List[User]]:
+        return await self._run('get_all_users')
+
+
+class AsyncUserWriterDataBase(AsyncUserDataBase):
+    """
+    AsyncUserDataBase sobre o engine de escrita (uma única conexão). Use só para as
+    escritas: a conexão fica presa até o fim da transação, então nada demorado (como
+    o hash da senha) pode ser aguardado entre a primeira consulta e o commit.
+    """
+
+    def __init__(self, session: AsyncSession = Depends(get_async_write_session)):
+        super().__init__(session)
@@ -4,19 +4,22 @@ from typing import Annotated
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.security import OAuth2PasswordRequestForm
 
-from api_books.database.users import UserDataBase
-from api_books.schemas import Login_Token, Token
+from api_books.database.users import AsyncUserDataBase, AsyncUserWriterDataBase
+from api_books.schemas import Login_Token, Message, Token
 from api_books.security.auth import (
     create_access_token,
     create_refresh_token,
+    get_admin_user,
     get_user_refreshed_tokenizer,
 )
-from api_books.security.crypt import is_valid_password
+from api_books.security.crypt import HashingPoolBusyException, password_hasher
+from api_books.security.principals import principal_cache
 
 router = APIRouter(prefix='/api/v1/auth', tags=['Auth'])
 
 OAuth2Form = Annotated[OAuth2PasswordRequestForm, Depends()]
-DBService = Annotated[UserDataBase, Depends()]
+DBService = Annotated[AsyncUserDataBase, Depends()]
+DBWriterService = Annotated[AsyncUserWriterDataBase, Depends()]
 
 
 @router.post(
@@ -25,18 +28,35 @@ DBService = Annotated[UserDataBase, Depends()]
     response_model=Login_Token,
     summary='Autentica um usuário e retorna um token JWT.',
 )
-def login_for_access_token(db: DBService, form_data: OAuth2Form):
+async def login_for_access_token(db: DBService, db_writer: DBWriterService, form_data: OAuth2Form):
     """
     Recebe credenciais de usuário (username e password) via formulário OAuth2.
+
+    Se a senha foi gravada com parâmetros do Argon2 diferentes dos atuais, o
+    hash é refeito com os parâmetros novos e salvo no login.
     """
-    user = db.find_user_by_username_or_email(username=form_data.username)
+    user = await db.find_user_by_username(form_data.username)
+    # a conexão de leitura não fica presa enquanto o hash espera no pool
+    await db.release()
 
     if not user:
         raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail='username not found')
 
-    if not is_valid_password(form_data.password, user.password):
+    try:
+        valid, new_hash = await password_hasher.verify_and_update(
+            form_data.password, user.password
+        )
+    except HashingPoolBusyException as e:
+        raise HTTPException(
+            status_code=HTTPStatus.SERVICE_UNAVAILABLE, detail=str(e), headers={'Retry-After': '1'}
+        )
+
+    if not valid:
         raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail='Incorrect password')
 
+    if new_hash is not None:
+        await db_writer.update_password(user.id, new_hash)
+
     access_token = create_access_token(claims={'sub': user.username})
     refresh_token = create_refresh_token(claims={'sub': user.username})
 
@@ -58,3 +78,23 @@ def refresh_access_token(current_user=Depends(get_user_refreshed_tokenizer)):
     new_access_token = create_access_token(claims={'sub': current_user.username})
 
     return {'access_token': new_access_token, 'token_type': 'bearer'}
+
+
+@router.delete(
+    '/principals',
+    status_code=HTTPStatus.OK,
+    response_model=Message,
+    summary='Descarta usuários do cache de autenticação (requer administrador).',
+)
+def invalidate_principals(username: str = None, admin_user=Depends(get_admin_user)):
+    """
+    Os usuários autenticados ficam em cache por `AUTH_PRINCIPAL_CACHE_TTL`
+    segundos. Use após alterar um usuário direto no banco: sem `username`,
+    esvazia o cache inteiro.
+    """
+    if username is None:
+        principal_cache.clear()
+        return {'message': 'Principal cache cleared'}
+
+    principal_cache.invalidate(username)
+    return {'message': f'Principal {username} invalidated'}
@@ -3,7 +3,7 @@ from typing import Annotated
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 
-from api_books.database.books import BookDataBase
+from api_books.database.books import AsyncBookDataBase
 from api_books.schemas import (
     BookSchema,
     BooksList,
@@ -12,13 +12,14 @@ from api_books.schemas import (
     FilterCategory,
     FilterPage,
 )
+from api_books.serialization import book_list_response
 
 router = APIRouter(prefix='/api/v1', tags=['Books'])
 
 FilterQueryBooks = Annotated[FilterBook, Query()]
 FilterQueryCategories = Annotated[FilterCategory, Query()]
 FilterQueryPage = Annotated[FilterPage, Query()]
-DBService = Annotated[BookDataBase, Depends()]
+DBService = Annotated[AsyncBookDataBase, Depends()]
 
 
 @router.get(
@@ -27,22 +28,31 @@ DBService = Annotated[BookDataBase, Depends()]
     response_model=BooksList,
     summary='Lista todos os livros disponíveis (Filtro opcional por título ou categoria).',
 )
-def get_books(db: DBService, param_request: FilterQueryBooks):
+async def get_books(db: DBService, param_request: FilterQueryBooks):
     """
     Obs.: A rota "GET /api/v1/books/search?title={title}&category={category}'
     '" está inclusa neste endpoint.
 
     Obtém todos os livros com opção de filtro pelos parâmetros title e category.
+
+    Para percorrer o catálogo inteiro prefira a paginação por cursor: informe `limit`
+    e repasse o `next_cursor` de cada resposta no parâmetro `cursor`.
     """
 
-    count_books, books = db.get_books(
-        title=param_request.title,
-        category=param_request.category,
-        offset=param_request.offset,
-        limit=param_request.limit,
-    )
+    try:
+        count_books, books, next_cursor = await db.get_books(
+            title=param_request.title,
+            category=param_request.category,
+            offset=param_request.offset,
+            limit=param_request.limit,
+            search_mode=param_request.search_mode,
+            cursor=param_request.cursor,
+            as_rows=True,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail=str(e))
 
-    return {'books': books.all(), 'total': count_books}
+    return book_list_response(count_books, books, next_cursor=next_cursor)
 
 
 @router.get(
@@ -51,14 +61,14 @@ def get_books(db: DBService, param_request: FilterQueryBooks):
     response_model=BookSchema,
     summary='Busca um único livro pelo seu ID.',
 )
-def get_book_by_id(book_id: int, db: DBService):
+async def get_book_by_id(book_id: int, db: DBService):
     try:
         if book_id <= 0:
             raise HTTPException(
                 status_code=HTTPStatus.BAD_REQUEST, detail='id should be a positive number'
             )
 
-        book = db.get_book_by_id(book_id)
+        book = await db.get_book_by_id(book_id)
     except ValueError:
         raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail='Not found')
 
@@ -71,12 +81,12 @@ def get_book_by_id(book_id: int, db: DBService):
     response_model=CategoriesList,
     summary='Lista todas as categorias de livros existentes.',
 )
-def get_books_categories(db: DBService, param_request: FilterQueryCategories):
+async def get_books_categories(db: DBService, param_request: FilterQueryCategories):
     """
     Retorna uma lista de strings, onde cada string é uma categoria única
     """
     if not param_request.name:
         param_request.name = ''
-    count_categories, categories = db.get_categories(param_request.name)
+    count_categories, categories = await db.get_categories(param_request.name)
 
     return {'categories': categories, 'total': count_categories}
@@ -0,0 +1,61 @@
+from http import HTTPStatus
+from typing import Annotated, Iterator
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from api_books.database.books import EXPORT_COLUMNS, BookDataBase
+from api_books.database.connection import get_stream_session
+from api_books.schemas import FilterExport
+from api_books.services.export import EXPORTERS, is_format_available
+
+router = APIRouter(prefix='/api/v1/download', tags=['Download'])
+
+FilterQueryExport = Annotated[FilterExport, Query()]
+StreamSession = Annotated[Session, Depends(get_stream_session)]
+
+# linhas lidas do banco (e enviadas ao cliente) por vez
+EXPORT_BATCH_SIZE = 5_000
+
+
+def _close_after(chunks: Iterator[bytes], session: Session) -> Iterator[bytes]:
+    """Repassa o stream e fecha a sessão ao final (ou se o cliente desconectar)."""
+    try:
+        yield from chunks
+    finally:
+        session.close()
+
+
+@router.get(
+    '/books',
+    status_code=HTTPStatus.OK,
+    summary='Exporta os livros cadastrados (csv, ndjson ou parquet)',
+)
+def download_books(param_request: FilterQueryExport, session: StreamSession):
+    """
+    Exporta os livros direto da tabela `books`, em lotes e com transferência em
+    blocos (chunked), usando memória constante mesmo para catálogos muito grandes.
+    Aceita os mesmos filtros de título e categoria de `GET /api/v1/books/`.
+    """
+    export_format = param_request.format.value
+    if not is_format_available(export_format):
+        session.close()
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_IMPLEMENTED,
+            detail=f"Format '{export_format}' is not available on this server",
+        )
+
+    exporter, media_type, extension = EXPORTERS[export_format]
+    batches = BookDataBase(session).iter_books(
+        title=param_request.title,
+        category=param_request.category,
+        search_mode=param_request.search_mode,
+        batch_size=EXPORT_BATCH_SIZE,
+    )
+
+    return StreamingResponse(
+        _close_after(exporter(EXPORT_COLUMNS, batches), session),
+        media_type=media_type,
+        headers={'Content-Disposition': f'attachment; filename=books.{extension}'},
+    )
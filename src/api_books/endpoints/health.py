@@ -2,13 +2,22 @@ from http import HTTPStatus
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import JSONResponse
 
-from api_books.health_check import HeathAPI
-from api_books.schemas import RespostaHealthCheck
+from api_books.health_check import HealthProber, HeathAPI, get_health_prober
+from api_books.middlewares.logging import skip_request_log
+from api_books.schemas import Message, RespostaHealthCheck
+from api_books.settings import Settings
+
+settings = Settings()
+
+# lido uma vez: a readiness é chamada a cada poucos segundos pelo load balancer
+READY_REQUIRES_CONNECTIVITY = settings.HEALTH_READY_REQUIRES_CONNECTIVITY
 
 router = APIRouter(tags=['Monitoring'])
 
 HealthService = Annotated[HeathAPI, Depends()]
+Prober = Annotated[HealthProber, Depends(get_health_prober)]
 
 
 @router.get(
@@ -20,7 +29,8 @@ HealthService = Annotated[HeathAPI, Depends()]
 )
 def get_health_status(hc: HealthService):
     """
-    Retorna o status da API e do banco de dados
+    Retorna o status da API e do banco de dados, conforme a última verificação
+    feita em segundo plano (a cada `HEALTH_PROBE_INTERVAL` segundos).
     """
     is_healthy = hc.run_all_checks()
 
@@ -43,3 +53,43 @@ def get_health_status(hc: HealthService):
         )
 
     return response_body
+
+
+@router.get(
+    '/api/v1/health/live',
+    summary='Liveness: o processo está respondendo',
+    response_model=Message,
+)
+@skip_request_log
+async def get_liveness():
+    """Não consulta nenhuma dependência: só indica que o event loop está atendendo."""
+    return {'message': 'alive'}
+
+
+@router.get(
+    '/api/v1/health/ready',
+    summary='Readiness: a API pode receber tráfego',
+    response_model=RespostaHealthCheck,
+    responses={HTTPStatus.SERVICE_UNAVAILABLE: {'description': 'Dependência indisponível'}},
+)
+@skip_request_log
+async def get_readiness(prober: Prober):
+    """
+    Lê o último resultado do prober em segundo plano. Responde 503 se o banco
+    estiver fora, se a última verificação for antiga demais ou, com
+    `HEALTH_READY_REQUIRES_CONNECTIVITY=true`, sem conectividade externa.
+    """
+    statuses = prober.statuses
+    response_body = {
+        'api_status': 'up',
+        'database': {'status': statuses['database'].status, 'error': statuses['database'].error},
+        'internet_connectivity': {
+            'status': statuses['internet_connectivity'].status,
+            'error': statuses['internet_connectivity'].error,
+        },
+    }
+
+    if not prober.is_ready(READY_REQUIRES_CONNECTIVITY):
+        return JSONResponse(status_code=HTTPStatus.SERVICE_UNAVAILABLE, content=response_body)
+
+    return response_body
@@ -1,9 +1,9 @@
 from http import HTTPStatus
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 
-from api_books.database.books import BookDataBase
+from api_books.database.books import AsyncBookDataBase
 from api_books.schemas import (
     BooksList,
     FilterPage,
@@ -12,13 +12,16 @@ from api_books.schemas import (
     StatsOverview,
     StatsPriceRange,
 )
+from api_books.serialization import book_list_response
 
 router = APIRouter(prefix='/api/v1/stats', tags=['Insights'])
 
-DBService = Annotated[BookDataBase, Depends()]
+DBService = Annotated[AsyncBookDataBase, Depends()]
 FilterQueryPage = Annotated[FilterPage, Query()]
 FilterPriceRange = Annotated[FilterStatPriceRange, Query()]
 
+DATASET_VERSION_HEADER = 'X-Dataset-Version'
+
 
 @router.get(
     '/overview/',
@@ -26,11 +29,25 @@ FilterPriceRange = Annotated[FilterStatPriceRange, Query()]
     response_model=StatsOverview,
     summary='Fornece um resumo estatístico da coleção de livros.',
 )
-def get_books_stats_overview(db: DBService):
+async def get_books_stats_overview(db: DBService, response: Response):
     """Estatísticas  gerais  da  coleção  (total  de livros,
-    preço médio, distribuição de ratings)"""
+    preço médio, distribuição de ratings)
 
-    total_books, avg_price, count_categories, rating_dist = db.get_stats_overview()
+    Servido a partir do snapshot calculado na última ingestão; o cabeçalho
+    `X-Dataset-Version` identifica qual ingestão gerou os números.
+    """
+    snapshot = await db.get_stats_snapshot()
+    if snapshot is not None:
+        response.headers[DATASET_VERSION_HEADER] = snapshot.dataset_version
+        return {
+            'total_books': snapshot.total_books,
+            'average_price': snapshot.average_price,
+            'count_categories': snapshot.count_categories,
+            'rating_distribuition': snapshot.rating_distribution,
+        }
+
+    # sem snapshot (base ainda não ingerida): calcula direto no banco
+    total_books, avg_price, count_categories, rating_dist = await db.get_stats_overview()
     rating_distribution = {rating: count for rating, count in rating_dist}
     return {
         'total_books': total_books,
@@ -46,12 +63,18 @@ def get_books_stats_overview(db: DBService):
     response_model=BooksList,
     summary='Obtém todos os livros por ordem dos mais bem avaliadaos',
 )
-def get_books_top_rated(db: DBService, param_request: FilterQueryPage):
-    total_books, books = db.get_books_top_rated(
-        offset=param_request.offset, limit=param_request.limit
-    )
+async def get_books_top_rated(db: DBService, param_request: FilterQueryPage):
+    try:
+        total_books, books, next_cursor = await db.get_books_top_rated(
+            offset=param_request.offset,
+            limit=param_request.limit,
+            cursor=param_request.cursor,
+            as_rows=True,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail=str(e))
 
-    return {'total': total_books, 'books': books}
+    return book_list_response(total_books, books, next_cursor=next_cursor)
 
 
 @router.get(
@@ -60,12 +83,12 @@ def get_books_top_rated(db: DBService, param_request: FilterQueryPage):
     response_model=StatsPriceRange,
     summary='Distribuição de preços por categoria',
 )
-def get_books_stats_price_range(db: DBService, param_request: FilterPriceRange):
-    total_books, books = db.get_stats_by_price_range(
-        min_price=param_request.min_price, max_price=param_request.max_price
+async def get_books_stats_price_range(db: DBService, param_request: FilterPriceRange):
+    total_books, books = await db.get_stats_by_price_range(
+        min_price=param_request.min_price, max_price=param_request.max_price, as_rows=True
     )
 
-    return {'total': total_books, 'books': books}
+    return book_list_response(total_books, books)
 
 
 @router.get(
@@ -74,12 +97,24 @@ def get_books_stats_price_range(db: DBService, param_request: FilterPriceRange):
     response_model=StatsCategories,
     summary='Lista todas as categorias de livros.',
 )
-def get_categories_stats_overview(db: DBService):
+async def get_categories_stats_overview(db: DBService, response: Response):
     """
     Retorna uma lista de strings, onde cada string é uma categoria única
     """
-
-    total_categories, categories_count_dist, categories_price_dist = db.get_stats_categories()
+    snapshot = await db.get_stats_snapshot()
+    if snapshot is not None:
+        response.headers[DATASET_VERSION_HEADER] = snapshot.dataset_version
+        return {
+            'total_categories': snapshot.count_categories,
+            'categories_count_distribution': snapshot.categories_count_distribution,
+            'categories_avg_price_distribution': snapshot.categories_avg_price_distribution,
+        }
+
+    (
+        total_categories,
+        categories_count_dist,
+        categories_price_dist,
+    ) = await db.get_stats_categories()
 
     categories_count_distribution = {category: count for category, count in categories_count_dist}
 
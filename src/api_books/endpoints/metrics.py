@@ -0,0 +1,50 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from api_books.metrics import registry
+from api_books.middlewares.cache import response_cache
+from api_books.middlewares.logging import skip_request_log
+from api_books.security.crypt import password_hasher
+from api_books.security.principals import principal_cache
+
+router = APIRouter(tags=['Monitoring'])
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# gauges lidos na hora da coleta, direto das estruturas que já mantêm os valores
+registry.gauge_callback(
+    'password_hash_pool',
+    'Estado do pool de hashing de senhas (running, queued, completed, rejected).',
+    lambda: {(name,): value for name, value in password_hasher.stats().items()},
+    ('state',),
+)
+registry.gauge_callback(
+    'response_cache_entries',
+    'Respostas no cache em memória.',
+    lambda: {(): len(response_cache)},
+)
+registry.gauge_callback(
+    'response_cache_bytes',
+    'Bytes ocupados pelo cache de respostas.',
+    lambda: {(): response_cache.size},
+)
+registry.gauge_callback(
+    'principal_cache_entries',
+    'Usuários autenticados em cache.',
+    lambda: {(): len(principal_cache)},
+)
+
+
+@router.get(
+    '/metrics',
+    summary='Métricas da API no formato do Prometheus',
+    response_class=PlainTextResponse,
+)
+@skip_request_log
+def get_metrics():
+    """
+    Contadores e histogramas de latência por rota, requisições em andamento,
+    consultas SQL por rota, jobs de scraping e ingestões, no formato texto do
+    Prometheus.
+    """
+    return PlainTextResponse(registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -1,23 +1,50 @@
-import random
 from http import HTTPStatus
 from typing import Annotated, List
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+import anyio
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 
-from api_books.database.books import BookDataBase
-from api_books.ml_model import fake_model
+from api_books.database.books import AsyncBookDataBase
+from api_books.ml_model import (
+    FAKE_MODEL_VERSION,
+    ModelRegistry,
+    PriceModel,
+    get_model_registry,
+)
 from api_books.schemas import (
     FilterBook,
+    FilterTrainingData,
     MLFeature,
     MLTraining_DataList,
+    ModelInfo,
+    ModelList,
     PredictionInput,
     PredictionOutput,
+    TrainModel,
+)
+from api_books.security.auth import get_user_tokenizer
+from api_books.services.predictions import (
+    NDJSON_MEDIA_TYPE,
+    BatchTooLargeException,
+    iter_ndjson,
+    parse_batch,
 )
+from api_books.services.training_data import (
+    ENCODERS,
+    build_training_data,
+    is_format_available,
+    to_json,
+)
+from api_books.settings import Settings
 
 router = APIRouter(prefix='/api/v1/ml', tags=['ML Ready'])
 
 FilterQueryBooks = Annotated[FilterBook, Query()]
-DBService = Annotated[BookDataBase, Depends()]
+FilterQueryTraining = Annotated[FilterTrainingData, Query()]
+DBService = Annotated[AsyncBookDataBase, Depends()]
+Registry = Annotated[ModelRegistry, Depends(get_model_registry)]
+TrainQuery = Annotated[TrainModel, Query()]
 
 
 @router.get(
@@ -26,17 +53,22 @@ DBService = Annotated[BookDataBase, Depends()]
     response_model=List[MLFeature],
     summary='Extrai features prontas para modelos de Machine Learning.',
 )
-def get_features(db: DBService, param_request: FilterQueryBooks):
+async def get_features(db: DBService, param_request: FilterQueryBooks):
     """
      Retorna um conjunto de dados simplificado contendo apenas as features
     `availability` e `rating`, que podem ser usadas para treinar um modelo de ML.
     """
-    _, books = db.get_books(
-        title=param_request.title,
-        category=param_request.category,
-        offset=param_request.offset,
-        limit=param_request.limit,
-    )
+    try:
+        _, books, _ = await db.get_books(
+            title=param_request.title,
+            category=param_request.category,
+            offset=param_request.offset,
+            limit=param_request.limit,
+            search_mode=param_request.search_mode,
+            cursor=param_request.cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail=str(e))
 
     features = []
     for book in books:
@@ -51,40 +83,56 @@ def get_features(db: DBService, param_request: FilterQueryBooks):
     response_model=MLTraining_DataList,
     summary='Fornece um conjunto de dados de treinamento (features + label).',
 )
-def get_training_data(db: DBService):
+async def get_training_data(db: DBService, param_request: FilterQueryTraining):
     """
-    Retorna uma amostra de 80% dos dados, contendo as features (`availability`, `rating`)
-    e o label (`price`), pronto para ser usado no treinamento de um modelo
-    de regressão para prever o preço.
-    """
-    _, books = db.get_books()
+    Retorna os dados divididos em treino e teste, contendo as features (`availability`,
+    `rating`) e o label (`price`), prontos para o treinamento de um modelo de
+    regressão para prever o preço.
 
-    # Listas para armazenar os dados de treinamento (80%) e os dados restantes (20%)
-    training_features = []
-    test_features = []
-    training_probability = 0.8
+    O split é determinístico: cada livro vai para teste conforme o hash do seu id
+    e da `seed`, então a mesma requisição sempre devolve a mesma divisão. Com
+    `stratify=true` a proporção de teste é mantida dentro de cada categoria.
+    Para volumes grandes use `format=arrow` (Arrow IPC) ou `format=npz` (NumPy).
+    """
+    export_format = param_request.format.value
+    if not is_format_available(export_format):
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_IMPLEMENTED,
+            detail=f"Format '{export_format}' is not available on this server",
+        )
 
-    # Iterar sobre o ScalarResult uma única vez
-    for book in books:
-        feature = {
-            'x1_availability': book.availability,
-            'x2_rating': book.rating,
-            'y_label_price': book.price,
-        }
-        # Decidir aleatoriamente se o item vai para treinamento (80%) ou restante (20%)
-        if random.random() < training_probability:
-            training_features.append(feature)
-        else:
-            test_features.append(feature)
-
-    # Verificar se há dados suficientes
-    if not training_features and not test_features:
+    columns = await db.get_training_columns(category=param_request.category)
+    if not columns['id']:
         raise HTTPException(
             status_code=HTTPStatus.NOT_FOUND,
             detail='Nenhum livro encontrado',
         )
 
-    return {'training': training_features, 'test': test_features}
+    def build():
+        data = build_training_data(
+            columns,
+            test_size=param_request.test_size,
+            seed=param_request.seed,
+            stratify=param_request.stratify,
+        )
+        if export_format == 'json':
+            return to_json(data)
+        encoder, _, _ = ENCODERS[export_format]
+        return encoder(data)
+
+    # montagem vetorizada, mas fora do event loop para bases grandes
+    content = await anyio.to_thread.run_sync(build)
+
+    if export_format == 'json':
+        # já está no formato de MLTraining_DataList: evita validar linha a linha
+        return JSONResponse(content=content)
+
+    _, media_type, extension = ENCODERS[export_format]
+    return Response(
+        content=content,
+        media_type=media_type,
+        headers={'Content-Disposition': f'attachment; filename=training-data.{extension}'},
+    )
 
 
 @router.post(
@@ -93,14 +141,158 @@ def get_training_data(db: DBService):
     response_model=PredictionOutput,
     summary='Prevê o preço de um livro com base em suas features.',
 )
-async def get_predictions(input: PredictionInput):
+async def get_predictions(input: PredictionInput, registry: Registry):
     """
-    Recebe a disponibilidade (`availability`) e a avaliação (`rating`) de um livro
-    e utiliza um modelo de Machine Learning (simulado) para prever seu preço.
+    Recebe a disponibilidade (`availability`), a avaliação (`rating`) e,
+    opcionalmente, a categoria de um livro e utiliza o modelo ativo para prever
+    seu preço. Sem modelo treinado, usa o modelo simulado (`model_version=fake`).
     """
     try:
-        return fake_model(input)
+        return registry.predict(input)
     except Exception:
         raise HTTPException(
             status_code=HTTPStatus.BAD_REQUEST, detail='Features inválidas ou erro na predição'
         )
+
+
+_BATCH_EXAMPLE = {'x1_availability': [10, 3], 'x2_rating': [4.0, 2.5]}
+
+
+@router.post(
+    '/predictions/batch',
+    status_code=HTTPStatus.OK,
+    summary='Prevê o preço de vários livros em uma única requisição.',
+    openapi_extra={
+        'requestBody': {
+            'required': True,
+            'content': {
+                'application/json': {'example': _BATCH_EXAMPLE},
+                NDJSON_MEDIA_TYPE: {
+                    'example': '{"x1_availability": 10, "x2_rating": 4.0}\n'
+                    '{"x1_availability": 3, "x2_rating": 2.5}\n'
+                },
+            },
+        }
+    },
+)
+async def get_predictions_batch(request: Request, registry: Registry):
+    """
+    Recebe um lote de features em formato colunar (`application/json`, um array
+    por feature) ou NDJSON (`application/x-ndjson`, um `PredictionInput` por
+    linha) e avalia o modelo de uma vez sobre todas as linhas.
+
+    A resposta segue o formato da requisição e mantém a ordem das linhas:
+    arrays `predicted_price` e `confidence`, ou NDJSON enviado em streaming.
+    A categoria (`category`) é opcional, como no `PredictionInput`.
+    O tamanho do lote é limitado por `ML_BATCH_MAX_ROWS`.
+    """
+    body = await request.body()
+    try:
+        batch = parse_batch(
+            body,
+            request.headers.get('content-type', ''),
+            max_rows=Settings().ML_BATCH_MAX_ROWS,
+        )
+    except BatchTooLargeException as e:
+        raise HTTPException(status_code=HTTPStatus.REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=HTTPStatus.UNPROCESSABLE_ENTITY, detail=str(e))
+
+    predicted_price, confidence, model_version = registry.predict_batch(
+        batch.availability, batch.rating, batch.category
+    )
+
+    if batch.ndjson:
+        return StreamingResponse(
+            iter_ndjson(predicted_price, confidence, model_version=model_version),
+            media_type=NDJSON_MEDIA_TYPE,
+        )
+    return JSONResponse(
+        content={
+            'predicted_price': predicted_price.tolist(),
+            'confidence': confidence.tolist(),
+            'model_version': model_version,
+        }
+    )
+
+
+def _model_info(model: PriceModel, active_version: str) -> ModelInfo:
+    return ModelInfo(
+        version=model.version,
+        rmse=model.rmse,
+        trained_at=model.metadata['trained_at'],
+        n_train=model.metadata['n_train'],
+        n_test=model.metadata['n_test'],
+        categories=len(model.categories),
+        active=model.version == active_version,
+    )
+
+
+def _active_version(registry: ModelRegistry) -> str:
+    return registry.active.version if registry.active else FAKE_MODEL_VERSION
+
+
+@router.get(
+    '/models/',
+    status_code=HTTPStatus.OK,
+    response_model=ModelList,
+    summary='Lista as versões treinadas do modelo de preço.',
+)
+async def get_models(registry: Registry):
+    """Versões salvas em disco (mais recentes primeiro) e a versão ativa."""
+    active_version = _active_version(registry)
+    models = await anyio.to_thread.run_sync(registry.versions)
+
+    return ModelList(
+        active_version=active_version,
+        models=[_model_info(model, active_version) for model in models],
+    )
+
+
+@router.post(
+    '/models/train',
+    status_code=HTTPStatus.CREATED,
+    response_model=ModelInfo,
+    summary='Treina uma nova versão do modelo de preço (requer autenticação).',
+)
+async def train_model(
+    db: DBService,
+    registry: Registry,
+    param_request: TrainQuery,
+    authorized_user=Depends(get_user_tokenizer),
+):
+    """
+    Ajusta uma regressão linear (mínimos quadrados) de `price` sobre `availability`,
+    `rating` e a categoria (one-hot), com o mesmo split determinístico do
+    endpoint `training-data`. A versão é salva em disco e, com `promote=true`,
+    passa a atender as predições imediatamente.
+    """
+    columns = await db.get_training_columns()
+    if not columns['id']:
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail='Nenhum livro encontrado')
+
+    model = await anyio.to_thread.run_sync(
+        lambda: registry.train(columns, test_size=param_request.test_size, seed=param_request.seed)
+    )
+    if param_request.promote:
+        await anyio.to_thread.run_sync(registry.promote, model.version)
+
+    return _model_info(model, _active_version(registry))
+
+
+@router.post(
+    '/models/{version}/promote',
+    status_code=HTTPStatus.OK,
+    response_model=ModelInfo,
+    summary='Promove uma versão do modelo para atender as predições (requer autenticação).',
+)
+async def promote_model(
+    version: str, registry: Registry, authorized_user=Depends(get_user_tokenizer)
+):
+    """Troca o modelo ativo de forma atômica; as predições seguintes já usam a nova versão."""
+    try:
+        model = await anyio.to_thread.run_sync(registry.promote, version)
+    except ValueError as e:
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail=str(e))
+
+    return _model_info(model, model.version)
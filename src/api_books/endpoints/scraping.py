@@ -1,31 +1,57 @@
-import asyncio
 from http import HTTPStatus
+from typing import Annotated
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Response
 
+from api_books.schemas import ScrapingJob, ScrapingJobAccepted
 from api_books.security.auth import get_user_tokenizer
-from api_books.services.scraper import AsyncBookScraper
-from api_books.services.update_db_from_csv import update_db
+from api_books.services.jobs import JobManager, get_job_manager
 
 router = APIRouter(prefix='/api/v1/scraping', tags=['Admin'])
 
+Jobs = Annotated[JobManager, Depends(get_job_manager)]
+
 
 @router.post(
     '/trigger',
-    status_code=HTTPStatus.CREATED,
+    status_code=HTTPStatus.ACCEPTED,
+    response_model=ScrapingJobAccepted,
     summary='Iniciar processo de scraping (requer autenticação)',
-    response_description='Confirmação de que o processo de scraping para atualização'
-    ' dos dados foi iniciado com sucesso.'
+    response_description='Identificador do job de scraping e ingestão iniciado.'
     ' A operação é executada em segundo plano (background).',
 )
-async def update_csv_db(authorized_user=Depends(get_user_tokenizer)):
+async def update_csv_db(
+    response: Response, jobs: Jobs, authorized_user=Depends(get_user_tokenizer)
+):
     """
     Este é um endpoint protegido que inicia o processo de web scraping
     do site 'books.toscrape.com' para atualizar a base de dados.
+
+    Retorna imediatamente com o id do job; o andamento é consultado em
+    `GET /api/v1/scraping/jobs/{job_id}`. Se já houver um job em andamento,
+    o pedido é agregado a ele (`coalesced`).
     """
-    scrap_services = AsyncBookScraper()
-    await scrap_services.run()
-    await asyncio.sleep(0.5)
-    update_db()
+    job, coalesced = jobs.submit()
+    response.headers['Location'] = f'{router.prefix}/jobs/{job.id}'
+
+    return ScrapingJobAccepted(
+        message='Scraping job already running' if coalesced else 'Scraping job started',
+        job_id=job.id,
+        status=job.status,
+        coalesced=coalesced,
+    )
+
+
+@router.get(
+    '/jobs/{job_id}',
+    status_code=HTTPStatus.OK,
+    response_model=ScrapingJob,
+    summary='Consultar o andamento de um job de scraping (requer autenticação)',
+)
+async def get_scraping_job(job_id: str, jobs: Jobs, authorized_user=Depends(get_user_tokenizer)):
+    """Etapa atual, duração de cada etapa e contagens do job."""
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail='Job not found')
 
-    return {'message': 'Data updated successfully'}
+    return job
@@ -3,13 +3,15 @@ from typing import Annotated
 
 from fastapi import APIRouter, Depends, HTTPException
 
-from api_books.database.users import UserDataBase
+from api_books.database.users import AsyncUserDataBase, AsyncUserWriterDataBase
 from api_books.schemas import UserBase, UserList, UserResponse
 from api_books.security.auth import get_user_tokenizer
+from api_books.security.crypt import HashingPoolBusyException, password_hasher
 
 router = APIRouter(prefix='/api/v1/users', tags=['Users'])
 
-DBService = Annotated[UserDataBase, Depends()]
+DBService = Annotated[AsyncUserDataBase, Depends()]
+DBWriterService = Annotated[AsyncUserWriterDataBase, Depends()]
 
 
 @router.post(
@@ -18,10 +20,13 @@ DBService = Annotated[UserDataBase, Depends()]
     response_model=UserResponse,
     summary='Cria um novo usuário no banco de dados',
 )
-async def create_user(userschema: UserBase, db: DBService):
-    queried_user = db.find_user_by_username_or_email(
+async def create_user(userschema: UserBase, db: DBService, db_writer: DBWriterService):
+    # checagem no pool de leitura: o writer (uma conexão) só é usado no insert,
+    # para que os cadastros não esperem uns pelos hashes dos outros
+    queried_user = await db.find_user_by_username_or_email(
         username=userschema.username, email=userschema.email
     )
+    await db.release()
 
     if queried_user:
         if queried_user.username == userschema.username:
@@ -29,12 +34,22 @@ async def create_user(userschema: UserBase, db: DBService):
         if queried_user.email == userschema.email:
             raise HTTPException(status_code=HTTPStatus.CONFLICT, detail='Email already exists')
 
-    new_user = db.create_user(
-        username=userschema.username,
-        password=userschema.password,
-        email=userschema.email,
-        is_admin=userschema.is_admin,
-    )
+    try:
+        hashed_password = await password_hasher.hash(userschema.password)
+    except HashingPoolBusyException as e:
+        raise HTTPException(
+            status_code=HTTPStatus.SERVICE_UNAVAILABLE, detail=str(e), headers={'Retry-After': '1'}
+        )
+
+    try:
+        new_user = await db_writer.create_user(
+            username=userschema.username,
+            hashed_password=hashed_password,
+            email=userschema.email,
+            is_admin=userschema.is_admin,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=HTTPStatus.CONFLICT, detail=str(e))
     return new_user
 
 
@@ -44,7 +59,7 @@ async def create_user(userschema: UserBase, db: DBService):
     response_model=UserList,
     summary='Lista todos os usuários no banco de dados',
 )
-def get_users(db: DBService, authorized_user=Depends(get_user_tokenizer)):
-    total, users = db.get_all_users()
+async def get_users(db: DBService, authorized_user=Depends(get_user_tokenizer)):
+    total, users = await db.get_all_users()
 
     return {'users': users, 'total': total}
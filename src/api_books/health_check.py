@@ -1,54 +1,170 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+import anyio
 import httpx
 from fastapi import Depends
-from sqlalchemy import text
-from sqlalchemy.exc import OperationalError
-from sqlalchemy.orm import Session
+from sqlalchemy import Engine, text
+from sqlalchemy.exc import SQLAlchemyError
 
-from api_books.database.connection import get_session
+from api_books.database.connection import read_engine
+from api_books.logging_config import app_logger
+from api_books.settings import Settings
 
-EXTERNAL_CONNECTIVITY_TEST_URL = 'https://www.google.com'
+settings = Settings()
 
 
-class HeathAPI:
-    def __init__(self, session: Session = Depends(get_session)):
-        self.session = session
-        self.api_status = 'up'
-        self.db_status = 'unknown'
-        self.internet_connectivity_status = 'unknown'
-        self.db_error = None
-        self.internet_connectivity_error = None
+@dataclass(frozen=True)
+class DependencyStatus:
+    status: str  # 'up', 'down' ou 'unknown' (antes da primeira verificação)
+    error: Optional[str] = None
+    checked_at: Optional[float] = None  # time.monotonic() da verificação
+    latency_ms: Optional[float] = None
+
+
+UNKNOWN = DependencyStatus(status='unknown')
+
 
-    def check_db(self) -> bool:
+class HealthProber:
+    """
+    Verifica as dependências (banco e conectividade externa) em segundo plano, a
+    cada `interval` segundos, e guarda o último resultado.
+
+    Os endpoints de saúde só leem esse resultado: nenhuma requisição de load
+    balancer abre sessão no banco ou espera a rede. Sem `connectivity_url` a
+    verificação de conectividade é desligada.
+    """
+
+    def __init__(
+        self,
+        interval: float,
+        connectivity_url: Optional[str],
+        timeout: float,
+        engine: Engine = read_engine,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.interval = interval
+        self.connectivity_url = connectivity_url or None
+        self.timeout = timeout
+        self.engine = engine
+        self.transport = transport
+        self._statuses: Dict[str, DependencyStatus] = {
+            'database': UNKNOWN,
+            'internet_connectivity': UNKNOWN,
+        }
+        self._task: Optional[asyncio.Task] = None
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def statuses(self) -> Dict[str, DependencyStatus]:
+        return self._statuses
+
+    def _ping_db(self):
+        with self.engine.connect() as connection:
+            connection.execute(text('SELECT 1'))
+
+    async def check_db(self) -> DependencyStatus:
         """Faz uma consulta teste no banco de dados"""
+        start = time.monotonic()
         try:
-            self.session.execute(text('SELECT 1'))
-            self.db_status = 'up'
-            return True
-        except OperationalError as e:
-            self.db_status = 'down'
-            self.db_error = str(e)
-            return False
+            with anyio.fail_after(self.timeout):
+                await anyio.to_thread.run_sync(self._ping_db, abandon_on_cancel=True)
+        except (SQLAlchemyError, TimeoutError) as e:
+            return DependencyStatus('down', str(e) or 'Timeout', start)
+        return DependencyStatus('up', None, start, (time.monotonic() - start) * 1000)
 
-    def check_internet_connectivity(self) -> bool:
-        """Verifica a conectividade externa fazendo uma requisição para um site estável."""
+    async def check_internet_connectivity(self) -> DependencyStatus:
+        """Verifica a conectividade externa fazendo uma requisição para `connectivity_url`."""
+        start = time.monotonic()
+        if self.connectivity_url is None:
+            return DependencyStatus('up', None, start)
         try:
-            # Usamos a nova URL
-            response = httpx.get(EXTERNAL_CONNECTIVITY_TEST_URL, timeout=5.0)
+            response = await self._client.get(self.connectivity_url)
             response.raise_for_status()
-            self.internet_connectivity_status = 'up'
-            return True
         except httpx.RequestError as e:
-            self.internet_connectivity_status = 'down'
-            self.internet_connectivity_error = f'Erro de conexão: {e.__class__.__name__}'
-            return False
+            return DependencyStatus('down', f'Erro de conexão: {e.__class__.__name__}', start)
         except httpx.HTTPStatusError as e:
-            self.internet_connectivity_status = 'down'
-            self.internet_connectivity_error = f'Status de erro recebido: {e.response.status_code}'
+            return DependencyStatus(
+                'down', f'Status de erro recebido: {e.response.status_code}', start
+            )
+        return DependencyStatus('up', None, start, (time.monotonic() - start) * 1000)
+
+    async def refresh(self):
+        database, internet = await asyncio.gather(
+            self.check_db(), self.check_internet_connectivity()
+        )
+        # troca o dicionário inteiro: leitores nunca veem um resultado pela metade
+        self._statuses = {'database': database, 'internet_connectivity': internet}
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.refresh()
+            except Exception:
+                app_logger.exception('Health probe failed')
+
+    async def start(self):
+        """Faz a primeira verificação (antes de aceitar tráfego) e agenda as próximas."""
+        self._client = httpx.AsyncClient(timeout=self.timeout, transport=self.transport)
+        await self.refresh()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def is_stale(self) -> bool:
+        """Sem verificação recente (prober parado ou travado): não confiar no resultado."""
+        checked_at = [status.checked_at for status in self._statuses.values()]
+        if None in checked_at:
+            return True
+        return time.monotonic() - min(checked_at) > 3 * self.interval + self.timeout
+
+    def is_ready(self, require_connectivity: bool) -> bool:
+        if self.is_stale():
             return False
+        required = ['database'] + (['internet_connectivity'] if require_connectivity else [])
+        return all(self._statuses[name].status == 'up' for name in required)
+
+
+health_prober = HealthProber(
+    interval=settings.HEALTH_PROBE_INTERVAL,
+    connectivity_url=settings.HEALTH_CONNECTIVITY_URL,
+    timeout=settings.HEALTH_PROBE_TIMEOUT,
+)
+
+
+def get_health_prober() -> HealthProber:
+    return health_prober
+
+
+class HeathAPI:
+    """Visão do último resultado do HealthProber no formato de `/api/v1/health`."""
+
+    def __init__(self, prober: HealthProber = Depends(get_health_prober)):
+        self.prober = prober
+        self.api_status = 'up'
+        self.db_status = 'unknown'
+        self.internet_connectivity_status = 'unknown'
+        self.db_error = None
+        self.internet_connectivity_error = None
 
     def run_all_checks(self) -> bool:
-        """Executa todas as verificações e retorna True se tudo estiver OK."""
-        db_ok = self.check_db()
-        # Chamamos o método renomeado
-        internet_ok = self.check_internet_connectivity()
-        return db_ok and internet_ok
+        """Lê as verificações em cache e retorna True se tudo estiver OK."""
+        statuses = self.prober.statuses
+        self.db_status = statuses['database'].status
+        self.db_error = statuses['database'].error
+        self.internet_connectivity_status = statuses['internet_connectivity'].status
+        self.internet_connectivity_error = statuses['internet_connectivity'].error
+        return self.prober.is_ready(require_connectivity=True)
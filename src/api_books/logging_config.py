@@ -1,3 +1,4 @@
+import json
 import sys
 
 from loguru import logger
@@ -19,15 +20,34 @@ logger.add(
 )
 
 # --- Configuração do Logger para ARQUIVO ---
+# Uma linha JSON por registro, com os campos de `extra[key]`.
+
+
+def json_format(key: str):
+    def format_record(record) -> str:
+        # o loguru formata no `emit`, na thread que fez o log (o event loop, nos
+        # middlewares): com enqueue=True só a escrita no arquivo vai para a thread
+        # do sink. Por isso os registros são pequenos e o de requisições é amostrado.
+        record['extra']['_json'] = json.dumps({
+            'time': record['time'].isoformat(),
+            'level': record['level'].name,
+            **record['extra'][key],
+        })
+        return '{extra[_json]}\n'
+
+    return format_record
+
+
+# registros do LoggingMiddleware (`extra[request]`)
+json_request_format = json_format('request')
+
+
 # O caminho "logs/api_requests.log"
 logger.add(
     'logs/api_requests.log',
     level='INFO',
-    format=(
-        '{time:DD/MM/YYYY HH:mm:ss} | {level: <8} | '
-        '{extra[ip]} | {extra[method]}-{extra[url]: <50} | {extra[status_code]} | '
-        'process_time: {extra[process_time]:.2f}ms'
-    ),
+    format=json_request_format,
+    filter=lambda record: 'request' in record['extra'],
     rotation='5 MB',  # Cria um novo arquivo quando o atual atingir 5 MB.
     retention='30 days',
     compression='zip',
@@ -36,5 +56,17 @@ logger.add(
     diagnose=True,  # Adiciona informações de diagnóstico em exceções.
 )
 
+# Consultas lentas e perfis de SQL por requisição (`extra[sql]`)
+logger.add(
+    'logs/sql_queries.log',
+    level='INFO',
+    format=json_format('sql'),
+    filter=lambda record: 'sql' in record['extra'],
+    rotation='5 MB',
+    retention='30 days',
+    compression='zip',
+    enqueue=True,
+)
+
 # Exporta a instância do logger configurado para ser usada em outras partes da aplicação
 app_logger = logger
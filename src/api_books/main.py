@@ -1,18 +1,45 @@
-import os
+from contextlib import asynccontextmanager
 from http import HTTPStatus
 
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import FileResponse
+from fastapi import FastAPI
 
-from api_books.endpoints import auth, books, health, insights, ml, scraping, users
+from api_books.database.connection import init_sqlite_profile, write_engine
+from api_books.endpoints import (
+    auth,
+    books,
+    download,
+    health,
+    insights,
+    metrics,
+    ml,
+    scraping,
+    users,
+)
+from api_books.health_check import health_prober
+from api_books.middlewares.cache import ResponseCacheMiddleware
 from api_books.middlewares.logging import LoggingMiddleware
+from api_books.middlewares.metrics import MetricsMiddleware
+from api_books.middlewares.profiling import SqlProfilingMiddleware
 from api_books.schemas import MessageStatus
+from api_books.settings import Settings
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    init_sqlite_profile(app.state.write_engine)
+    await health_prober.start()
+    yield
+    await health_prober.stop()
+
 
 app = FastAPI(
     title='Tech Challenge FIAP-6MELT grupo 28',
     description='Api para consumir informações de livros',
     version='1.0.0',
+    lifespan=lifespan,
 )
+# writer aberto no startup; os testes e benchmarks apontam para o banco deles
+app.state.write_engine = write_engine
 
 app.include_router(books.router)
 app.include_router(users.router)
@@ -21,6 +48,23 @@ app.include_router(health.router)
 app.include_router(auth.router)
 app.include_router(insights.router)
 app.include_router(ml.router)
+app.include_router(download.router)
+
+settings = Settings()
+
+if settings.METRICS_ENABLED:
+    app.include_router(metrics.router)
+
+# Cache de respostas (registrado antes do log para que os hits também sejam logados)
+app.add_middleware(ResponseCacheMiddleware)
+
+# Métricas (fora do cache, para contar também as respostas servidas por ele)
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware, router=app.router)
+
+# Perfil de SQL e Server-Timing (opt-in)
+if settings.SQL_PROFILING_ENABLED:
+    app.add_middleware(SqlProfilingMiddleware)
 
 # Logs
 app.add_middleware(LoggingMiddleware)
@@ -42,23 +86,3 @@ def read_root():
         'status': 'running',
         'description': 'Acesse /docs para ver a documentação interativa.',
     }
-
-
-@app.get(
-    '/api/v1/download/books',
-    status_code=HTTPStatus.OK,
-    tags=['Download'],
-    summary='Faz o download do arquivo .csv contendo todos os livros cadastrados',
-)
-def download_books():
-    file_path = 'data/books.csv'
-
-    if not os.path.exists(file_path):
-        raise HTTPException(status_code=404, detail='Arquivo não encontrado')
-
-    return FileResponse(
-        path=file_path,
-        filename='books.csv',
-        media_type='text/csv',
-        headers={'Content-Disposition': 'attachment; filename=books.csv'},
-    )
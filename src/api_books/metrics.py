@@ -0,0 +1,336 @@
+import threading
+from bisect import bisect_left
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import Engine, event
+
+from api_books.profiling import SLOW_QUERY_SECONDS, observe_query
+from api_books.settings import Settings
+
+settings = Settings()
+
+# METRICS_ENABLED=false desliga a coleta (e, em main.py, o endpoint e o middleware)
+ENABLED = settings.METRICS_ENABLED
+
+# buckets de latência em segundos (mesmos defaults do cliente oficial do Prometheus)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 500)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    """
+    Métrica com labels. Cada combinação de labels tem um filho com seu próprio
+    lock: a atualização só disputa com a mesma série, e o lock da métrica só é
+    usado na criação de um filho novo.
+    """
+
+    type = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._default = self.labels()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f'{self.name} expects labels {self.labelnames}')
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.type}']
+        lines.extend(self.samples())
+        return '\n'.join(lines)
+
+
+class _Value:
+    __slots__ = ('_lock', 'value')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.inc(-amount)
+
+    def set(self, value: float):
+        self.value = value
+
+
+class Counter(_Metric):
+    type = 'counter'
+
+    @staticmethod
+    def _new_child():
+        return _Value()
+
+    def inc(self, amount: float = 1.0):
+        self._default.inc(amount)
+
+    def samples(self) -> List[str]:
+        return [
+            f'{self.name}{_format_labels(self.labelnames, labels)} {_format_value(child.value)}'
+            for labels, child in list(self._children.items())
+        ]
+
+
+class Gauge(Counter):
+    type = 'gauge'
+
+    def dec(self, amount: float = 1.0):
+        self._default.dec(amount)
+
+    def set(self, value: float):
+        self._default.set(value)
+
+
+class GaugeCallback(_Metric):
+    """Gauge lido na hora da coleta (ex.: tamanho da fila do pool de hashing)."""
+
+    type = 'gauge'
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        callback: Callable[[], Dict[Tuple[str, ...], float]],
+        labelnames: Iterable[str] = (),
+    ):
+        self.callback = callback
+        super().__init__(name, documentation, labelnames)
+
+    @staticmethod
+    def _new_child():
+        return None
+
+    def samples(self) -> List[str]:
+        return [
+            f'{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}'
+            for labels, value in self.callback().items()
+        ]
+
+
+class _HistogramValue:
+    __slots__ = ('_lock', 'buckets', 'count', 'counts', 'sum')
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self._lock = threading.Lock()
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # o último é o +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+
+class Histogram(_Metric):
+    type = 'histogram'
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Tuple[float, ...] = LATENCY_BUCKETS,
+    ):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float):
+        self._default.observe(value)
+
+    def samples(self) -> List[str]:
+        lines = []
+        for labels, child in list(self._children.items()):
+            with child._lock:
+                counts, total, count = list(child.counts), child.sum, child.count
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, float('inf')), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(float(bound))}"'
+                lines.append(
+                    f'{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}'
+                )
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f'{self.name}_sum{label_text} {_format_value(total)}')
+            lines.append(f'{self.name}_count{label_text} {count}')
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f'Metric {metric.name} already registered')
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def gauge_callback(self, name: str, documentation: str, callback, labelnames=()):
+        return self.register(GaugeCallback(name, documentation, callback, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """Todas as métricas no formato texto do Prometheus (versão 0.0.4)."""
+        return '\n'.join(metric.render() for metric in list(self._metrics.values())) + '\n'
+
+
+registry = MetricsRegistry()
+
+# --- HTTP ---
+http_requests = registry.counter(
+    'http_requests_total', 'Requisições HTTP atendidas.', ('method', 'route', 'status')
+)
+http_request_duration = registry.histogram(
+    'http_request_duration_seconds', 'Latência das requisições HTTP.', ('method', 'route')
+)
+http_requests_in_flight = registry.gauge(
+    'http_requests_in_flight', 'Requisições HTTP em andamento.'
+)
+
+# --- Banco de dados ---
+db_query_duration = registry.histogram(
+    'db_query_duration_seconds',
+    'Duração de cada consulta SQL (cursor.execute).',
+    buckets=QUERY_BUCKETS,
+)
+db_queries = registry.counter(
+    'db_queries_total', 'Consultas SQL executadas, por rota (ou background).', ('route',)
+)
+db_time = registry.counter(
+    'db_time_seconds_total', 'Tempo gasto em consultas SQL, por rota (ou background).', ('route',)
+)
+db_queries_per_request = registry.histogram(
+    'db_queries_per_request',
+    'Consultas SQL por requisição.',
+    ('route',),
+    buckets=COUNT_BUCKETS,
+)
+
+# --- Scraping e ingestão ---
+scrape_jobs = registry.counter(
+    'scrape_jobs_total', 'Jobs de scraping e ingestão finalizados.', ('status',)
+)
+scrape_stage_duration = registry.histogram(
+    'scrape_job_stage_duration_seconds',
+    'Duração de cada etapa dos jobs de scraping.',
+    ('stage',),
+    buckets=(1, 5, 10, 30, 60, 120, 300, 600, 1800),
+)
+scraper_books = registry.counter('scraper_books_total', 'Livros gravados no CSV pelo scraper.')
+scraper_pages_not_modified = registry.counter(
+    'scraper_pages_not_modified_total', 'Páginas respondidas com 304 (cache HTTP).'
+)
+scraper_details_reused = registry.counter(
+    'scraper_details_reused_total', 'Páginas de detalhe reaproveitadas sem novo parsing.'
+)
+ingest_runs = registry.counter('ingest_runs_total', 'Ingestões do CSV concluídas.')
+ingest_rows = registry.counter(
+    'ingest_rows_total', 'Livros por tipo de alteração na ingestão.', ('change',)
+)
+
+
+class RequestStats:
+    """Contadores de uma requisição, compartilhados com as threads que ela usa."""
+
+    __slots__ = ('db_queries', 'db_time')
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_time = 0.0
+
+
+current_request: ContextVar[Optional[RequestStats]] = ContextVar('current_request', default=None)
+
+
+def _before_cursor_execute(  # noqa: PLR0913, PLR0917
+    conn, cursor, statement, parameters, context, executemany
+):
+    conn.info.setdefault('query_start', []).append(perf_counter())
+
+
+def _after_cursor_execute(  # noqa: PLR0913, PLR0917
+    conn, cursor, statement, parameters, context, executemany
+):
+    elapsed = perf_counter() - conn.info['query_start'].pop()
+    observe_query(conn, statement, parameters, executemany, elapsed)
+    if not ENABLED:
+        return
+    db_query_duration.observe(elapsed)
+    stats = current_request.get()
+    if stats is None:
+        db_queries.labels('background').inc()
+        db_time.labels('background').inc(elapsed)
+    else:
+        stats.db_queries += 1
+        stats.db_time += elapsed
+
+
+def instrument_engine(engine: Engine) -> Engine:
+    """
+    Mede as consultas do engine (contagem e duração, atribuídas à requisição atual),
+    alimentando também o log de consultas lentas e o perfil de SQL. Sem nenhum
+    dos três ligado, os eventos não são instalados.
+    """
+    if not (ENABLED or settings.SQL_PROFILING_ENABLED or SLOW_QUERY_SECONDS):
+        return engine
+    if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    return engine
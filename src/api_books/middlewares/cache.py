@@ -0,0 +1,224 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from http import HTTPStatus
+from typing import Callable, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+import anyio
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from api_books.database.books import BookDataBase
+from api_books.database.connection import read_engine
+from api_books.settings import Settings
+
+# Rotas cujo conteúdo só muda quando uma ingestão (scraping/update_db) acontece
+CACHEABLE_PREFIXES = ('/api/v1/books', '/api/v1/categories', '/api/v1/stats')
+
+
+def read_dataset_version() -> Optional[str]:
+    """Lê a versão do dataset da última ingestão (None se ainda não houve ingestão)."""
+    try:
+        with Session(read_engine) as session:
+            return BookDataBase(session).get_dataset_version()
+    except SQLAlchemyError:
+        return None
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    status: int
+    headers: List[Tuple[bytes, bytes]]
+    body: bytes
+    etag: str
+
+
+class ResponseCache:
+    """
+    Cache LRU de respostas serializadas, limitado por quantidade e por bytes.
+
+    As chaves incluem a versão do dataset; ao mudar de versão todo o conteúdo é
+    descartado de uma vez (`invalidate`). A versão é relida do banco no máximo a
+    cada `version_ttl` segundos, o que cobre ingestões feitas por outro processo.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        max_entries: int,
+        version_ttl: float,
+        version_provider: Callable[[], Optional[str]] = read_dataset_version,
+    ):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.version_ttl = version_ttl
+        self.version_provider = version_provider
+        self._lock = threading.Lock()
+        self._entries: OrderedDict = OrderedDict()
+        self._size = 0
+        self._version: Optional[str] = None
+        self._version_checked_at: Optional[float] = None
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def current_version(self) -> Optional[str]:
+        now = time.monotonic()
+        if self._version_checked_at is None or now - self._version_checked_at > self.version_ttl:
+            version = await anyio.to_thread.run_sync(self.version_provider)
+            if version != self._version:
+                self.invalidate(version)
+            self._version_checked_at = now
+        return self._version
+
+    def invalidate(self, version: Optional[str] = None):
+        """Descarta todas as entradas e passa a usar a versão informada."""
+        with self._lock:
+            self._entries = OrderedDict()
+            self._size = 0
+            self._version = version
+            self._version_checked_at = time.monotonic()
+
+    def clear(self):
+        """Esvazia o cache e força a releitura da versão na próxima requisição."""
+        self.invalidate(None)
+        self._version_checked_at = None
+
+    def get(self, key: Tuple) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: Tuple, entry: CachedResponse):
+        entry_size = len(entry.body)
+        if entry_size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key[-1] != self._version:  # versão trocou durante a requisição
+                return
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old.body)
+
+            self._entries[key] = entry
+            self._size += entry_size
+
+            while self._size > self.max_bytes or len(self._entries) > self.max_entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted.body)
+
+
+settings = Settings()
+response_cache = ResponseCache(
+    max_bytes=settings.RESPONSE_CACHE_MAX_BYTES,
+    max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+    version_ttl=settings.RESPONSE_CACHE_VERSION_TTL,
+)
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    candidates = [value.strip() for value in if_none_match.split(',')]
+    return '*' in candidates or etag in candidates or f'W/{etag}' in candidates
+
+
+class ResponseCacheMiddleware:
+    """
+    Middleware ASGI que serve GETs de leitura a partir do ResponseCache,
+    com ETag/Cache-Control e resposta 304 para `If-None-Match`.
+    """
+
+    def __init__(self, app, cache: ResponseCache = response_cache, max_age: int = None):
+        self.app = app
+        self.cache = cache
+        self.max_age = settings.RESPONSE_CACHE_MAX_AGE if max_age is None else max_age
+        self.enabled = settings.RESPONSE_CACHE_ENABLED
+
+    async def __call__(self, scope, receive, send):
+        if (
+            not self.enabled
+            or scope['type'] != 'http'
+            or scope['method'] != 'GET'
+            or not scope['path'].startswith(CACHEABLE_PREFIXES)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        version = await self.cache.current_version()
+        if version is None:
+            # sem ingestão registrada não há versão para chavear o cache
+            await self.app(scope, receive, send)
+            return
+
+        query = urlencode(sorted(parse_qsl(scope['query_string'].decode('latin-1'))))
+        key = (scope['path'], query, version)
+
+        entry = self.cache.get(key)
+        cache_status = b'HIT'
+        if entry is None:
+            cache_status = b'MISS'
+            entry = await self._call_and_capture(scope, receive)
+            if entry.status == HTTPStatus.OK:
+                self.cache.put(key, entry)
+
+        await self._send_entry(scope, send, entry, cache_status)
+
+    async def _call_and_capture(self, scope, receive) -> CachedResponse:
+        start = {}
+        chunks = []
+
+        async def capture(message):
+            if message['type'] == 'http.response.start':
+                start.update(message)
+            elif message['type'] == 'http.response.body':
+                chunks.append(message.get('body', b''))
+
+        await self.app(scope, receive, capture)
+
+        body = b''.join(chunks)
+        headers = [
+            (name, value)
+            for name, value in start.get('headers', [])
+            if name.lower() not in {b'content-length', b'etag', b'cache-control'}
+        ]
+        etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+        return CachedResponse(status=start['status'], headers=headers, body=body, etag=etag)
+
+    async def _send_entry(self, scope, send, entry: CachedResponse, cache_status: bytes):
+        if entry.status != HTTPStatus.OK:
+            headers = entry.headers + [(b'content-length', str(len(entry.body)).encode())]
+            await send({'type': 'http.response.start', 'status': entry.status, 'headers': headers})
+            await send({'type': 'http.response.body', 'body': entry.body})
+            return
+
+        cache_headers = [
+            (b'etag', entry.etag.encode()),
+            (b'cache-control', f'public, max-age={self.max_age}'.encode()),
+            (b'x-cache', cache_status),
+        ]
+
+        request_headers = dict(scope['headers'])
+        if_none_match = request_headers.get(b'if-none-match')
+        if if_none_match is not None and _etag_matches(if_none_match.decode(), entry.etag):
+            await send({
+                'type': 'http.response.start',
+                'status': HTTPStatus.NOT_MODIFIED,
+                'headers': cache_headers,
+            })
+            await send({'type': 'http.response.body', 'body': b''})
+            return
+
+        headers = (
+            entry.headers + cache_headers + [(b'content-length', str(len(entry.body)).encode())]
+        )
+        await send({'type': 'http.response.start', 'status': HTTPStatus.OK, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': entry.body})
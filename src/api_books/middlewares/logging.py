@@ -1,29 +1,87 @@
-import time
-
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
+import random
+from time import perf_counter_ns
+from typing import Callable, Iterable, Optional
 
 from api_books.logging_config import app_logger
+from api_books.settings import Settings
 
+SKIP_REQUEST_LOG = '__skip_request_log__'
 
-class LoggingMiddleware(BaseHTTPMiddleware):
-    @staticmethod
-    async def dispatch(request: Request, call_next):
-        start_time = time.time()
 
-        # Processa a requisição para obter a resposta
-        response = await call_next(request)
+def skip_request_log(endpoint: Callable) -> Callable:
+    """Desliga o log de requisições de uma rota (ex.: probes de saúde)."""
+    setattr(endpoint, SKIP_REQUEST_LOG, True)
+    return endpoint
+
+
+class LoggingMiddleware:
+    """
+    Middleware ASGI puro de log de requisições.
+
+    Não bufferiza a resposta (só observa o `http.response.start` para pegar o
+    status) e só monta o registro quando a requisição é amostrada: erros
+    (status >= 400) e requisições lentas sempre, as demais com probabilidade
+    `sample_rate`. O `json.dumps` do registro (poucos campos) roda no event loop;
+    no arquivo JSON só a escrita vai para a thread do sink (`enqueue`). O registro
+    também sai no console (stdout), formatado e escrito de forma síncrona.
+    """
 
-        process_time = (time.time() - start_time) * 1000
+    def __init__(
+        self,
+        app,
+        enabled: Optional[bool] = None,
+        sample_rate: Optional[float] = None,
+        slow_ms: Optional[float] = None,
+        excluded_paths: Optional[Iterable[str]] = None,
+    ):
+        settings = Settings()
+        self.app = app
+        self.enabled = settings.LOG_REQUESTS_ENABLED if enabled is None else enabled
+        self.sample_rate = settings.LOG_SAMPLE_RATE if sample_rate is None else sample_rate
+        slow_ms = settings.LOG_SLOW_REQUEST_MS if slow_ms is None else slow_ms
+        self.slow_ns = int(slow_ms * 1_000_000)
+        self.excluded_paths = frozenset(
+            settings.LOG_EXCLUDED_PATHS if excluded_paths is None else excluded_paths
+        )
 
-        # O `contextualize` é a forma do Loguru de adicionar dados extras
-        with app_logger.contextualize(
-            ip=request.client.host,
-            method=request.method,
-            url=str(request.url),
-            status_code=response.status_code,
-            process_time=process_time,
-        ):
-            app_logger.info('Request handled')
+    def _always_logged(self, status: int, elapsed_ns: int) -> bool:
+        return status >= 400 or elapsed_ns >= self.slow_ns  # noqa: PLR2004
 
-        return response
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not self.enabled or scope['path'] in self.excluded_paths:
+            await self.app(scope, receive, send)
+            return
+
+        start = perf_counter_ns()
+        status = 500  # se a aplicação falhar antes de responder
+
+        async def send_with_status(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed_ns = perf_counter_ns() - start
+            always = self._always_logged(status, elapsed_ns)
+            skipped = getattr(scope.get('endpoint'), SKIP_REQUEST_LOG, False)
+            if not skipped and (always or random.random() < self.sample_rate):
+                self._log(scope, status, elapsed_ns, 1.0 if always else self.sample_rate)
+
+    @staticmethod
+    def _log(scope, status: int, elapsed_ns: int, sample_rate: float):
+        client = scope.get('client')
+        query = scope.get('query_string', b'')
+        app_logger.bind(
+            request={
+                'ip': client[0] if client else None,
+                'method': scope['method'],
+                'path': scope['path'],
+                'query': query.decode('latin-1') if query else None,
+                'status_code': status,
+                'process_time_ms': round(elapsed_ns / 1_000_000, 3),
+                'sample_rate': sample_rate,
+            }
+        ).info('Request handled')
@@ -0,0 +1,71 @@
+from time import perf_counter
+
+from starlette.routing import Match, Router
+
+from api_books.metrics import (
+    RequestStats,
+    current_request,
+    db_queries,
+    db_queries_per_request,
+    db_time,
+    http_request_duration,
+    http_requests,
+    http_requests_in_flight,
+)
+
+UNMATCHED_ROUTE = 'unmatched'
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI que alimenta o registro de métricas: contagem e latência por
+    rota (o template, ex.: `/api/v1/books/{book_id}`, não o caminho), requisições
+    em andamento e consultas SQL feitas durante a requisição.
+    """
+
+    def __init__(self, app, router: Router = None):
+        self.app = app
+        self.router = router
+
+    def _route(self, scope) -> str:
+        route = scope.get('route')
+        if route is not None:
+            return route.path
+        # respostas servidas antes do roteamento (ex.: cache de respostas)
+        if self.router is not None:
+            for candidate in self.router.routes:
+                if candidate.matches(scope)[0] == Match.FULL:
+                    return candidate.path
+        return UNMATCHED_ROUTE
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = current_request.set(stats)
+        status = 500
+        start = perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        http_requests_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = perf_counter() - start
+            http_requests_in_flight.dec()
+            current_request.reset(token)
+
+            route, method = self._route(scope), scope['method']
+            http_requests.labels(method, route, str(status)).inc()
+            http_request_duration.labels(method, route).observe(elapsed)
+            db_queries_per_request.labels(route).observe(stats.db_queries)
+            if stats.db_queries:
+                db_queries.labels(route).inc(stats.db_queries)
+                db_time.labels(route).inc(stats.db_time)
@@ -0,0 +1,72 @@
+from time import perf_counter
+from typing import Optional
+
+from starlette.datastructures import MutableHeaders
+
+from api_books.logging_config import app_logger
+from api_books.profiling import RequestProfile, current_profile, install_endpoint_timer
+from api_books.settings import Settings
+
+
+def server_timing(profile: RequestProfile, start: float, now: float) -> str:
+    serialize = now - profile.endpoint_done if profile.endpoint_done is not None else 0.0
+    return ', '.join((
+        f'db;dur={profile.db_time * 1000:.3f};desc="{len(profile.queries)} queries"',
+        f'serialize;dur={serialize * 1000:.3f}',
+        f'total;dur={(now - start) * 1000:.3f}',
+    ))
+
+
+class SqlProfilingMiddleware:
+    """
+    Middleware ASGI do perfil de SQL (opt-in, `SQL_PROFILING_ENABLED`).
+
+    Registra cada consulta da requisição com duração e `EXPLAIN QUERY PLAN`,
+    aponta formas repetidas (N+1) e leituras de tabela inteira no log
+    `logs/sql_queries.log` e adiciona o header `Server-Timing` (db, serialize e
+    total até o início da resposta). O EXPLAIN roda uma vez por forma de
+    consulta e entra no tempo total: não é para ficar ligado em produção.
+    """
+
+    def __init__(self, app, n_plus_one_threshold: Optional[int] = None):
+        self.app = app
+        self.n_plus_one_threshold = (
+            Settings().SQL_N_PLUS_ONE_THRESHOLD
+            if n_plus_one_threshold is None
+            else n_plus_one_threshold
+        )
+        install_endpoint_timer()
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile()
+        token = current_profile.set(profile)
+        start = perf_counter()
+
+        async def send_with_timing(message):
+            if message['type'] == 'http.response.start':
+                headers = MutableHeaders(scope=message)
+                headers.append('Server-Timing', server_timing(profile, start, perf_counter()))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_profile.reset(token)
+            if profile.queries:
+                self._log(scope, profile)
+
+    def _log(self, scope, profile: RequestProfile):
+        report = profile.report(self.n_plus_one_threshold)
+        level = 'WARNING' if report['n_plus_one'] or report['full_scans'] else 'INFO'
+        app_logger.bind(
+            sql={
+                'event': 'request_profile',
+                'method': scope['method'],
+                'path': scope['path'],
+                **report,
+            }
+        ).log(level, 'SQL profile')
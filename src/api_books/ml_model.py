@@ -1,5 +1,23 @@
-# Função de modelo fake simples
+import hashlib
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from api_books.logging_config import app_logger
 from api_books.schemas import PredictionInput, PredictionOutput
+from api_books.services.training_data import build_training_data
+from api_books.settings import Settings
+
+FAKE_MODEL_VERSION = 'fake'
+
+
+# Função de modelo fake simples
 
 
 def fake_model(input: PredictionInput) -> PredictionOutput:
@@ -22,5 +40,260 @@ def fake_model(input: PredictionInput) -> PredictionOutput:
     confidence = min(0.95, max(0.6, input.x2_rating / 5.0))
 
     return PredictionOutput(
-        predicted_price=round(predicted_price, 2), confidence=round(confidence, 2)
+        predicted_price=round(predicted_price, 2),
+        confidence=round(confidence, 2),
+        model_version=FAKE_MODEL_VERSION,
     )
+
+
+def fake_model_batch(
+    availability: np.ndarray, rating: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Mesma fórmula do fake_model, avaliada de uma vez sobre arrays (uma linha por livro)."""
+    predicted_price = 25.0 + availability * 2.0 + rating * 10.0
+    confidence = np.clip(rating / 5.0, 0.6, 0.95)
+
+    return np.round(predicted_price, 2), np.round(confidence, 2)
+
+
+@dataclass(frozen=True)
+class PriceModel:
+    """
+    Regressão linear do preço: intercepto + availability + rating + one-hot da
+    categoria. Categoria desconhecida (ou ausente) recebe o efeito médio das
+    categorias conhecidas.
+    """
+
+    version: str
+    coef: np.ndarray  # [intercepto, availability, rating, *categorias]
+    categories: Tuple[str, ...]  # ordenadas, na ordem das colunas one-hot
+    rmse: float  # erro no conjunto de teste; base da confiança
+    metadata: Dict = field(default_factory=dict)
+
+    def __post_init__(self):
+        # coeficientes em floats do Python: a predição unitária não passa pelo NumPy
+        object.__setattr__(self, '_terms', tuple(float(c) for c in self.coef[:3]))
+        object.__setattr__(
+            self,
+            '_category_terms',
+            dict(zip(self.categories, (float(c) for c in self.coef[3:]))),
+        )
+        object.__setattr__(
+            self, '_default_category_term', float(self.coef[3:].mean()) if self.categories else 0.0
+        )
+
+    def _confidence(self, price: float) -> float:
+        return min(1.0, max(0.0, 1.0 - self.rmse / max(abs(price), 1.0)))
+
+    def predict(self, input: PredictionInput) -> PredictionOutput:
+        intercept, availability, rating = self._terms
+        price = (
+            intercept
+            + availability * input.x1_availability
+            + rating * input.x2_rating
+            + self._category_terms.get(input.category, self._default_category_term)
+        )
+        return PredictionOutput(
+            predicted_price=round(max(price, 0.0), 2),
+            confidence=round(self._confidence(price), 2),
+            model_version=self.version,
+        )
+
+    def predict_batch(
+        self,
+        availability: np.ndarray,
+        rating: np.ndarray,
+        category: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        price = self.coef[0] + self.coef[1] * availability + self.coef[2] * rating
+        if category is not None and self.categories:
+            price += self._category_effect(category)
+        else:
+            price += self._default_category_term
+
+        confidence = np.clip(1.0 - self.rmse / np.maximum(np.abs(price), 1.0), 0.0, 1.0)
+        return np.round(np.maximum(price, 0.0), 2), np.round(confidence, 2)
+
+    def _category_effect(self, category: np.ndarray) -> np.ndarray:
+        categories = np.asarray(self.categories)
+        index = np.searchsorted(categories, category)
+        index = np.minimum(index, len(categories) - 1)
+        known = categories[index] == category
+        return np.where(known, self.coef[3:][index], self._default_category_term)
+
+
+def _design_matrix(
+    availability: np.ndarray, rating: np.ndarray, category: np.ndarray, categories: np.ndarray
+) -> np.ndarray:
+    one_hot = (category[:, None] == categories[None, :]).astype(np.float64)
+    return np.column_stack((np.ones(len(availability)), availability, rating, one_hot))
+
+
+def train_price_model(
+    columns: Dict[str, Sequence], test_size: float = 0.2, seed: int = 0
+) -> PriceModel:
+    """
+    Ajusta o modelo por mínimos quadrados sobre as colunas de treino (mesmo split
+    determinístico do endpoint training-data) e mede o RMSE no conjunto de teste.
+    """
+    data = build_training_data(columns, test_size=test_size, seed=seed)
+    if len(data) == 0:
+        raise ValueError('No training data')
+
+    categories = np.unique(data.category)
+    X = _design_matrix(data.availability, data.rating, data.category, categories)
+    train = ~data.is_test
+    if not train.any():
+        raise ValueError('Training split is empty')
+
+    # lstsq dá a solução de norma mínima: o one-hot completo junto com o
+    # intercepto é colinear, mas não precisa descartar uma categoria
+    coef, *_ = np.linalg.lstsq(X[train], data.price[train], rcond=None)
+
+    evaluated = data.is_test if data.is_test.any() else train
+    residuals = X[evaluated] @ coef - data.price[evaluated]
+    rmse = float(np.sqrt(np.mean(residuals**2)))
+
+    trained_at = datetime.now(timezone.utc)
+    digest = hashlib.blake2b(coef.tobytes(), digest_size=4).hexdigest()
+    return PriceModel(
+        version=f'{trained_at:%Y%m%d%H%M%S}-{digest}',
+        coef=coef,
+        categories=tuple(categories.tolist()),
+        rmse=rmse,
+        metadata={
+            'trained_at': trained_at.isoformat(),
+            'n_train': int(train.sum()),
+            'n_test': int(data.is_test.sum()),
+            'test_size': test_size,
+            'seed': seed,
+        },
+    )
+
+
+class ModelRegistry:
+    """
+    Versões do modelo salvas em disco (`<versão>.npz`, sem pickle) e o modelo
+    ativo em memória.
+
+    A predição só lê `self._active`: promover uma versão carrega o artefato
+    antes e troca a referência de uma vez, então nenhuma requisição vê um
+    modelo pela metade nem faz I/O. O arquivo `ACTIVE` guarda a versão
+    promovida para os próximos processos.
+    """
+
+    ACTIVE_FILE = 'ACTIVE'
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._active: Optional[PriceModel] = None
+        self._loaded = False
+
+    def _artifact(self, version: str) -> Path:
+        if not version or Path(version).name != version or version.startswith('.'):
+            raise ValueError(f'Invalid model version: {version}')
+        return self.path / f'{version}.npz'
+
+    @staticmethod
+    def _write_atomic(target: Path, write):
+        tmp = target.with_name(f'{target.name}.tmp')
+        with open(tmp, 'wb') as file:
+            write(file)
+        os.replace(tmp, target)
+
+    def save(self, model: PriceModel):
+        self.path.mkdir(parents=True, exist_ok=True)
+        meta = {'version': model.version, 'rmse': model.rmse, **model.metadata}
+        self._write_atomic(
+            self._artifact(model.version),
+            lambda file: np.savez(
+                file,
+                coef=model.coef,
+                categories=np.asarray(model.categories, dtype=str),
+                meta=np.asarray(json.dumps(meta)),
+            ),
+        )
+
+    def load(self, version: str) -> PriceModel:
+        artifact = self._artifact(version)
+        if not artifact.exists():
+            raise ValueError(f'Model version {version} not found')
+
+        with np.load(artifact, allow_pickle=False) as arrays:
+            meta = json.loads(str(arrays['meta']))
+            return PriceModel(
+                version=meta.pop('version'),
+                coef=arrays['coef'],
+                categories=tuple(arrays['categories'].tolist()),
+                rmse=meta.pop('rmse'),
+                metadata=meta,
+            )
+
+    def versions(self) -> List[PriceModel]:
+        if not self.path.exists():
+            return []
+        return sorted(
+            (self.load(artifact.stem) for artifact in self.path.glob('*.npz')),
+            key=lambda model: model.version,
+            reverse=True,
+        )
+
+    def train(self, columns: Dict[str, Sequence], **kwargs) -> PriceModel:
+        """Treina e salva uma nova versão, sem promovê-la."""
+        model = train_price_model(columns, **kwargs)
+        self.save(model)
+        app_logger.info(f'Model {model.version} trained (rmse={model.rmse:.2f})')
+        return model
+
+    def promote(self, version: str) -> PriceModel:
+        model = self.load(version)  # lê o disco antes de trocar o modelo ativo
+        with self._lock:
+            self._write_atomic(
+                self.path / self.ACTIVE_FILE, lambda file: file.write(version.encode())
+            )
+            self._active = model
+            self._loaded = True
+        app_logger.info(f'Model {version} promoted')
+        return model
+
+    @property
+    def active(self) -> Optional[PriceModel]:
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self._active = self._load_active()
+                    self._loaded = True
+        return self._active
+
+    def _load_active(self) -> Optional[PriceModel]:
+        pointer = self.path / self.ACTIVE_FILE
+        if not pointer.exists():
+            return None
+        try:
+            return self.load(pointer.read_text().strip())
+        except (OSError, ValueError, KeyError):
+            app_logger.exception('Could not load the active model; using the fake model')
+            return None
+
+    def predict(self, input: PredictionInput) -> PredictionOutput:
+        model = self.active
+        return model.predict(input) if model else fake_model(input)
+
+    def predict_batch(
+        self,
+        availability: np.ndarray,
+        rating: np.ndarray,
+        category: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, np.ndarray, str]:
+        model = self.active
+        if model is None:
+            return (*fake_model_batch(availability, rating), FAKE_MODEL_VERSION)
+        return (*model.predict_batch(availability, rating, category), model.version)
+
+
+model_registry = ModelRegistry(Settings().ML_MODELS_DIR)
+
+
+def get_model_registry() -> ModelRegistry:
+    return model_registry
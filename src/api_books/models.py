@@ -1,3 +1,6 @@
+from datetime import datetime
+
+from sqlalchemy import DDL, JSON, Index, UniqueConstraint, column, event, func, table
 from sqlalchemy.orm import Mapped, mapped_column, registry
 
 table_registry = registry()
@@ -6,6 +9,8 @@ table_registry = registry()
 @table_registry.mapped_as_dataclass
 class Book:
     __tablename__ = 'books'
+    # suporta a paginação por cursor (keyset) do ranking de avaliações
+    __table_args__ = (Index('ix_books_rating_id', 'rating', 'id'),)
 
     id: Mapped[int] = mapped_column(init=False, primary_key=True)
     title: Mapped[str] = mapped_column(index=True, nullable=False)
@@ -16,6 +21,25 @@ class Book:
     availability: Mapped[int] = mapped_column(nullable=False, default=0)
 
 
+@table_registry.mapped_as_dataclass
+class BookStaging:
+    """
+    Área de carga da ingestão: o CSV é gravado aqui e comparado com `books`,
+    que recebe apenas as diferenças. A chave natural é título + URL da imagem.
+    """
+
+    __tablename__ = 'books_staging'
+    __table_args__ = (UniqueConstraint('title', 'image_url', name='uq_books_staging_key'),)
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)  # id do CSV
+    title: Mapped[str] = mapped_column(nullable=False)
+    price: Mapped[float] = mapped_column(nullable=False)
+    rating: Mapped[float] = mapped_column(nullable=False)
+    category: Mapped[str] = mapped_column(nullable=False)
+    image_url: Mapped[str]
+    availability: Mapped[int] = mapped_column(nullable=False, default=0)
+
+
 @table_registry.mapped_as_dataclass
 class User:
     __tablename__ = 'users'
@@ -25,3 +49,58 @@ class User:
     password: Mapped[str]
     email: Mapped[str] = mapped_column(unique=True)
     is_admin: Mapped[bool] = mapped_column(default=False)
+
+
+@table_registry.mapped_as_dataclass
+class StatsSnapshot:
+    """Estatísticas da coleção calculadas uma única vez ao final de cada ingestão."""
+
+    __tablename__ = 'stats_snapshots'
+
+    id: Mapped[int] = mapped_column(init=False, primary_key=True)
+    dataset_version: Mapped[str] = mapped_column(unique=True)
+    total_books: Mapped[int]
+    average_price: Mapped[float]
+    count_categories: Mapped[int]
+    rating_distribution: Mapped[dict] = mapped_column(JSON)
+    categories_count_distribution: Mapped[dict] = mapped_column(JSON)
+    categories_avg_price_distribution: Mapped[dict] = mapped_column(JSON)
+    created_at: Mapped[datetime] = mapped_column(init=False, server_default=func.now())
+
+
+# Índice full-text (SQLite FTS5) sobre título e categoria dos livros.
+# É uma tabela de "conteúdo externo": guarda apenas o índice invertido e lê
+# os textos da própria tabela `books`. Os triggers mantêm o índice em sincronia.
+books_fts = table(
+    'books_fts', column('rowid'), column('title'), column('category'), column('rank')
+)
+
+BOOKS_FTS_CREATE = [
+    'CREATE VIRTUAL TABLE IF NOT EXISTS books_fts USING fts5('
+    "title, category, content='books', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    'CREATE TRIGGER IF NOT EXISTS books_fts_ai AFTER INSERT ON books BEGIN '
+    'INSERT INTO books_fts(rowid, title, category) '
+    'VALUES (new.id, new.title, new.category); END',
+    'CREATE TRIGGER IF NOT EXISTS books_fts_ad AFTER DELETE ON books BEGIN '
+    'INSERT INTO books_fts(books_fts, rowid, title, category) '
+    "VALUES ('delete', old.id, old.title, old.category); END",
+    'CREATE TRIGGER IF NOT EXISTS books_fts_au AFTER UPDATE ON books BEGIN '
+    'INSERT INTO books_fts(books_fts, rowid, title, category) '
+    "VALUES ('delete', old.id, old.title, old.category); "
+    'INSERT INTO books_fts(rowid, title, category) '
+    'VALUES (new.id, new.title, new.category); END',
+]
+
+BOOKS_FTS_DROP = [
+    'DROP TRIGGER IF EXISTS books_fts_au',
+    'DROP TRIGGER IF EXISTS books_fts_ad',
+    'DROP TRIGGER IF EXISTS books_fts_ai',
+    'DROP TABLE IF EXISTS books_fts',
+]
+
+for statement in BOOKS_FTS_CREATE:
+    event.listen(Book.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+
+for statement in BOOKS_FTS_DROP:
+    event.listen(Book.__table__, 'before_drop', DDL(statement).execute_if(dialect='sqlite'))
@@ -0,0 +1,145 @@
+import re
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from time import perf_counter
+from typing import Dict, List, Optional
+
+import fastapi.routing
+
+from api_books.logging_config import app_logger
+from api_books.settings import Settings
+
+settings = Settings()
+
+# consultas acima deste tempo vão para o log de consultas lentas (0 desliga)
+SLOW_QUERY_SECONDS = settings.SQL_SLOW_QUERY_MS / 1000
+
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+# "SCAN books" (SQLite >= 3.36) ou "SCAN TABLE books"; "SCAN books USING INDEX ..." não conta
+_FULL_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)$')
+_EXPLAINABLE = ('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE')
+
+
+def statement_shape(statement: str) -> str:
+    """Forma da consulta: literais viram `?`, listas de `IN (?, ?, ...)` viram `(?)`."""
+    shape = _LITERAL.sub('?', statement)
+    shape = _PLACEHOLDER_LIST.sub('(?)', shape)
+    return _WHITESPACE.sub(' ', shape).strip()
+
+
+def explain_query_plan(conn, statement: str, parameters) -> List[str]:
+    """
+    `EXPLAIN QUERY PLAN` da consulta (só SQLite). Roda num cursor DBAPI da mesma
+    conexão, então não passa pelos eventos do SQLAlchemy nem entra no perfil.
+    """
+    if conn.dialect.name != 'sqlite' or not statement.lstrip().upper().startswith(_EXPLAINABLE):
+        return []
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute(f'EXPLAIN QUERY PLAN {statement}', parameters)
+        return [row[-1] for row in cursor.fetchall()]
+    except conn.dialect.loaded_dbapi.Error:
+        return []
+    finally:
+        cursor.close()
+
+
+@dataclass
+class QueryRecord:
+    shape: str
+    duration: float  # segundos
+    plan: List[str]
+
+
+@dataclass
+class RequestProfile:
+    """Consultas SQL de uma requisição, com duração e plano de execução."""
+
+    queries: List[QueryRecord] = field(default_factory=list)
+    endpoint_done: Optional[float] = None  # perf_counter() ao fim da função do endpoint
+    plans: Dict[str, List[str]] = field(default_factory=dict)
+
+    @property
+    def db_time(self) -> float:
+        return sum(query.duration for query in self.queries)
+
+    def record(self, conn, statement: str, parameters, executemany: bool, elapsed: float):
+        shape = statement_shape(statement)
+        plan = self.plans.get(shape)
+        if plan is None:
+            # um EXPLAIN por forma de consulta; executemany não tem um único conjunto de parâmetros
+            plan = [] if executemany else explain_query_plan(conn, statement, parameters)
+            self.plans[shape] = plan
+        self.queries.append(QueryRecord(shape, elapsed, plan))
+
+    def repeated(self, threshold: int) -> Dict[str, int]:
+        """Formas executadas `threshold` vezes ou mais (suspeitas de N+1)."""
+        counts = Counter(query.shape for query in self.queries)
+        return {shape: count for shape, count in counts.items() if count >= threshold}
+
+    def full_scans(self) -> Dict[str, List[str]]:
+        """Formas cujo plano lê uma tabela inteira, com as tabelas percorridas."""
+        scans = {}
+        for shape, plan in self.plans.items():
+            tables = [match.group(1) for match in map(_FULL_SCAN.match, plan) if match]
+            if tables:
+                scans[shape] = tables
+        return scans
+
+    def report(self, n_plus_one_threshold: int) -> Dict:
+        return {
+            'queries': [
+                {
+                    'statement': query.shape,
+                    'duration_ms': round(query.duration * 1000, 3),
+                    'plan': query.plan,
+                }
+                for query in self.queries
+            ],
+            'query_count': len(self.queries),
+            'db_time_ms': round(self.db_time * 1000, 3),
+            'n_plus_one': self.repeated(n_plus_one_threshold),
+            'full_scans': self.full_scans(),
+        }
+
+
+current_profile: ContextVar[Optional[RequestProfile]] = ContextVar('current_profile', default=None)
+
+
+def observe_query(conn, statement: str, parameters, executemany: bool, elapsed: float):
+    """Chamado pelo `after_cursor_execute` da instrumentação dos engines."""
+    if SLOW_QUERY_SECONDS and elapsed >= SLOW_QUERY_SECONDS:
+        app_logger.bind(
+            sql={
+                'event': 'slow_query',
+                'statement': statement_shape(statement),
+                'duration_ms': round(elapsed * 1000, 3),
+            }
+        ).warning('Slow query')
+    profile = current_profile.get()
+    if profile is not None:
+        profile.record(conn, statement, parameters, executemany, elapsed)
+
+
+async def _timed_run_endpoint_function(**kwargs):
+    try:
+        return await _run_endpoint_function(**kwargs)
+    finally:
+        profile = current_profile.get()
+        if profile is not None:
+            profile.endpoint_done = perf_counter()
+
+
+_run_endpoint_function = fastapi.routing.run_endpoint_function
+
+
+def install_endpoint_timer():
+    """
+    Marca no perfil o fim da função do endpoint; o que vem depois (validação do
+    `response_model`, serialização e render) é o `serialize` do Server-Timing.
+    O FastAPI não expõe esse ponto, então a função interna é substituída.
+    """
+    fastapi.routing.run_endpoint_function = _timed_run_endpoint_function
@@ -1,3 +1,4 @@
+from datetime import datetime
 from enum import Enum
 from typing import Dict, List, Optional
 
@@ -54,9 +55,13 @@ class UserBase(BaseModel):
     )
 
 
-class UserResponse(UserBase):
+class UserResponse(BaseModel):
+    # sem o campo password: além de não ser exposto, ele não é carregado do banco
+    # (defer) e acessá-lo dispararia uma consulta extra por usuário
     id: int
-    password: str = Field(exclude=True)
+    username: str
+    email: EmailStr
+    is_admin: bool
     model_config = ConfigDict(from_attributes=True)
 
 
@@ -79,6 +84,9 @@ class BookSchema(BookBase):
 class BooksList(BaseModel):
     total: int = Field(description='Número total de livros')
     books: List[BookSchema] = Field(..., description='Lista de livros')
+    next_cursor: Optional[str] = Field(
+        None, description='Cursor para obter a próxima página (null quando não houver)'
+    )
     model_config = ConfigDict(
         from_attributes=True,
         json_schema_extra={
@@ -104,6 +112,7 @@ class BooksList(BaseModel):
                         'image_url': 'https://example.com/book2.jpg',
                     },
                 ],
+                'next_cursor': None,
             }
         },
     )
@@ -129,11 +138,43 @@ class FilterPage(BaseModel):
     limit: int = Field(
         default=None, ge=0, description='Número máximo de registros a retornar (limit)'
     )
+    cursor: str | None = Field(
+        default=None,
+        max_length=200,
+        description="Cursor opaco recebido em 'next_cursor' (substitui o offset)",
+    )
+
+
+class SearchMode(str, Enum):
+    FTS = 'fts'
+    SUBSTRING = 'substring'
 
 
 class FilterBook(FilterPage):
     title: str | None = Field(default=None, min_length=0, max_length=30)
     category: str | None = Field(default=None)
+    search_mode: SearchMode = Field(
+        default=SearchMode.FTS,
+        description=(
+            "Modo de busca: 'fts' (índice full-text, resultados por relevância) "
+            "ou 'substring' (busca parcial em qualquer posição do texto)"
+        ),
+    )
+
+
+class ExportFormat(str, Enum):
+    CSV = 'csv'
+    NDJSON = 'ndjson'
+    PARQUET = 'parquet'
+
+
+class FilterExport(BaseModel):
+    format: ExportFormat = Field(default=ExportFormat.CSV, description='Formato do arquivo')
+    title: str | None = Field(default=None, min_length=0, max_length=30)
+    category: str | None = Field(default=None)
+    search_mode: SearchMode = Field(
+        default=SearchMode.FTS, description="Modo de busca: 'fts' ou 'substring'"
+    )
 
 
 class FilterCategory(BaseModel):
@@ -143,6 +184,7 @@ class FilterCategory(BaseModel):
 class StatusServico(str, Enum):
     UP = 'up'
     DOWN = 'down'
+    UNKNOWN = 'unknown'
 
 
 class StatusDependencia(BaseModel):
@@ -169,6 +211,37 @@ class RespostaHealthCheck(BaseModel):
     )
 
 
+class JobStatus(str, Enum):
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+
+
+class ScrapingJob(BaseModel):
+    id: str = Field(description='Identificador do job')
+    status: JobStatus
+    stage: Optional[str] = Field(None, description='Etapa atual: scraping, ingesting ou done')
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    timings: Dict[str, float] = Field(
+        default_factory=dict, description='Duração de cada etapa, em segundos'
+    )
+    counts: Dict[str, int] = Field(default_factory=dict)
+    dataset_version: Optional[str] = None
+    error: Optional[str] = None
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ScrapingJobAccepted(Message):
+    job_id: str
+    status: JobStatus
+    coalesced: bool = Field(
+        description='True quando já havia um job em andamento e a chamada foi agregada a ele'
+    )
+
+
 class Token(BaseModel):
     access_token: str = Field(
         ...,
@@ -295,6 +368,25 @@ class MLTraining_DataList(BaseModel):
     )
 
 
+class TrainingDataFormat(str, Enum):
+    JSON = 'json'
+    ARROW = 'arrow'
+    NPZ = 'npz'
+
+
+class FilterTrainingData(BaseModel):
+    format: TrainingDataFormat = Field(
+        default=TrainingDataFormat.JSON,
+        description="Formato da resposta: 'json', 'arrow' ou 'npz'",
+    )
+    test_size: float = Field(default=0.2, gt=0, lt=1, description='Fração dos dados para teste')
+    seed: int = Field(default=0, ge=0, description='Semente do split (mesma semente, mesmo split)')
+    stratify: bool = Field(
+        default=False, description='Mantém a proporção de teste dentro de cada categoria'
+    )
+    category: str | None = Field(default=None)
+
+
 class PredictionInput(BaseModel):
     x1_availability: int = Field(
         ...,
@@ -310,6 +402,11 @@ class PredictionInput(BaseModel):
         description='Avaliação média do livro (1.0 a 5.0 estrelas)',
         examples=[3.5, 4.2, 4.8],
     )
+    category: str | None = Field(
+        default=None,
+        description='Categoria do livro (usada pelo modelo treinado; opcional)',
+        examples=['Poetry'],
+    )
     model_config = ConfigDict(
         from_attributes=True,
         json_schema_extra={'example': {'x1_availability': 15, 'x2_rating': 4.3}},
@@ -330,7 +427,36 @@ class PredictionOutput(BaseModel):
         description='Nível de confiança da predição (0.0 a 1.0)',
         examples=[0.85, 0.92, 0.78],
     )
+    model_version: str = Field(
+        ...,
+        description="Versão do modelo ativo que fez a predição ('fake' sem modelo treinado)",
+        examples=['20251018120000-1a2b3c4d'],
+    )
     model_config = ConfigDict(
         from_attributes=True,
-        json_schema_extra={'example': {'predicted_price': 87.50, 'confidence': 0.89}},
+        protected_namespaces=(),
+        json_schema_extra={
+            'example': {'predicted_price': 87.50, 'confidence': 0.89, 'model_version': 'fake'}
+        },
     )
+
+
+class TrainModel(BaseModel):
+    test_size: float = Field(default=0.2, gt=0, lt=1, description='Fração dos dados para teste')
+    seed: int = Field(default=0, ge=0, description='Semente do split de treino/teste')
+    promote: bool = Field(default=True, description='Promove a nova versão após o treino')
+
+
+class ModelInfo(BaseModel):
+    version: str
+    rmse: float
+    trained_at: datetime
+    n_train: int
+    n_test: int
+    categories: int
+    active: bool
+
+
+class ModelList(BaseModel):
+    active_version: str
+    models: List[ModelInfo]
@@ -1,6 +1,6 @@
 from datetime import datetime, timedelta
 from http import HTTPStatus
-from typing import Annotated
+from typing import Annotated, Optional
 from zoneinfo import ZoneInfo
 
 from fastapi import Depends, HTTPException
@@ -9,6 +9,7 @@ from jwt import DecodeError, ExpiredSignatureError, decode, encode
 from pwdlib import PasswordHash
 
 from api_books.database.users import UserDataBase
+from api_books.security.principals import Principal, principal_cache
 from api_books.settings import Settings
 
 settings = Settings()
@@ -48,6 +49,18 @@ def create_refresh_token(claims: dict) -> str:
     return token
 
 
+def _get_principal(db: UserDataBase, subject: str) -> Optional[Principal]:
+    """Usuário do token: do cache de principals ou, em caso de miss, do banco."""
+    principal = principal_cache.get(subject)
+    if principal is None:
+        user = db.find_user_by_username(subject)
+        if not user:
+            return None
+        principal = Principal.from_user(user)
+        principal_cache.put(subject, principal)
+    return principal
+
+
 # Dependência para as rotas protegidas
 
 
@@ -69,7 +82,7 @@ def get_user_tokenizer(db: DBService, token: str = Depends(oauth2_scheme)):
         credentials_exception.detail = 'Expired token'
         raise credentials_exception
 
-    user = db.find_user_by_username_or_email(username=sub_username)
+    user = _get_principal(db, sub_username)
 
     if not user:
         raise credentials_exception
@@ -77,6 +90,12 @@ def get_user_tokenizer(db: DBService, token: str = Depends(oauth2_scheme)):
     return user
 
 
+def get_admin_user(user: Principal = Depends(get_user_tokenizer)) -> Principal:
+    if not user.is_admin:
+        raise HTTPException(status_code=HTTPStatus.FORBIDDEN, detail='Admin privileges required')
+    return user
+
+
 def get_user_refreshed_tokenizer(db: DBService, token: str = Depends(oauth2_scheme)):
     credentials_exception = HTTPException(
         status_code=HTTPStatus.UNAUTHORIZED,
@@ -101,7 +120,7 @@ def get_user_refreshed_tokenizer(db: DBService, token: str = Depends(oauth2_sche
         credentials_exception.detail = 'Expired token'
         raise credentials_exception
 
-    user = db.find_user_by_username_or_email(username=sub_username)
+    user = _get_principal(db, sub_username)
 
     if not user:
         raise credentials_exception
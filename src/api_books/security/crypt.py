@@ -1,8 +1,126 @@
+import argparse
+import asyncio
 import secrets
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Tuple
 
 from pwdlib import PasswordHash
+from pwdlib.hashers.argon2 import Argon2Hasher
 
-pwd_context = PasswordHash.recommended()
+from api_books.settings import Settings
+
+settings = Settings()
+
+
+def build_password_hash(time_cost: int, memory_cost: int, parallelism: int) -> PasswordHash:
+    return PasswordHash((
+        Argon2Hasher(time_cost=time_cost, memory_cost=memory_cost, parallelism=parallelism),
+    ))
+
+
+pwd_context = build_password_hash(
+    time_cost=settings.ARGON2_TIME_COST,
+    memory_cost=settings.ARGON2_MEMORY_COST,
+    parallelism=settings.ARGON2_PARALLELISM,
+)
+
+
+class HashingPoolBusyException(Exception):
+    """Lançada quando a fila do pool de hashing está cheia."""
+
+    pass
+
+
+class PasswordHashingPool:
+    """
+    Executor dedicado ao Argon2, fora do event loop e do threadpool do Starlette.
+
+    `max_workers` limita quantos hashes rodam ao mesmo tempo (cada um usa
+    `memory_cost` KiB de memória); `max_pending` limita quantos podem esperar na
+    fila. Acima disso o pedido é recusado em vez de acumular memória e latência.
+    O argon2-cffi libera o GIL durante o hash, então threads bastam.
+    """
+
+    def __init__(self, context: PasswordHash, max_workers: int, max_pending: int):
+        self.context = context
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix='password-hash'
+        )
+        self._lock = threading.Lock()
+        self._pending = 0  # enviados e ainda não concluídos
+        self._running = 0
+        self._completed = 0
+        self._rejected = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'workers': self.max_workers,
+                'running': self._running,
+                'queued': self._pending - self._running,
+                'completed': self._completed,
+                'rejected': self._rejected,
+            }
+
+    def _call(self, fn: Callable, *args):
+        with self._lock:
+            self._running += 1
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._completed += 1
+
+    def _release(self, future: Future):
+        # callback do future: roda também quando o job é cancelado ainda na fila,
+        # caso em que _call nunca executa
+        with self._lock:
+            self._pending -= 1
+
+    def submit(self, fn: Callable, *args) -> Future:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._rejected += 1
+                raise HashingPoolBusyException('Password hashing queue is full')
+            self._pending += 1
+        try:
+            future = self._executor.submit(self._call, fn, *args)
+        except RuntimeError:
+            with self._lock:
+                self._pending -= 1
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    async def _run(self, fn: Callable, *args):
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.context.hash, password)
+
+    async def verify_and_update(
+        self, plain_password: str, hashed_password: str
+    ) -> Tuple[bool, Optional[str]]:
+        """
+        Verifica a senha e, se o hash foi gerado com parâmetros diferentes dos
+        atuais, devolve também o novo hash para ser salvo no lugar do antigo.
+        """
+        return await self._run(self.context.verify_and_update, plain_password, hashed_password)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+
+password_hasher = PasswordHashingPool(
+    pwd_context,
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
 
 
 def generate_random_value(length: int = 20):
@@ -15,3 +133,53 @@ def get_hash_from_password(password: str):
 
 def is_valid_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
+
+
+def calibrate_argon2(
+    target_ms: float = 250.0,
+    memory_cost: int = settings.ARGON2_MEMORY_COST,
+    parallelism: int = settings.ARGON2_PARALLELISM,
+    max_time_cost: int = 20,
+    samples: int = 3,
+) -> Dict[str, float]:
+    """
+    Maior `time_cost` (com a memória e o paralelismo informados) cujo hash fica
+    dentro de `target_ms` nesta máquina. Usa a mediana de algumas amostras.
+    """
+
+    def measure(time_cost: int) -> float:
+        context = build_password_hash(time_cost, memory_cost, parallelism)
+        durations = []
+        for _ in range(samples):
+            start = time.perf_counter()
+            context.hash('calibration-password')
+            durations.append((time.perf_counter() - start) * 1000)
+        return sorted(durations)[len(durations) // 2]
+
+    time_cost, elapsed = 1, measure(1)
+    while time_cost < max_time_cost:
+        next_elapsed = measure(time_cost + 1)
+        if next_elapsed > target_ms:
+            break
+        time_cost, elapsed = time_cost + 1, next_elapsed
+
+    return {
+        'time_cost': time_cost,
+        'memory_cost': memory_cost,
+        'parallelism': parallelism,
+        'elapsed_ms': round(elapsed, 1),
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Calibra os parâmetros do Argon2.')
+    parser.add_argument('--target-ms', type=float, default=250.0)
+    parser.add_argument('--memory-cost', type=int, default=settings.ARGON2_MEMORY_COST)
+    parser.add_argument('--parallelism', type=int, default=settings.ARGON2_PARALLELISM)
+    args = parser.parse_args()
+
+    params = calibrate_argon2(args.target_ms, args.memory_cost, args.parallelism)
+    print(f'# hash em ~{params["elapsed_ms"]} ms (alvo: {args.target_ms} ms)')
+    print(f'ARGON2_TIME_COST={params["time_cost"]}')
+    print(f'ARGON2_MEMORY_COST={params["memory_cost"]}')
+    print(f'ARGON2_PARALLELISM={params["parallelism"]}')
@@ -0,0 +1,81 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from api_books.settings import Settings
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Usuário autenticado, sem a senha e desligado da sessão do banco."""
+
+    id: int
+    username: str
+    email: str
+    is_admin: bool
+
+    @classmethod
+    def from_user(cls, user) -> 'Principal':
+        return cls(id=user.id, username=user.username, email=user.email, is_admin=user.is_admin)
+
+
+class PrincipalCache:
+    """
+    Cache LRU com TTL dos usuários autenticados, chaveado pelo `sub` do token.
+
+    O token continua sendo decodificado (assinatura e expiração) a cada
+    requisição; só a consulta do usuário no banco é evitada. Alterações de
+    usuários devem chamar `invalidate` (ou `clear`) explicitamente.
+    """
+
+    def __init__(self, max_entries: int, ttl: float, enabled: bool = True):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._entries: OrderedDict = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, subject: str) -> Optional[Principal]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(subject)
+            if entry is None:
+                return None
+            principal, expires_at = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[subject]
+                return None
+            self._entries.move_to_end(subject)
+            return principal
+
+    def put(self, subject: str, principal: Principal):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[subject] = (principal, time.monotonic() + self.ttl)
+            self._entries.move_to_end(subject)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, *subjects: str):
+        with self._lock:
+            for subject in subjects:
+                self._entries.pop(subject, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries = OrderedDict()
+
+
+settings = Settings()
+principal_cache = PrincipalCache(
+    max_entries=settings.AUTH_PRINCIPAL_CACHE_MAX_ENTRIES,
+    ttl=settings.AUTH_PRINCIPAL_CACHE_TTL,
+    enabled=settings.AUTH_PRINCIPAL_CACHE_ENABLED,
+)
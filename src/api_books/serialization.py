@@ -0,0 +1,38 @@
+import json
+from typing import Iterable, Sequence
+
+from fastapi import Response
+
+from api_books.database.books import BOOK_COLUMNS
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+def dumps(content) -> bytes:
+    """
+    JSON compacto em UTF-8, no mesmo formato do JSONResponse do FastAPI. Usa o
+    orjson quando instalado (grupo opcional `serialization`) e o módulo json caso contrário.
+    """
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, indent=None, separators=(',', ':')
+    ).encode('utf-8')
+
+
+def book_list_response(total: int, rows: Iterable[Sequence], **fields) -> Response:
+    """
+    Resposta de uma lista de livros (BooksList, StatsPriceRange) escrita direto a
+    partir das tuplas do banco, com as colunas de BOOK_COLUMNS.
+
+    Não cria um BookSchema por livro nem valida a saída: com milhares de livros
+    era esse o custo da resposta. O JSON é o mesmo do `response_model`, que
+    continua documentando a rota no OpenAPI.
+    """
+    books = [dict(zip(BOOK_COLUMNS, row)) for row in rows]
+    return Response(
+        dumps({'total': total, 'books': books, **fields}), media_type='application/json'
+    )
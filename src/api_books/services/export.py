@@ -0,0 +1,102 @@
+import csv
+import io
+import json
+from typing import Iterable, Iterator, List, Sequence, Tuple
+
+try:  # pyarrow é opcional: só o formato parquet depende dele
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover
+    pa = None
+    pq = None
+
+Batches = Iterable[List[Tuple]]
+
+
+class ExportUnavailableException(Exception):
+    """Lançada quando o formato pedido depende de uma biblioteca não instalada."""
+
+    pass
+
+
+def export_csv(columns: Sequence[str], batches: Batches) -> Iterator[bytes]:
+    """Gera o CSV em blocos: o cabeçalho e depois um bloco por lote de linhas."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(columns)
+    for rows in batches:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate(0)
+
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+def export_ndjson(columns: Sequence[str], batches: Batches) -> Iterator[bytes]:
+    """Gera um objeto JSON por linha (NDJSON), um bloco por lote."""
+    for rows in batches:
+        lines = [json.dumps(dict(zip(columns, row)), ensure_ascii=False) for row in rows]
+        yield ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+class _ChunkSink(io.RawIOBase):
+    """Arquivo de escrita que acumula os bytes até serem drenados pelo stream."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self) -> bool:  # noqa: PLR6301
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def export_parquet(columns: Sequence[str], batches: Batches) -> Iterator[bytes]:
+    """
+    Gera um arquivo Parquet com um row group por lote. Os bytes de cada row group
+    são enviados assim que escritos; o rodapé (metadados) vai no último bloco.
+    """
+    if not is_format_available('parquet'):
+        raise ExportUnavailableException('Parquet export requires pyarrow')
+
+    schema = pa.schema([
+        ('id', pa.int64()),
+        ('title', pa.string()),
+        ('price', pa.float64()),
+        ('availability', pa.int64()),
+        ('rating', pa.float64()),
+        ('category', pa.string()),
+        ('image_url', pa.string()),
+    ])
+    sink = _ChunkSink()
+
+    with pq.ParquetWriter(sink, schema) as writer:
+        for rows in batches:
+            arrays = [
+                pa.array(values, type=field.type) for values, field in zip(zip(*rows), schema)
+            ]
+            writer.write_table(pa.Table.from_arrays(arrays, names=list(columns)))
+            yield sink.drain()
+
+    yield sink.drain()
+
+
+def is_format_available(format_name: str) -> bool:
+    return format_name != 'parquet' or pa is not None
+
+
+EXPORTERS = {
+    'csv': (export_csv, 'text/csv', 'csv'),
+    'ndjson': (export_ndjson, 'application/x-ndjson', 'ndjson'),
+    'parquet': (export_parquet, 'application/vnd.apache.parquet', 'parquet'),
+}
@@ -0,0 +1,103 @@
+import hashlib
+import json
+import sqlite3
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS http_cache (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    content_hash TEXT NOT NULL,
+    body BLOB NOT NULL,
+    parsed TEXT
+)
+"""
+
+
+def content_hash(html: str) -> str:
+    return hashlib.blake2b(html.encode('utf-8'), digest_size=16).hexdigest()
+
+
+@dataclass
+class CachedPage:
+    url: str
+    html: str
+    content_hash: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    parsed: Optional[Dict] = field(default=None)
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """Cabeçalhos de requisição condicional para revalidar a página."""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class HttpCache:
+    """
+    Cache HTTP persistente (SQLite) usado pelo scraper.
+
+    Guarda, por URL, o ETag/Last-Modified, o hash do conteúdo, o HTML
+    comprimido e os campos já extraídos da página (`parsed`), permitindo
+    requisições condicionais e evitando refazer o parsing de páginas que
+    não mudaram desde o último scraping.
+    """
+
+    def __init__(self, path: str):
+        if path != ':memory:':
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(SCHEMA)
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        row = self.connection.execute(
+            'SELECT etag, last_modified, content_hash, body, parsed FROM http_cache WHERE url = ?',
+            (url,),
+        ).fetchone()
+        if row is None:
+            return None
+
+        etag, last_modified, hash_value, body, parsed = row
+        return CachedPage(
+            url=url,
+            html=zlib.decompress(body).decode('utf-8'),
+            content_hash=hash_value,
+            etag=etag,
+            last_modified=last_modified,
+            parsed=json.loads(parsed) if parsed else None,
+        )
+
+    def put(self, page: CachedPage):
+        self.connection.execute(
+            'INSERT OR REPLACE INTO http_cache '
+            '(url, etag, last_modified, content_hash, body, parsed) VALUES (?, ?, ?, ?, ?, ?)',
+            (
+                page.url,
+                page.etag,
+                page.last_modified,
+                page.content_hash,
+                zlib.compress(page.html.encode('utf-8')),
+                json.dumps(page.parsed) if page.parsed is not None else None,
+            ),
+        )
+
+    def set_parsed(self, url: str, parsed: Dict):
+        """Registra os campos extraídos da página (reaproveitados enquanto ela não mudar)."""
+        self.connection.execute(
+            'UPDATE http_cache SET parsed = ? WHERE url = ?', (json.dumps(parsed), url)
+        )
+
+    def commit(self):
+        self.connection.commit()
+
+    def close(self):
+        self.connection.commit()
+        self.connection.close()
@@ -0,0 +1,161 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field, replace
+from datetime import datetime
+from typing import Callable, Dict, Optional, Tuple
+from uuid import uuid4
+from zoneinfo import ZoneInfo
+
+from api_books import metrics
+from api_books.logging_config import app_logger
+from api_books.middlewares.cache import response_cache
+from api_books.schemas import JobStatus
+from api_books.services.scraper import AsyncBookScraper
+from api_books.services.update_db_from_csv import update_db
+
+
+def _now() -> datetime:
+    return datetime.now(tz=ZoneInfo('UTC'))
+
+
+@dataclass
+class ScrapeJob:
+    """Estado de uma execução de scraping + ingestão."""
+
+    id: str
+    status: JobStatus = JobStatus.QUEUED
+    stage: Optional[str] = None
+    created_at: datetime = field(default_factory=_now)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    timings: Dict[str, float] = field(default_factory=dict)
+    counts: Dict[str, int] = field(default_factory=dict)
+    dataset_version: Optional[str] = None
+    error: Optional[str] = None
+
+    @property
+    def active(self) -> bool:
+        return self.status in {JobStatus.QUEUED, JobStatus.RUNNING}
+
+    @contextmanager
+    def stage_timer(self, stage: str):
+        """Marca a etapa atual e registra sua duração em `timings`."""
+        self.stage = stage
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.timings[stage] = round(elapsed, 3)
+            if metrics.ENABLED:
+                metrics.scrape_stage_duration.labels(stage).observe(elapsed)
+
+
+def run_scrape_and_ingest(job: ScrapeJob):
+    """Scraping do site, carga do CSV no banco e invalidação do cache de respostas."""
+    scraper = AsyncBookScraper()
+    with job.stage_timer('scraping'):
+        asyncio.run(scraper.run())
+    job.counts.update(
+        books_scraped=scraper.books_written,
+        pages_not_modified=scraper.not_modified_pages,
+        details_reused=scraper.reused_details,
+    )
+    if metrics.ENABLED:
+        metrics.scraper_books.inc(scraper.books_written)
+        metrics.scraper_pages_not_modified.inc(scraper.not_modified_pages)
+        metrics.scraper_details_reused.inc(scraper.reused_details)
+
+    def report_progress(rows: int):
+        job.counts['rows_loaded'] = rows
+
+    with job.stage_timer('ingesting'):
+        result = update_db(progress=report_progress)
+    if result is None:
+        raise RuntimeError('Database update failed')
+
+    job.dataset_version = result.dataset_version
+    job.counts.update(
+        books_inserted=result.inserted,
+        books_updated=result.updated,
+        books_deleted=result.deleted,
+        books_unchanged=result.unchanged,
+    )
+    if result.changed:
+        # nova versão do dataset: descarta de uma vez todas as respostas em cache
+        response_cache.invalidate(result.dataset_version)
+
+
+class JobManager:
+    """
+    Executa os jobs de scraping em uma thread, fora do event loop da API.
+
+    Só existe um job ativo por vez: um novo pedido feito enquanto há um job
+    na fila ou em execução é agregado a ele (evita duas cargas concorrentes
+    apagando e reescrevendo a tabela `books`).
+    """
+
+    def __init__(
+        self,
+        runner: Callable[[ScrapeJob], None] = run_scrape_and_ingest,
+        history_size: int = 50,
+    ):
+        self.runner = runner
+        self.history_size = history_size
+        self._lock = threading.Lock()
+        self._jobs: OrderedDict = OrderedDict()
+        self._active: Optional[ScrapeJob] = None
+
+    def submit(self) -> Tuple[ScrapeJob, bool]:
+        """Retorna o job (novo ou o que já está ativo) e se o pedido foi agregado."""
+        with self._lock:
+            if self._active is not None and self._active.active:
+                return self._snapshot(self._active), True
+
+            job = ScrapeJob(id=uuid4().hex)
+            self._jobs[job.id] = job
+            self._active = job
+            while len(self._jobs) > self.history_size:
+                self._jobs.popitem(last=False)
+
+        threading.Thread(
+            target=self._execute, args=(job,), name=f'scrape-job-{job.id[:8]}', daemon=True
+        ).start()
+        return self._snapshot(job), False
+
+    def get(self, job_id: str) -> Optional[ScrapeJob]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return self._snapshot(job) if job else None
+
+    def _execute(self, job: ScrapeJob):
+        job.started_at = _now()
+        job.status = JobStatus.RUNNING
+        try:
+            self.runner(job)
+        except Exception as e:
+            app_logger.exception(f'Scraping job {job.id} failed')
+            job.error = str(e)
+            job.status = JobStatus.FAILED
+        else:
+            job.stage = 'done'
+            job.status = JobStatus.SUCCEEDED
+        finally:
+            job.finished_at = _now()
+            if metrics.ENABLED:
+                metrics.scrape_jobs.labels(job.status.value).inc()
+
+    @staticmethod
+    def _snapshot(job: ScrapeJob) -> ScrapeJob:
+        # cópia para a resposta não ver o job mudando durante a serialização
+        return replace(job, timings=dict(job.timings), counts=dict(job.counts))
+
+
+job_manager = JobManager()
+
+
+def get_job_manager() -> JobManager:
+    return job_manager
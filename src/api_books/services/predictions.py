@@ -0,0 +1,123 @@
+import json
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+import numpy as np
+
+NDJSON_MEDIA_TYPE = 'application/x-ndjson'
+
+# mesmos limites do PredictionInput
+AVAILABILITY_RANGE = (0, 100)
+RATING_RANGE = (1.0, 5.0)
+
+
+class BatchTooLargeException(ValueError):
+    """Lançada quando o lote excede o número máximo de linhas."""
+
+    pass
+
+
+@dataclass(frozen=True)
+class PredictionBatch:
+    availability: np.ndarray
+    rating: np.ndarray
+    category: Optional[np.ndarray]  # opcional; None quando nenhuma linha informa
+    ndjson: bool  # formato da requisição; a resposta usa o mesmo
+
+    def __len__(self) -> int:
+        return len(self.availability)
+
+
+def _columns_from_ndjson(body: bytes):
+    lines = [line for line in body.splitlines() if line.strip()]
+    # um único json.loads para todas as linhas
+    rows = json.loads(b'[' + b','.join(lines) + b']')
+    try:
+        return (
+            [row['x1_availability'] for row in rows],
+            [row['x2_rating'] for row in rows],
+            [row.get('category') for row in rows],
+        )
+    except (KeyError, TypeError, AttributeError):
+        raise ValueError("Each line must have 'x1_availability' and 'x2_rating'")
+
+
+def _columns_from_json(body: bytes):
+    payload = json.loads(body)
+    if not isinstance(payload, dict):
+        raise ValueError("Body must be an object with 'x1_availability' and 'x2_rating' arrays")
+    availability, rating = payload.get('x1_availability'), payload.get('x2_rating')
+    if not isinstance(availability, list) or not isinstance(rating, list):
+        raise ValueError("Body must be an object with 'x1_availability' and 'x2_rating' arrays")
+    return availability, rating, payload.get('category')
+
+
+def _out_of_range(values: np.ndarray, bounds) -> np.ndarray:
+    return np.flatnonzero((values < bounds[0]) | (values > bounds[1]))
+
+
+def parse_batch(body: bytes, content_type: str, max_rows: int) -> PredictionBatch:
+    """
+    Lê um lote colunar (JSON com um array por feature) ou NDJSON (um
+    PredictionInput por linha) e valida tudo de forma vetorizada.
+    """
+    ndjson = content_type.split(';', 1)[0].strip() == NDJSON_MEDIA_TYPE
+    try:
+        availability, rating, category = (_columns_from_ndjson if ndjson else _columns_from_json)(
+            body
+        )
+    except json.JSONDecodeError as e:
+        raise ValueError(f'Invalid JSON: {e.msg}')
+
+    if len(availability) != len(rating):
+        raise ValueError("'x1_availability' and 'x2_rating' must have the same length")
+    if not availability:
+        raise ValueError('The batch is empty')
+    if len(availability) > max_rows:
+        raise BatchTooLargeException(f'The batch exceeds {max_rows} rows')
+    if category is not None and (not isinstance(category, list) or len(category) != len(rating)):
+        raise ValueError("'category' must have the same length as the features")
+    if category is not None and all(value is None for value in category):
+        category = None
+
+    try:
+        availability = np.asarray(availability, dtype=np.float64)
+        rating = np.asarray(rating, dtype=np.float64)
+    except (TypeError, ValueError):
+        raise ValueError('Features must be numbers')
+
+    if availability.ndim != 1 or rating.ndim != 1:
+        raise ValueError('Features must be flat arrays of numbers')
+    if not np.array_equal(availability, np.round(availability)):
+        raise ValueError("'x1_availability' must be an integer")
+
+    for name, values, bounds in (
+        ('x1_availability', availability, AVAILABILITY_RANGE),
+        ('x2_rating', rating, RATING_RANGE),
+    ):
+        invalid = _out_of_range(values, bounds)
+        if invalid.size or np.isnan(values).any():
+            rows = invalid[:5].tolist()
+            raise ValueError(f"'{name}' must be between {bounds[0]} and {bounds[1]} (rows {rows})")
+
+    if category is not None:
+        category = np.asarray(['' if value is None else str(value) for value in category])
+
+    return PredictionBatch(
+        availability=availability, rating=rating, category=category, ndjson=ndjson
+    )
+
+
+def iter_ndjson(
+    predicted_price: np.ndarray, confidence: np.ndarray, chunk_size: int = 5_000, **extra
+) -> Iterator[bytes]:
+    """Uma linha JSON por predição, na ordem da entrada, enviada em blocos."""
+    suffix = ''.join(f', {json.dumps(key)}: {json.dumps(value)}' for key, value in extra.items())
+    for start in range(0, len(predicted_price), chunk_size):
+        prices = predicted_price[start : start + chunk_size].tolist()
+        confidences = confidence[start : start + chunk_size].tolist()
+        lines = [
+            f'{{"predicted_price": {price}, "confidence": {conf}{suffix}}}\n'
+            for price, conf in zip(prices, confidences)
+        ]
+        yield ''.join(lines).encode('utf-8')
@@ -1,17 +1,26 @@
 import asyncio
 import csv
 import logging
+import multiprocessing
 import os
-import re
 import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from http import HTTPStatus
 from pathlib import Path
-from typing import List, Optional
+from typing import Awaitable, Callable, Iterable, List, NamedTuple, Optional, Tuple
 
 import aiohttp
 from aiohttp_retry import ExponentialRetry, RetryClient
-from bs4 import BeautifulSoup
 
+from api_books.services.http_cache import CachedPage, HttpCache, content_hash
 from api_books.services.scraper_exception import PaginatorNotFoundException, ScraperException
+from api_books.services.scraper_parsers import (
+    get_backend,
+    parse_detail,
+    parse_listing,
+    parse_total_pages,
+)
 from api_books.settings import Settings
 
 HEADERS = {
@@ -19,191 +28,305 @@ HEADERS = {
     '(KHTML, like Gecko) Chrome/137.0.0.0 Safari/537.36 Edg/137.0.0.0'
 }
 
+CSV_HEADER = ['id', 'title', 'price', 'availability', 'rating', 'category', 'image_url']
+
+_DONE = object()  # sentinela que encerra um estágio do pipeline
+
+Emit = Callable[[object], Awaitable[None]]
+
+
+@dataclass(frozen=True)
+class PipelineConfig:
+    """Limites de concorrência de cada estágio e tamanho das filas entre eles."""
+
+    listing_workers: int = 5
+    detail_workers: int = 15
+    parse_workers: int = 4
+    queue_size: int = 100
+
+
+class ListedBook(NamedTuple):
+    """Dados de um livro extraídos da página de listagem."""
+
+    page: int
+    position: int
+    title: str
+    price: float
+    rating: float
+    detail_url: str
+
+
+class DetailPage(NamedTuple):
+    """Página de detalhes baixada, ainda sem parsing."""
+
+    book: ListedBook
+    page: CachedPage
+    changed: bool
+
 
 class AsyncBookScraper:
     """Encapsula toda a lógica de scraping do site books.toscrape.com."""
 
     TARGET_URL = Settings().SCRAPING_TARGET_URL
     OUTPUT_CSV_FILE = Settings().CSV_PATH
-    _current_id: int = 0
-
-    def __init__(self, max_concurrent_requests: int = 15, logger: logging.Logger = None):
+    HTTP_CACHE_ENABLED = Settings().SCRAPER_HTTP_CACHE_ENABLED
+    HTTP_CACHE_PATH = Settings().SCRAPER_HTTP_CACHE_PATH
+    PARSER_BACKEND = Settings().SCRAPER_PARSER_BACKEND
+    PARSE_PROCESSES = Settings().SCRAPER_PARSE_PROCESSES
+
+    def __init__(  # noqa: PLR0913, PLR0917
+        self,
+        max_concurrent_requests: int = 15,
+        logger: logging.Logger = None,
+        http_cache: Optional[HttpCache] = None,
+        pipeline: PipelineConfig = PipelineConfig(),
+        parser_backend: Optional[str] = None,
+    ):
         self.max_concurrent_requests = max_concurrent_requests
-        self.semaphore = asyncio.Semaphore(max_concurrent_requests)
         self.logger = logger
         self.session = None
         self.semaphore = None
+        self.http_cache = http_cache
+        self.pipeline = pipeline
+        self.parser_backend = get_backend(parser_backend or self.PARSER_BACKEND).name
+        self.executor = None
+        self.page_size = 0
+        self.not_modified_pages = 0
+        self.reused_details = 0
+        self.books_written = 0
 
         print(f'TARGET_URL configurada: {self.TARGET_URL}')
         if not self.TARGET_URL.endswith('/'):
             print('INFO: TARGET_URL não termina com /')
 
-    async def _get_bs4(self, url: str) -> Optional[BeautifulSoup]:
-        """Faz a requisição HTTP e retorna um objeto BeautifulSoup."""
+    async def _fetch_page(self, url: str) -> Optional[Tuple[CachedPage, bool]]:
+        """
+        Faz a requisição HTTP (condicional, quando a URL está no cache) e retorna
+        a página junto com um indicador se o conteúdo mudou desde o último scraping.
+        """
+        cached = self.http_cache.get(url) if self.http_cache else None
+        headers = cached.conditional_headers() if cached else {}
+
         async with self.semaphore:
             try:
-                async with self.session.get(url, timeout=5) as response:
+                async with self.session.get(url, timeout=5, headers=headers) as response:
+                    if cached and response.status == HTTPStatus.NOT_MODIFIED:
+                        self.not_modified_pages += 1
+                        return cached, False
+
                     response.raise_for_status()  # Lança HTTPError para status 4xx/5xx
                     html = await response.text()
-                    return BeautifulSoup(html, 'html.parser')
+                    etag = response.headers.get('ETag')
+                    last_modified = response.headers.get('Last-Modified')
             except (aiohttp.ClientError, asyncio.TimeoutError) as e:
                 # self.logger.error(f"Erro ao acessar a URL: {url}", exc_info=True)
                 print(f'Erro ao acessar {url}: {e}')
                 print(f'Tipo do erro: {type(e)}')
                 return None
 
+        page = CachedPage(url, html, content_hash(html), etag, last_modified)
+        changed = cached is None or cached.content_hash != page.content_hash
+        if not changed:
+            # servidor sem suporte a requisição condicional, mas o conteúdo é o mesmo
+            page.parsed = cached.parsed
+        if self.http_cache:
+            self.http_cache.put(page)
+
+        return page, changed
+
+    async def _parse(self, parse_function: Callable, html: str):
+        """
+        Executa o parsing no ProcessPoolExecutor (quando configurado), para não
+        bloquear o event loop enquanto as requisições estão em andamento.
+        """
+        if self.executor is None:
+            return parse_function(self.parser_backend, html)
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, parse_function, self.parser_backend, html)
+
     async def _get_total_pages(self) -> int:
         """Encontra e retorna o número total de páginas da paginação do site"""
         # self.logger.info("Buscando o número total de páginas...")
-        bs4 = await self._get_bs4(self.TARGET_URL)
+        fetched = await self._fetch_page(self.TARGET_URL)
 
-        if not bs4:
+        if not fetched:
             raise ScraperException('Não foi possível abrir a página inicial.')
 
-        paginator = bs4.find('li', class_='current')
-        if not paginator:
+        html = fetched[0].html
+        total_pages = await self._parse(parse_total_pages, html)
+        if total_pages is None:
             raise PaginatorNotFoundException(
                 "Elemento de paginação 'li.current' não foi encontrado."
             )
 
-        match = re.search(r'of (\d+)', paginator.text)
+        # a página inicial é a primeira da listagem: define quantos livros há por página
+        self.page_size = len(await self._parse(parse_listing, html))
 
-        total_pages = int(match.group(1))
         # self.logger.info(f"Total de páginas encontradas: {total_pages}")
         return total_pages
 
-    @staticmethod
-    def _get_book_title(book: BeautifulSoup) -> str:
-        return book.h3.a['title']
-
-    @staticmethod
-    def _get_book_price(book: BeautifulSoup) -> float:
-        price_text = book.find('p', class_='price_color').text
-        pattern = r'\d+(\.\d+)?'
-        match = re.search(pattern, price_text)
-        return float(match.group(0))
-
-    @staticmethod
-    def _get_book_availability(book: BeautifulSoup) -> int:
-        text = book.find('p', class_='instock availability').text.strip()
-        match = re.search(r'\((\d+)\s+available\)', text)
-        stock_qty = int(match.group(1)) if match else 0
-        return stock_qty
-
-    @staticmethod
-    def _get_book_rating(book: BeautifulSoup) -> str:
-        rating_text = book.find('p', class_='star-rating')['class'][1]
-        word_to_num = {
-            'zero': 0.0,
-            'one': 1.0,
-            'two': 2.0,
-            'three': 3.0,
-            'four': 4.0,
-            'five': 5.0,
-            'six': 6.0,
-            'seven': 7.0,
-            'eight': 8.0,
-            'nine': 9.0,
-            'ten': 10.0,
-        }
-        return word_to_num.get(rating_text.lower(), 0.0)
-
-    def _get_image_url(self, book_detail: BeautifulSoup) -> str:
-        image_src_value = book_detail.select_one('.carousel-inner img')['src']
-        image_path = image_src_value.replace('../', '/')
+    def _get_image_url(self, image_src: str) -> str:
+        image_path = image_src.replace('../', '/')
         image_path = image_path.lstrip('/')
         base_url = self.TARGET_URL.rstrip('/') + '/'
 
         return base_url + image_path
 
-    @staticmethod
-    def _get_category(book_detail: BeautifulSoup) -> str:
-        category = book_detail.select('ul.breadcrumb li a')[-1].text.strip()
-        return category
+    def _get_detail_url(self, href: str) -> str:
+        path_book_detail = href.replace('catalogue/', '')
+        base_url = self.TARGET_URL.rstrip('/') + '/'
+        return base_url + 'catalogue/' + path_book_detail
 
-    async def _access_page_detail(self, book_bs4: BeautifulSoup) -> BeautifulSoup:
-        path_book_detail = book_bs4.h3.a['href'].replace('catalogue/', '')
+    def _get_page_url(self, page: int) -> str:
+        # garantir que TARGET_URL termine com /
         base_url = self.TARGET_URL.rstrip('/') + '/'
-        url_book_detail = base_url + 'catalogue/' + path_book_detail
-        book_detail_bs4 = await self._get_bs4(url_book_detail)
-        if not book_detail_bs4:
+        return f'{base_url}catalogue/page-{page}.html'
+
+    def _book_id(self, book: ListedBook) -> int:
+        """ID estável pela posição na listagem, independente da ordem de chegada."""
+        return (book.page - 1) * self.page_size + book.position + 1
+
+    # Estágios do pipeline: cada um consome um item da fila de entrada e
+    # publica zero ou mais itens na fila do estágio seguinte.
+
+    async def _fetch_listing(self, page_number: int, emit: Emit):
+        fetched = await self._fetch_page(self._get_page_url(page_number))
+        if fetched:  # páginas com falha são descartadas
+            await emit((page_number, fetched[0]))
+
+    async def _extract_books(self, listing: Tuple[int, CachedPage], emit: Emit):
+        page_number, page = listing
+        for position, item in enumerate(await self._parse(parse_listing, page.html)):
+            await emit(
+                ListedBook(
+                    page=page_number,
+                    position=position,
+                    title=item.title,
+                    price=item.price,
+                    rating=item.rating,
+                    detail_url=self._get_detail_url(item.href),
+                )
+            )
+
+    async def _fetch_detail(self, book: ListedBook, emit: Emit):
+        fetched = await self._fetch_page(book.detail_url)
+        if not fetched:
             raise ScraperException('Não foi possível abrir a página de detalhes.')
 
-        return book_detail_bs4
-
-    async def _parse_book(self, book_bs4) -> Optional[List]:
-        self._current_id += 1
-        id = self._current_id
-        title = self._get_book_title(book_bs4)
-        price = self._get_book_price(book_bs4)
-        # availability = self._get_book_availability(book_bs4)
-        rating = self._get_book_rating(book_bs4)
-
-        # image, category and availability
-        # navegar até pagina de detalhes
-        book_detail_bs4 = await self._access_page_detail(book_bs4)
-        availability = self._get_book_availability(book_detail_bs4)
-        category = self._get_category(book_detail_bs4)
-        image_url = self._get_image_url(book_detail_bs4)
-
-        return [id, title, price, availability, rating, category, image_url]
-
-    def _generate_page_urls(self, total_pages: int) -> List[str]:
-        """Gera lista de URLs para todas as páginas de paginação"""
-        urls = []
-        for page in range(1, total_pages + 1):
-            # garantir que TARGET_URL termine com /
-            base_url = self.TARGET_URL.rstrip('/') + '/'
-            url = f'{base_url}catalogue/page-{page}.html'
-            urls.append(url)
-        return urls
-
-    async def _fetch_all_pages(self, page_urls: List[str]) -> List[BeautifulSoup]:
-        """Busca todas as páginas de forma assíncrona"""
-        print(f'Buscando todas as {len(page_urls)} páginas...')
-        page_tasks = [self._get_bs4(url) for url in page_urls]
-        all_pages_bs4 = await asyncio.gather(*page_tasks)
-        print('Páginas obtidas!')
-        return [page for page in all_pages_bs4 if page is not None]
+        page, changed = fetched
+        await emit(DetailPage(book, page, changed))
+
+    async def _parse_book(self, detail: DetailPage, emit: Emit):
+        """
+        Monta a linha do CSV. Se a página de detalhes não mudou desde o último
+        scraping, reaproveita os campos já extraídos sem refazer o parsing.
+        """
+        book, page, changed = detail
+        if not changed and page.parsed:
+            self.reused_details += 1
+            parsed = page.parsed
+        else:
+            details = await self._parse(parse_detail, page.html)
+            parsed = {
+                'availability': details.availability,
+                'category': details.category,
+                'image_url': self._get_image_url(details.image_src),
+            }
+            if self.http_cache:
+                self.http_cache.set_parsed(page.url, parsed)
+
+        await emit([
+            self._book_id(book),
+            book.title,
+            book.price,
+            parsed['availability'],
+            book.rating,
+            parsed['category'],
+            parsed['image_url'],
+        ])
 
     @staticmethod
-    def _extract_books_from_pages(pages_bs4: List[BeautifulSoup]) -> List[BeautifulSoup]:
-        """Extrai todos os elementos de livros das páginas"""
-        all_books = []
-        for page_bs4 in pages_bs4:
-            books = page_bs4.find_all('article', class_='product_pod')
-            all_books.extend(books)
-        return all_books
-
-    async def _parse_all_books(self, books_bs4: List[BeautifulSoup]) -> List[List]:
-        """Faz o parsing de todos os livros de forma assíncrona"""
-        print(f'Parsing de {len(books_bs4)} livros...')
-        book_parsing_tasks = [self._parse_book(book) for book in books_bs4]
-        return await asyncio.gather(*book_parsing_tasks)
+    async def _feed(outbox: asyncio.Queue, items: Iterable):
+        for item in items:
+            await outbox.put(item)
+        await outbox.put(_DONE)
 
     @staticmethod
-    def _save_to_csv(books_data: List[List], csv_path: str):
-        """Salva os dados dos livros em um arquivo CSV"""
+    async def _stage(
+        workers: int,
+        inbox: asyncio.Queue,
+        outbox: asyncio.Queue,
+        handler: Callable[[object, Emit], Awaitable[None]],
+    ):
+        """
+        Executa `workers` consumidores da fila de entrada. As filas são limitadas,
+        então um estágio lento bloqueia o anterior (backpressure).
+        """
 
+        async def worker():
+            while True:
+                item = await inbox.get()
+                if item is _DONE:
+                    inbox.put_nowait(_DONE)  # repassa a sentinela aos demais workers
+                    return
+                await handler(item, outbox.put)
+
+        await asyncio.gather(*(worker() for _ in range(workers)))
+        await outbox.put(_DONE)
+
+    async def _sink(self, inbox: asyncio.Queue, csv_path: str) -> int:
+        """Grava cada linha no CSV assim que chega; o arquivo só é trocado no final."""
         csv_file = Path(csv_path).resolve()
+        tmp_path = csv_file.with_name(csv_file.name + '.tmp')
         print(f'Escrevendo dados em: {csv_path}')
         print(f'Escrevendo dados em (absoluto): {csv_file}')
 
-        with open(csv_path, 'w', newline='', encoding='utf-8') as csvfile:
+        written = 0
+        with open(tmp_path, 'w', newline='', encoding='utf-8') as csvfile:
             writer = csv.writer(csvfile)
-            writer.writerow([
-                'id',
-                'title',
-                'price',
-                'availability',
-                'rating',
-                'category',
-                'image_url',
-            ])
-            writer.writerows(books_data)
-
-        print(f'Escrita concluída em: {csv_path}')
-        csvfile.close()
+            writer.writerow(CSV_HEADER)
+            while (row := await inbox.get()) is not _DONE:
+                writer.writerow(row)
+                written += 1
+
+        os.replace(tmp_path, csv_file)
+        print(f'Escrita concluída em: {csv_path} ({written} livros)')
+        self.books_written = written
+        return written
+
+    @staticmethod
+    async def _run_until_first_error(coroutines: List[Awaitable]):
+        """Executa as tarefas; se alguma falhar, cancela as demais e propaga o erro."""
+        tasks = [asyncio.ensure_future(coroutine) for coroutine in coroutines]
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+        for task in done:
+            if task.exception():
+                raise task.exception()
+
+    async def _run_pipeline(self, total_pages: int, csv_path: str):
+        """
+        listagem → extração → detalhes → parsing → CSV, ligados por filas limitadas.
+        A memória usada depende do tamanho das filas, não do número de páginas.
+        """
+        config = self.pipeline
+        pages, listings, books, details, rows = (
+            asyncio.Queue(config.queue_size) for _ in range(5)
+        )
+
+        print(f'Buscando {total_pages} páginas...')
+        await self._run_until_first_error([
+            self._feed(pages, range(1, total_pages + 1)),
+            self._stage(config.listing_workers, pages, listings, self._fetch_listing),
+            self._stage(config.parse_workers, listings, books, self._extract_books),
+            self._stage(config.detail_workers, books, details, self._fetch_detail),
+            self._stage(config.parse_workers, details, rows, self._parse_book),
+            self._sink(rows, csv_path),
+        ])
 
     async def run(self):
         """
@@ -213,14 +336,35 @@ class AsyncBookScraper:
         self.semaphore = asyncio.Semaphore(self.max_concurrent_requests)
         retry_options = ExponentialRetry(attempts=5, statuses={500, 502, 503, 504})
 
-        async with RetryClient(retry_options=retry_options) as self.session:
-            self.session._client.headers.update(HEADERS)
-            total_pages = await self._get_total_pages()
-            page_urls = self._generate_page_urls(total_pages)
-            pages_bs4 = await self._fetch_all_pages(page_urls)
-            books_bs4 = self._extract_books_from_pages(pages_bs4)
-            books_data = await self._parse_all_books(books_bs4)
-            self._save_to_csv(books_data, self.OUTPUT_CSV_FILE)
+        own_cache = self.http_cache is None and self.HTTP_CACHE_ENABLED
+        if own_cache:
+            self.http_cache = HttpCache(self.HTTP_CACHE_PATH)
+        if self.PARSE_PROCESSES > 0:
+            # spawn: não herda threads/event loop do processo da API
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.PARSE_PROCESSES,
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+
+        try:
+            async with RetryClient(retry_options=retry_options) as self.session:
+                self.session._client.headers.update(HEADERS)
+                total_pages = await self._get_total_pages()
+                await self._run_pipeline(total_pages, self.OUTPUT_CSV_FILE)
+        finally:
+            if self.executor:
+                self.executor.shutdown()
+                self.executor = None
+            if self.http_cache:
+                self.http_cache.commit()
+            if own_cache:
+                self.http_cache.close()
+                self.http_cache = None
+
+        print(
+            f'Cache HTTP: {self.not_modified_pages} páginas não modificadas (304), '
+            f'{self.reused_details} páginas de detalhes reaproveitadas'
+        )
 
         # permitir que a limpeza do aiohttp seja concluída sem erros.
         # se for windows, ele não esperar o aiohttp encerrar os trabalhos rsr
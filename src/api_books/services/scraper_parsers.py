@@ -0,0 +1,215 @@
+import re
+from functools import lru_cache
+from typing import List, NamedTuple, Optional
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:  # lxml é opcional
+    import lxml.html as lxml_html
+except ImportError:  # pragma: no cover
+    lxml_html = None
+
+try:  # selectolax é opcional
+    from selectolax.parser import HTMLParser as SelectolaxParser
+except ImportError:  # pragma: no cover
+    SelectolaxParser = None
+
+# Cada backend extrai apenas os nós usados pelo scraper e devolve tuplas simples
+# (serializáveis), para que o parsing possa rodar em um ProcessPoolExecutor.
+
+RATING_WORDS = {
+    'zero': 0.0,
+    'one': 1.0,
+    'two': 2.0,
+    'three': 3.0,
+    'four': 4.0,
+    'five': 5.0,
+    'six': 6.0,
+    'seven': 7.0,
+    'eight': 8.0,
+    'nine': 9.0,
+    'ten': 10.0,
+}
+
+
+class ListingItem(NamedTuple):
+    title: str
+    price: float
+    rating: float
+    href: str
+
+
+class BookDetails(NamedTuple):
+    availability: int
+    category: str
+    image_src: str
+
+
+def parse_price(text: str) -> float:
+    return float(re.search(r'\d+(\.\d+)?', text).group(0))
+
+
+def parse_availability(text: str) -> int:
+    match = re.search(r'\((\d+)\s+available\)', text.strip())
+    return int(match.group(1)) if match else 0
+
+
+def parse_rating(css_class: str) -> float:
+    # class="star-rating Three"
+    return RATING_WORDS.get(css_class.split()[1].lower(), 0.0)
+
+
+def parse_total_pages_text(text: str) -> Optional[int]:
+    match = re.search(r'of (\d+)', text)
+    return int(match.group(1)) if match else None
+
+
+class HtmlParserBackend:
+    """BeautifulSoup + html.parser, usando SoupStrainer para montar só os nós necessários."""
+
+    name = 'html.parser'
+    _listing_only = SoupStrainer('article', class_='product_pod')
+    _pagination_only = SoupStrainer('li', class_='current')
+    _detail_only = SoupStrainer(class_=['breadcrumb', 'carousel-inner', 'instock availability'])
+
+    def total_pages(self, html: str) -> Optional[int]:
+        paginator = BeautifulSoup(html, 'html.parser', parse_only=self._pagination_only).li
+        return parse_total_pages_text(paginator.text) if paginator else None
+
+    def listing(self, html: str) -> List[ListingItem]:
+        soup = BeautifulSoup(html, 'html.parser', parse_only=self._listing_only)
+        return [
+            ListingItem(
+                title=book.h3.a['title'],
+                price=parse_price(book.find('p', class_='price_color').text),
+                rating=parse_rating(' '.join(book.find('p', class_='star-rating')['class'])),
+                href=book.h3.a['href'],
+            )
+            for book in soup.find_all('article', class_='product_pod')
+        ]
+
+    def detail(self, html: str) -> BookDetails:
+        soup = BeautifulSoup(html, 'html.parser', parse_only=self._detail_only)
+        return BookDetails(
+            availability=parse_availability(soup.find('p', class_='instock availability').text),
+            category=soup.select('ul.breadcrumb li a')[-1].text.strip(),
+            image_src=soup.select_one('.carousel-inner img')['src'],
+        )
+
+
+def _xpath_class(name: str) -> str:
+    return f'contains(concat(" ", normalize-space(@class), " "), " {name} ")'
+
+
+class LxmlBackend:
+    """lxml (libxml2) com consultas XPath."""
+
+    name = 'lxml'
+
+    def total_pages(self, html: str) -> Optional[int]:  # noqa: PLR6301
+        paginator = lxml_html.fromstring(html).xpath(f'//li[{_xpath_class("current")}]')
+        return parse_total_pages_text(paginator[0].text_content()) if paginator else None
+
+    def listing(self, html: str) -> List[ListingItem]:  # noqa: PLR6301
+        items = []
+        for book in lxml_html.fromstring(html).xpath(f'//article[{_xpath_class("product_pod")}]'):
+            link = book.xpath('.//h3/a')[0]
+            items.append(
+                ListingItem(
+                    title=link.get('title'),
+                    price=parse_price(
+                        book.xpath(f'.//p[{_xpath_class("price_color")}]')[0].text_content()
+                    ),
+                    rating=parse_rating(
+                        book.xpath(f'.//p[{_xpath_class("star-rating")}]')[0].get('class')
+                    ),
+                    href=link.get('href'),
+                )
+            )
+        return items
+
+    def detail(self, html: str) -> BookDetails:  # noqa: PLR6301
+        document = lxml_html.fromstring(html)
+        availability = document.xpath(
+            f'//p[{_xpath_class("instock")} and {_xpath_class("availability")}]'
+        )[0]
+        return BookDetails(
+            availability=parse_availability(availability.text_content()),
+            category=document.xpath(f'//ul[{_xpath_class("breadcrumb")}]/li/a')[-1]
+            .text_content()
+            .strip(),
+            image_src=document.xpath(f'//div[{_xpath_class("carousel-inner")}]//img/@src')[0],
+        )
+
+
+class SelectolaxBackend:
+    """selectolax (Lexbor) com seletores CSS."""
+
+    name = 'selectolax'
+
+    def total_pages(self, html: str) -> Optional[int]:  # noqa: PLR6301
+        paginator = SelectolaxParser(html).css_first('li.current')
+        return parse_total_pages_text(paginator.text()) if paginator else None
+
+    def listing(self, html: str) -> List[ListingItem]:  # noqa: PLR6301
+        items = []
+        for book in SelectolaxParser(html).css('article.product_pod'):
+            link = book.css_first('h3 a')
+            items.append(
+                ListingItem(
+                    title=link.attributes['title'],
+                    price=parse_price(book.css_first('p.price_color').text()),
+                    rating=parse_rating(book.css_first('p.star-rating').attributes['class']),
+                    href=link.attributes['href'],
+                )
+            )
+        return items
+
+    def detail(self, html: str) -> BookDetails:  # noqa: PLR6301
+        tree = SelectolaxParser(html)
+        return BookDetails(
+            availability=parse_availability(tree.css_first('p.instock.availability').text()),
+            category=tree.css('ul.breadcrumb li a')[-1].text(strip=True),
+            image_src=tree.css_first('.carousel-inner img').attributes['src'],
+        )
+
+
+BACKENDS = {
+    'selectolax': (SelectolaxBackend, SelectolaxParser),
+    'lxml': (LxmlBackend, lxml_html),
+    'html.parser': (HtmlParserBackend, BeautifulSoup),
+}
+
+
+def available_backends() -> List[str]:
+    """Backends instalados, do mais rápido para o mais lento."""
+    return [name for name, (_, library) in BACKENDS.items() if library is not None]
+
+
+@lru_cache
+def get_backend(name: str = 'auto'):
+    """Retorna o backend pelo nome; `auto` escolhe o mais rápido instalado."""
+    if name == 'auto':
+        name = available_backends()[0]
+    if name not in BACKENDS:
+        raise ValueError(f'Unknown parser backend: {name}')
+
+    backend_class, library = BACKENDS[name]
+    if library is None:
+        raise ValueError(f'Parser backend {name} is not installed')
+    return backend_class()
+
+
+# Funções de módulo (picklable) executadas no ProcessPoolExecutor
+
+
+def parse_total_pages(backend: str, html: str) -> Optional[int]:
+    return get_backend(backend).total_pages(html)
+
+
+def parse_listing(backend: str, html: str) -> List[ListingItem]:
+    return get_backend(backend).listing(html)
+
+
+def parse_detail(backend: str, html: str) -> BookDetails:
+    return get_backend(backend).detail(html)
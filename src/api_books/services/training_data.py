@@ -0,0 +1,161 @@
+import io
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+try:  # pyarrow é opcional: só o formato Arrow IPC depende dele
+    import pyarrow as pa
+except ImportError:  # pragma: no cover
+    pa = None
+
+
+class TrainingFormatUnavailableException(Exception):
+    """Lançada quando o formato pedido depende de uma biblioteca não instalada."""
+
+    pass
+
+
+@dataclass(frozen=True)
+class TrainingData:
+    """Colunas de treino em arrays NumPy e a máscara do conjunto de teste."""
+
+    id: np.ndarray
+    availability: np.ndarray
+    rating: np.ndarray
+    category: np.ndarray
+    price: np.ndarray
+    is_test: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.id)
+
+    def features(self) -> np.ndarray:
+        """Matriz (n, 2) com availability e rating, na ordem das features do modelo."""
+        return np.column_stack((self.availability, self.rating)).astype(np.float64)
+
+
+def _splitmix64(values: np.ndarray) -> np.ndarray:
+    # hash de inteiros (SplitMix64); o overflow em uint64 é intencional
+    with np.errstate(over='ignore'):
+        z = values.astype(np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def hash_unit_interval(ids: np.ndarray, seed: int = 0) -> np.ndarray:
+    """
+    Valor em [0, 1) determinístico para cada id: depende só do id e da semente,
+    então um livro não muda de lado quando outros entram ou saem da base.
+    """
+    seed_hash = _splitmix64(np.array([seed], dtype=np.uint64))[0]
+    hashed = _splitmix64(ids.astype(np.uint64) ^ seed_hash)
+    return (hashed >> np.uint64(11)).astype(np.float64) * 2.0**-53
+
+
+def split_mask(
+    ids: np.ndarray, test_size: float, seed: int = 0, strata: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Máscara booleana do conjunto de teste.
+
+    Sem estratos, cada id vai para teste quando seu hash fica abaixo de
+    `test_size`. Com estratos, cada grupo contribui com round(test_size * n)
+    itens, escolhidos pelos menores hashes do grupo.
+    """
+    scores = hash_unit_interval(ids, seed)
+    if strata is None:
+        return scores < test_size
+
+    _, codes = np.unique(strata, return_inverse=True)
+    order = np.lexsort((scores, codes))
+    sorted_codes = codes[order]
+    counts = np.bincount(codes)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    rank_in_group = np.arange(len(order)) - starts[sorted_codes]
+    test_per_group = np.floor(counts * test_size + 0.5).astype(np.int64)
+
+    is_test = np.empty(len(order), dtype=bool)
+    is_test[order] = rank_in_group < test_per_group[sorted_codes]
+    return is_test
+
+
+def build_training_data(
+    columns: Dict[str, Sequence], test_size: float, seed: int = 0, stratify: bool = False
+) -> TrainingData:
+    ids = np.asarray(columns['id'], dtype=np.int64)
+    category = np.asarray(columns['category'], dtype=str)
+    return TrainingData(
+        id=ids,
+        availability=np.asarray(columns['availability'], dtype=np.int64),
+        rating=np.asarray(columns['rating'], dtype=np.float64),
+        category=category,
+        price=np.asarray(columns['price'], dtype=np.float64),
+        is_test=split_mask(ids, test_size, seed, strata=category if stratify else None),
+    )
+
+
+def to_json(data: TrainingData) -> Dict:
+    """Formato original do endpoint: listas `training` e `test` de features + label."""
+
+    def rows(mask: np.ndarray):
+        return [
+            {'x1_availability': availability, 'x2_rating': rating, 'y_label_price': price}
+            for availability, rating, price in zip(
+                data.availability[mask].tolist(),
+                data.rating[mask].tolist(),
+                data.price[mask].tolist(),
+            )
+        ]
+
+    return {'training': rows(~data.is_test), 'test': rows(data.is_test)}
+
+
+def to_arrow_ipc(data: TrainingData) -> bytes:
+    """Tabela Arrow (formato IPC stream) com todas as colunas e a coluna `split`."""
+    if pa is None:
+        raise TrainingFormatUnavailableException('Arrow output requires pyarrow')
+
+    table = pa.table({
+        'id': data.id,
+        'availability': data.availability,
+        'rating': data.rating,
+        'category': data.category,
+        'price': data.price,
+        'split': np.where(data.is_test, 'test', 'train'),
+    })
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def to_npz(data: TrainingData) -> bytes:
+    """Arquivo .npz com X/y/ids/categorias de treino e de teste (sem pickle)."""
+    features = data.features()
+    train = ~data.is_test
+    buffer = io.BytesIO()
+    np.savez(
+        buffer,
+        feature_names=np.array(['availability', 'rating']),
+        X_train=features[train],
+        y_train=data.price[train],
+        id_train=data.id[train],
+        category_train=data.category[train],
+        X_test=features[data.is_test],
+        y_test=data.price[data.is_test],
+        id_test=data.id[data.is_test],
+        category_test=data.category[data.is_test],
+    )
+    return buffer.getvalue()
+
+
+def is_format_available(format_name: str) -> bool:
+    return format_name != 'arrow' or pa is not None
+
+
+ENCODERS = {
+    'arrow': (to_arrow_ipc, 'application/vnd.apache.arrow.stream', 'arrows'),
+    'npz': (to_npz, 'application/octet-stream', 'npz'),
+}
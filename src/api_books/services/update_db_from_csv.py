@@ -1,28 +1,153 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+from zoneinfo import ZoneInfo
+
 import pandas as pd
-from sqlalchemy import create_engine
+from sqlalchemy import text
 from sqlalchemy.exc import OperationalError, ProgrammingError
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 
-from api_books.models import Book
+from api_books import metrics
+from api_books.database.books import BookDataBase
+from api_books.database.connection import write_engine
 from api_books.settings import Settings
 
+try:  # pyarrow é opcional: sem ele a leitura em lotes usa o pandas
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:  # pragma: no cover
+    pa = None
+    pa_csv = None
+
+
+def new_dataset_version() -> str:
+    """Identificador de uma ingestão: o instante UTC da carga (ordenável como texto)."""
+    return datetime.now(tz=ZoneInfo('UTC')).strftime('%Y%m%dT%H%M%S%fZ')
+
+
+def _pyarrow_batches(csv_path: str, batch_size: int) -> Iterator[List[Dict]]:
+    # leitura em streaming (blocos de bytes), com os tipos fixos das colunas do CSV
+    column_types = {
+        'id': pa.int64(),
+        'title': pa.string(),
+        'price': pa.float64(),
+        'availability': pa.int64(),
+        'rating': pa.float64(),
+        'category': pa.string(),
+        'image_url': pa.string(),
+    }
+    convert_options = pa_csv.ConvertOptions(column_types=column_types)
+
+    pending = []
+    # arquivo aberto pelo Python: com o caminho, o pyarrow retém os blocos já lidos
+    # e o uso de memória cresce com o tamanho do arquivo
+    with open(csv_path, 'rb') as csv_file:
+        for record_batch in pa_csv.open_csv(csv_file, convert_options=convert_options):
+            pending.extend(record_batch.to_pylist())
+            while len(pending) >= batch_size:
+                yield pending[:batch_size]
+                pending = pending[batch_size:]
+
+    if pending:
+        yield pending
+
+
+def _pandas_batches(csv_path: str, batch_size: int) -> Iterator[List[Dict]]:
+    for chunk in pd.read_csv(csv_path, header=0, chunksize=batch_size):
+        yield chunk.to_dict('records')
+
+
+def iter_csv_batches(csv_path: str, batch_size: int, engine: str = 'auto') -> Iterator[List[Dict]]:
+    """
+    Lê o CSV em lotes de até `batch_size` linhas, sem carregar o arquivo inteiro.
+    `engine`: 'pyarrow', 'pandas' ou 'auto' (pyarrow quando instalado).
+    """
+    if engine == 'auto':
+        engine = 'pyarrow' if pa_csv is not None else 'pandas'
+    if engine == 'pyarrow':
+        return _pyarrow_batches(csv_path, batch_size)
+    if engine == 'pandas':
+        return _pandas_batches(csv_path, batch_size)
+    raise ValueError(f'Unknown CSV engine: {engine}')
+
+
+@dataclass
+class IngestResult:
+    dataset_version: str
+    inserted: int
+    updated: int
+    deleted: int
+    unchanged: int
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.inserted or self.updated or self.deleted)
+
+
+def ingest(
+    session: Session,
+    batches: Iterable[List[Dict]],
+    progress: Optional[Callable[[int], None]] = None,
+) -> IngestResult:
+    """
+    Carrega os lotes na área de staging e aplica em `books` só as diferenças,
+    em uma única transação: leitores nunca veem a tabela vazia ou pela metade.
+    `progress` recebe o total de linhas carregadas após cada lote.
+    """
+    db = BookDataBase(session)
+    db.clear_staging()
+    loaded = 0
+    for records in batches:
+        db.load_staging(records)
+        loaded += len(records)
+        if progress:
+            progress(loaded)
+
+    counts = db.merge_staging()
+    db.clear_staging()
+
+    dataset_version = db.get_dataset_version()
+    result = IngestResult(dataset_version=dataset_version, **counts)
+    if result.changed or dataset_version is None:
+        # Os triggers já atualizaram o índice full-text; 'optimize' funde
+        # os segmentos gerados pela carga para manter as buscas rápidas.
+        session.execute(text("INSERT INTO books_fts(books_fts) VALUES ('optimize')"))
+
+        # Estatísticas calculadas uma única vez por ingestão, na mesma transação
+        result.dataset_version = new_dataset_version()
+        db.save_stats_snapshot(result.dataset_version)
+    # sem diferenças a versão é mantida, e com ela o cache de respostas
+
+    session.commit()
+
+    if metrics.ENABLED:
+        metrics.ingest_runs.inc()
+        for change in ('inserted', 'updated', 'deleted', 'unchanged'):
+            metrics.ingest_rows.labels(change).inc(getattr(result, change))
+    return result
+
+
+def _print_progress(rows: int):
+    print(f'{rows} linhas carregadas na área de staging...')
+
 
-def update_db():
-    df = pd.read_csv(Settings().CSV_PATH, header=0)
-    engine_conn = create_engine(Settings().DATABASE_URL)
-    Session = sessionmaker(bind=engine_conn)
+def update_db(progress: Callable[[int], None] = _print_progress) -> Optional[IngestResult]:
+    settings = Settings()
+    batches = iter_csv_batches(
+        settings.CSV_PATH, settings.INGEST_BATCH_SIZE, engine=settings.INGEST_CSV_ENGINE
+    )
+    Session = sessionmaker(bind=write_engine)
 
     try:
         with Session() as session:
-            # limpa tabela
-            session.query(Book).delete()
-            print('Removendo dados anteriores...')
-
-            # Novos dados
-            records = df.to_dict('records')
-            session.bulk_insert_mappings(Book, records)
-            session.commit()
-            print('Dados atualizados com sucesso!')
+            result = ingest(session, batches, progress=progress)
+            print(
+                f'Dados atualizados com sucesso! (versão {result.dataset_version}: '
+                f'{result.inserted} novos, {result.updated} alterados, '
+                f'{result.deleted} removidos, {result.unchanged} sem alteração)'
+            )
+            return result
     except (OperationalError, ProgrammingError) as e:
         if 'no such table' in str(e).lower() or "table doesn't exist" in str(e).lower():
             print("Erro: Tabela 'books' não existe.")
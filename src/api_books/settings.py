@@ -1,3 +1,5 @@
+from typing import List
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -11,3 +13,74 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int
     REFRESH_TOKEN_EXPIRE_DAYS: int
     SECRET_KEY: str
+
+    # Perfil do SQLite (PRAGMAs aplicados em cada conexão)
+    SQLITE_JOURNAL_MODE: str = 'WAL'
+    SQLITE_SYNCHRONOUS: str = 'NORMAL'
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024  # bytes
+    SQLITE_CACHE_SIZE: int = -64_000  # negativo = KiB (~64 MB por conexão)
+    SQLITE_TEMP_STORE: str = 'MEMORY'
+    SQLITE_BUSY_TIMEOUT_MS: int = 5_000
+    # Pool de conexões somente leitura usado pelos endpoints de consulta
+    DB_READ_POOL_SIZE: int = 8
+    DB_READ_POOL_MAX_OVERFLOW: int = 4
+
+    # Cache de respostas HTTP (chaveado pela versão do dataset)
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    RESPONSE_CACHE_MAX_ENTRIES: int = 2048
+    RESPONSE_CACHE_MAX_AGE: int = 60  # segundos (Cache-Control)
+    RESPONSE_CACHE_VERSION_TTL: float = 5.0  # intervalo para reler a versão do dataset
+
+    # Cache HTTP persistente do scraper (requisições condicionais entre execuções)
+    SCRAPER_HTTP_CACHE_ENABLED: bool = True
+    SCRAPER_HTTP_CACHE_PATH: str = 'data/http_cache.sqlite'
+    # Backend de parsing HTML: auto, selectolax, lxml ou html.parser
+    SCRAPER_PARSER_BACKEND: str = 'auto'
+    SCRAPER_PARSE_PROCESSES: int = 2  # 0 = parsing no próprio event loop
+
+    # Ingestão do CSV em lotes (memória constante, independente do tamanho do arquivo)
+    INGEST_BATCH_SIZE: int = 10_000
+    INGEST_CSV_ENGINE: str = 'auto'  # auto, pyarrow ou pandas
+
+    # Predição em lote (POST /api/v1/ml/predictions/batch)
+    ML_BATCH_MAX_ROWS: int = 100_000
+    # Versões do modelo de preço (artefatos .npz e o ponteiro ACTIVE)
+    ML_MODELS_DIR: str = 'data/models'
+
+    # Cache dos usuários autenticados (evita consultar o banco a cada rota protegida)
+    AUTH_PRINCIPAL_CACHE_ENABLED: bool = True
+    AUTH_PRINCIPAL_CACHE_TTL: float = 60.0  # segundos
+    AUTH_PRINCIPAL_CACHE_MAX_ENTRIES: int = 1024
+
+    # Hash de senhas (Argon2) em um pool dedicado; calibre com
+    # `python -m api_books.security.crypt --target-ms 250`
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 65_536  # KiB
+    ARGON2_PARALLELISM: int = 4
+    PASSWORD_HASH_WORKERS: int = 2  # hashes simultâneos
+    PASSWORD_HASH_MAX_PENDING: int = 32  # acima disso responde 503
+
+    # Verificação de saúde em segundo plano (/api/v1/health, /health/live e /health/ready)
+    HEALTH_PROBE_INTERVAL: float = 15.0  # segundos
+    HEALTH_PROBE_TIMEOUT: float = 5.0
+    # vazio desliga a verificação; aponte para um serviço local em ambientes sem internet
+    HEALTH_CONNECTIVITY_URL: str = 'https://www.google.com'
+    HEALTH_READY_REQUIRES_CONNECTIVITY: bool = False
+
+    # Log de requisições (JSON em logs/api_requests.log): erros e requisições lentas
+    # sempre; as demais com probabilidade LOG_SAMPLE_RATE
+    LOG_REQUESTS_ENABLED: bool = True
+    LOG_SAMPLE_RATE: float = 1.0
+    LOG_SLOW_REQUEST_MS: float = 1_000.0
+    LOG_EXCLUDED_PATHS: List[str] = []
+
+    # Métricas no formato do Prometheus em /metrics
+    METRICS_ENABLED: bool = True
+
+    # Perfil de SQL por requisição (opt-in): cada consulta com duração e EXPLAIN QUERY PLAN,
+    # N+1 e full scans em logs/sql_queries.log, e o header Server-Timing
+    SQL_PROFILING_ENABLED: bool = False
+    SQL_N_PLUS_ONE_THRESHOLD: int = 3  # execuções da mesma consulta numa requisição
+    # consultas mais lentas que isso vão para logs/sql_queries.log, com ou sem o perfil (0 desliga)
+    SQL_SLOW_QUERY_MS: float = 250.0
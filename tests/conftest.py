@@ -1,14 +1,32 @@
 from pathlib import Path
 
+import httpx
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import StaticPool, create_engine
-from sqlalchemy.orm import sessionmaker
-
-from api_books.database.connection import get_session
+from sqlalchemy import NullPool, create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import Session
+
+from api_books.database.books import BookDataBase
+from api_books.database.connection import (
+    get_async_database_url,
+    get_async_session,
+    get_async_write_session,
+    get_session,
+    get_stream_session,
+    get_write_session,
+    read_engine,
+    write_engine,
+)
+from api_books.health_check import health_prober
 from api_books.main import app
+from api_books.metrics import instrument_engine
+from api_books.middlewares.cache import read_dataset_version, response_cache
+from api_books.ml_model import ModelRegistry, get_model_registry
 from api_books.models import table_registry
 from api_books.schemas import BookSchema, UserBase, UserCreated
+from api_books.security.crypt import get_hash_from_password
+from api_books.security.principals import principal_cache
 from tests.dummy_factory import BookFactory, UserFactory
 
 
@@ -18,26 +36,78 @@ def app_books():
 
 
 @pytest.fixture
-def client(session):
+def model_registry(tmp_path):
+    """Registro de modelos vazio em diretório temporário (predições usam o modelo fake)."""
+    return ModelRegistry(str(tmp_path / 'models'))
+
+
+@pytest.fixture
+def client(session, engine, async_engine, model_registry):
     def get_session_override():
         return session
 
+    async def get_async_session_override():
+        async with AsyncSession(async_engine, expire_on_commit=False) as async_session:
+            yield async_session
+
+    # a versão do dataset (chave do cache de respostas) vem do banco de testes
+    response_cache.version_provider = lambda: BookDataBase(session).get_dataset_version()
+    response_cache.clear()
+    # as tabelas são recriadas a cada teste: ids e usuários em cache não valem mais
+    principal_cache.clear()
+    # o prober de saúde verifica o banco de testes e um serviço local no lugar da internet
+    health_prober.engine = engine
+    health_prober.transport = httpx.MockTransport(lambda request: httpx.Response(200))
+    # o startup da aplicação não deve abrir o banco de DATABASE_URL
+    app.state.write_engine = engine
+
     with TestClient(app) as client:
         app.dependency_overrides[get_session] = get_session_override
+        app.dependency_overrides[get_write_session] = get_session_override
+        app.dependency_overrides[get_stream_session] = get_session_override
+        app.dependency_overrides[get_async_session] = get_async_session_override
+        app.dependency_overrides[get_async_write_session] = get_async_session_override
+        app.dependency_overrides[get_model_registry] = lambda: model_registry
         yield client
 
     app.dependency_overrides.clear()
+    health_prober.engine, health_prober.transport = read_engine, None
+    app.state.write_engine = write_engine
+    response_cache.version_provider = read_dataset_version
+    response_cache.clear()
 
 
 # Apenas uma vez por execução de testes
 @pytest.fixture(scope='session')
-def engine():
-    """Cria um engine SQLite em memória para toda a sessão de testes."""
-    return create_engine(
-        'sqlite:///:memory:',
-        connect_args={'check_same_thread': False},
-        poolclass=StaticPool,
-    )
+def database_url(tmp_path_factory):
+    """
+    Banco SQLite em arquivo temporário: precisa ser compartilhado entre o engine
+    síncrono (fixtures) e o assíncrono (rotas com AsyncSession).
+    """
+    return f'sqlite:///{tmp_path_factory.mktemp("db") / "books_test.db"}'
+
+
+@pytest.fixture(scope='session')
+def engine(database_url):
+    """Cria um engine SQLite síncrono para toda a sessão de testes."""
+    engine = create_engine(database_url, connect_args={'check_same_thread': False})
+    # WAL: leituras abertas pelas fixtures não bloqueiam as escritas das rotas
+    with engine.connect() as connection:
+        connection.exec_driver_sql('PRAGMA journal_mode=WAL')
+    # mesma instrumentação (métricas de consultas) dos engines da aplicação
+    return instrument_engine(engine)
+
+
+@pytest.fixture(scope='session')
+def async_engine(database_url):
+    """
+    Engine assíncrono (aiosqlite) sobre o mesmo arquivo.
+    NullPool: cada TestClient roda num event loop próprio e as conexões
+    aiosqlite não podem ser reaproveitadas entre loops.
+    """
+    engine = create_async_engine(get_async_database_url(database_url), poolclass=NullPool)
+    instrument_engine(engine.sync_engine)
+    return engine
 
 
 # Executa para cada função de teste
@@ -52,20 +122,12 @@ def tables(engine):
 @pytest.fixture
 def session(engine, tables):
     """
-    Cria uma nova sessão para um teste, garantindo o isolamento.
-    Usa a fixture 'tables' para garantir que as tabelas existam.
+    Cria uma nova sessão para um teste.
+    O isolamento vem da fixture 'tables', que recria as tabelas a cada teste;
+    os commits precisam ser reais para que as rotas assíncronas vejam os dados.
     """
-    # Cria uma conexão para a duração do teste
-    with engine.connect() as connection:
-        transaction = connection.begin()
-        Session = sessionmaker(bind=connection)
-        session = Session()
-
-        try:
-            yield session
-        finally:
-            session.close()
-            transaction.rollback()
+    with Session(engine) as session:
+        yield session
 
 
 @pytest.fixture
@@ -98,6 +160,19 @@ def fake_users_in_db(session):
     return _create_users
 
 
+@pytest.fixture
+def auth_headers(client, fake_users_in_db):
+    username = 'newuser'
+    plain_password = 'secret'
+    hashed_password = get_hash_from_password(plain_password)
+    fake_users_in_db(count=1, exclude={}, username=username, password=hashed_password)
+    response = client.post(
+        '/api/v1/auth/login',
+        data={'username': username, 'password': plain_password},
+    )
+    return {'Authorization': f'Bearer {response.json()["access_token"]}'}
+
+
 @pytest.fixture
 def fake_users():
     def _create_users(count: int, exclude_id: bool = True, **kwargs):
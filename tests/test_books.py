@@ -133,3 +133,79 @@ def test_get_categorie_filter_by_name(client, fake_books_in_db, session):
     # Assert
     assert response.status_code == HTTPStatus.OK
     assert 2 == response.json()['total']  # noqa
+
+
+def test_get_books_full_text_search_orders_by_relevance(client, fake_books_in_db):
+    # Arrange
+    titles = ['Python Cookbook', 'Learning Python Python Python', 'Cooking at Home']
+    fake_books_in_db(len(titles), title=Iterator(titles))
+    # Act
+    response = client.get('/api/v1/books/?title=pyth')
+    # Assert
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['total'] == 2  # noqa
+    assert [book['title'] for book in response.json()['books']] == [
+        'Learning Python Python Python',
+        'Python Cookbook',
+    ]
+
+
+def test_get_books_full_text_search_by_title_and_category(client, fake_books_in_db):
+    # Arrange
+    titles = ['Dark Night', 'Dark Forest', 'Bright Day']
+    categories = ['Horror', 'Fantasy', 'Horror']
+    fake_books_in_db(3, title=Iterator(titles), category=Iterator(categories))
+    # Act
+    response = client.get('/api/v1/books/?title=dark&category=horror')
+    # Assert
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['total'] == 1
+    assert response.json()['books'][0]['title'] == 'Dark Night'
+
+
+def test_get_books_substring_search_mode(client, fake_books_in_db):
+    # Arrange
+    titles = ['Notebook', 'Bookshelf', 'Cookbook']
+    fake_books_in_db(3, title=Iterator(titles))
+    # Act
+    response_fts = client.get('/api/v1/books/?title=book')
+    response_substring = client.get('/api/v1/books/?title=book&search_mode=substring')
+    # Assert
+    assert response_fts.json()['total'] == 1
+    assert response_fts.json()['books'][0]['title'] == 'Bookshelf'
+    assert response_substring.json()['total'] == 3  # noqa
+
+
+def test_get_books_cursor_pagination(client, fake_books_in_db):
+    # Arrange
+    count_books = 7
+    limit = 3
+    fake_books_in_db(count_books)
+
+    # Act
+    first_page = client.get(f'/api/v1/books/?limit={limit}').json()
+    second_page = client.get(
+        f'/api/v1/books/?limit={limit}&cursor={first_page["next_cursor"]}'
+    ).json()
+    last_page = client.get(
+        f'/api/v1/books/?limit={limit}&cursor={second_page["next_cursor"]}'
+    ).json()
+
+    # Assert
+    assert [book['id'] for book in first_page['books']] == [1, 2, 3]
+    assert [book['id'] for book in second_page['books']] == [4, 5, 6]
+    assert [book['id'] for book in last_page['books']] == [7]
+    assert last_page['next_cursor'] is None
+
+
+def test_get_books_cursor_with_offset_must_be_bad_request(client, fake_books_in_db):
+    # Arrange
+    fake_books_in_db(4)
+    cursor = client.get('/api/v1/books/?limit=2').json()['next_cursor']
+
+    # Act
+    response = client.get(f'/api/v1/books/?limit=2&offset=1&cursor={cursor}')
+
+    # Assert
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json() == {'detail': "'cursor' and 'offset' cannot be used together"}
@@ -0,0 +1,86 @@
+from http import HTTPStatus
+
+import pytest
+
+from api_books.database.books import BookDataBase
+from api_books.middlewares.cache import CachedResponse, ResponseCache, response_cache
+
+
+@pytest.fixture
+def ingested(session, fake_books_in_db):
+    """Simula uma ingestão: livros carregados + snapshot com a versão do dataset."""
+
+    def _ingest(count: int, version: str):
+        books = fake_books_in_db(count)
+        BookDataBase(session).save_stats_snapshot(version)
+        session.commit()
+        return books
+
+    return _ingest
+
+
+def test_response_not_cached_without_dataset_version(client, fake_books_in_db):
+    # Arrange
+    fake_books_in_db(2)
+
+    # Act
+    response = client.get('/api/v1/books/')
+
+    # Assert
+    assert response.status_code == HTTPStatus.OK
+    assert 'etag' not in response.headers
+
+
+def test_response_cached_until_new_dataset_version(client, ingested, fake_books_in_db):
+    # Arrange
+    ingested(2, version='v1')
+
+    # Act
+    first = client.get('/api/v1/books/?limit=10&offset=0')
+    fake_books_in_db(3)  # escrita fora de uma ingestão não muda a versão
+    second = client.get('/api/v1/books/?offset=0&limit=10')
+    response_cache.invalidate('v2')
+    third = client.get('/api/v1/books/?offset=0&limit=10')
+
+    # Assert
+    assert first.headers['x-cache'] == 'MISS'
+    assert first.headers['cache-control'].startswith('public, max-age=')
+    assert second.headers['x-cache'] == 'HIT'
+    assert second.headers['etag'] == first.headers['etag']
+    assert second.json() == first.json()
+    assert third.headers['x-cache'] == 'MISS'
+    assert len(third.json()['books']) == 5  # noqa
+
+
+def test_if_none_match_returns_not_modified(client, ingested):
+    # Arrange
+    ingested(2, version='v1')
+    etag = client.get('/api/v1/categories/').headers['etag']
+
+    # Act
+    response = client.get('/api/v1/categories/', headers={'If-None-Match': etag})
+
+    # Assert
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert response.headers['etag'] == etag
+    assert response.content == b''
+
+
+def test_response_cache_lru_eviction_by_size():
+    # Arrange
+    cache = ResponseCache(max_bytes=10, max_entries=10, version_ttl=60, version_provider=None)
+    cache.invalidate('v1')
+
+    def entry(body):
+        return CachedResponse(status=200, headers=[], body=body, etag='"x"')
+
+    # Act
+    cache.put(('a', '', 'v1'), entry(b'1234'))
+    cache.put(('b', '', 'v1'), entry(b'1234'))
+    cache.get(('a', '', 'v1'))  # 'a' passa a ser o mais recente
+    cache.put(('c', '', 'v1'), entry(b'1234'))
+
+    # Assert
+    assert cache.get(('b', '', 'v1')) is None
+    assert cache.get(('a', '', 'v1')) is not None
+    assert cache.size == 8  # noqa
@@ -0,0 +1,51 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+
+from api_books.database.connection import (
+    apply_sqlite_profile,
+    get_async_database_url,
+    get_read_only_database_url,
+)
+from api_books.settings import Settings
+
+
+def test_read_only_url_for_sqlite_file():
+    # Act
+    url = get_read_only_database_url('sqlite:///data/books.db')
+
+    # Assert
+    assert url == 'sqlite:///file:data/books.db?mode=ro&uri=true'
+    assert get_async_database_url(url).startswith('sqlite+aiosqlite:///file:data/books.db')
+
+
+def test_read_only_url_keeps_in_memory_database():
+    # Act / Assert
+    assert get_read_only_database_url('sqlite:///:memory:') == 'sqlite:///:memory:'
+
+
+def test_sqlite_profile_pragmas_and_read_only_reader(tmp_path):
+    # Arrange
+    database_url = f'sqlite:///{tmp_path / "profile.db"}'
+    settings = Settings(SQLITE_CACHE_SIZE=-2000, SQLITE_MMAP_SIZE=1024 * 1024)
+    writer = apply_sqlite_profile(create_engine(database_url), settings, writer=True)
+    reader = apply_sqlite_profile(
+        create_engine(get_read_only_database_url(database_url)), settings, writer=False
+    )
+
+    # Act
+    with writer.begin() as connection:
+        journal_mode = connection.exec_driver_sql('PRAGMA journal_mode').scalar()
+        connection.exec_driver_sql('CREATE TABLE livros (id INTEGER PRIMARY KEY)')
+
+    with reader.connect() as connection:
+        cache_size = connection.exec_driver_sql('PRAGMA cache_size').scalar()
+        mmap_size = connection.exec_driver_sql('PRAGMA mmap_size').scalar()
+
+        # Assert
+        with pytest.raises(OperationalError, match='readonly'):
+            connection.exec_driver_sql('INSERT INTO livros (id) VALUES (1)')
+
+    assert journal_mode == 'wal'
+    assert cache_size == -2000  # noqa
+    assert mmap_size == 1024 * 1024
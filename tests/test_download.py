@@ -0,0 +1,74 @@
+import csv
+import io
+import json
+from http import HTTPStatus
+
+import pytest
+from factory import Iterator
+
+from api_books.services import export
+
+
+def test_download_books_csv(client, fake_books_in_db):
+    # Arrange
+    books = fake_books_in_db(3)
+
+    # Act
+    response = client.get('/api/v1/download/books')
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+
+    # Assert
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'].startswith('text/csv')
+    assert response.headers['content-disposition'] == 'attachment; filename=books.csv'
+    assert [int(row['id']) for row in rows] == [book['id'] for book in books]
+    assert rows[0]['title'] == books[0]['title']
+
+
+def test_download_books_ndjson_with_category_filter(client, fake_books_in_db):
+    # Arrange
+    categories = ['Poetry', 'Travel', 'Poetry']
+    fake_books_in_db(3, category=Iterator(categories))
+
+    # Act
+    response = client.get('/api/v1/download/books?format=ndjson&category=poetry')
+    lines = [json.loads(line) for line in response.text.splitlines()]
+
+    # Assert
+    assert response.status_code == HTTPStatus.OK
+    assert [line['id'] for line in lines] == [1, 3]
+    assert {line['category'] for line in lines} == {'Poetry'}
+
+
+def test_download_books_parquet(client, fake_books_in_db):
+    # Arrange
+    pq = pytest.importorskip('pyarrow.parquet')
+    books = fake_books_in_db(4)
+
+    # Act
+    response = client.get('/api/v1/download/books?format=parquet')
+    table = pq.read_table(io.BytesIO(response.content))
+
+    # Assert
+    assert response.status_code == HTTPStatus.OK
+    assert table.column_names == [
+        'id',
+        'title',
+        'price',
+        'availability',
+        'rating',
+        'category',
+        'image_url',
+    ]
+    assert table.column('price').to_pylist() == [book['price'] for book in books]
+
+
+def test_download_books_parquet_without_pyarrow_is_not_implemented(client, monkeypatch):
+    # Arrange
+    monkeypatch.setattr(export, 'pa', None)
+
+    # Act
+    response = client.get('/api/v1/download/books?format=parquet')
+
+    # Assert
+    assert response.status_code == HTTPStatus.NOT_IMPLEMENTED
@@ -1,6 +1,11 @@
+import asyncio
 from http import HTTPStatus
 
-from api_books.health_check import HeathAPI
+import httpx
+from sqlalchemy import create_engine
+
+from api_books.endpoints import health
+from api_books.health_check import HealthProber, HeathAPI, get_health_prober
 
 
 def test_get_health_status_is_running(client):
@@ -41,3 +46,95 @@ def test_get_health_must_throw_exception_503(client, app_books, mock_service_hea
     assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
     assert response.json() == response_body_expected
     app_books.dependency_overrides.clear()
+
+
+def test_liveness_does_not_touch_dependencies(client, app_books):
+    # Arrange
+    def unavailable():
+        raise AssertionError('liveness must not use the prober')
+
+    app_books.dependency_overrides[get_health_prober] = unavailable
+
+    # Act
+    response = client.get('/api/v1/health/live')
+
+    # Assert
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {'message': 'alive'}
+
+
+def test_readiness_reads_cached_status(client):
+    # Act
+    response = client.get('/api/v1/health/ready')
+
+    # Assert
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['database'] == {'status': 'up', 'error': None}
+
+
+def test_readiness_is_unavailable_when_database_is_down(client, app_books, tmp_path):
+    # Arrange
+    broken_engine = create_engine(f'sqlite:///file:{tmp_path / "missing.db"}?mode=ro&uri=true')
+    prober = HealthProber(interval=60, connectivity_url=None, timeout=1, engine=broken_engine)
+    asyncio.run(prober.refresh())
+    app_books.dependency_overrides[get_health_prober] = lambda: prober
+
+    # Act
+    response = client.get('/api/v1/health/ready')
+
+    # Assert
+    assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert response.json()['database']['status'] == 'down'
+
+
+def test_readiness_can_require_connectivity(client, app_books, engine, monkeypatch):
+    # Arrange
+    transport = httpx.MockTransport(lambda request: httpx.Response(500))
+    prober = HealthProber(
+        interval=60,
+        connectivity_url='http://stand-in',
+        timeout=1,
+        engine=engine,
+        transport=transport,
+    )
+
+    async def probe():
+        await prober.start()
+        await prober.stop()
+
+    asyncio.run(probe())
+    app_books.dependency_overrides[get_health_prober] = lambda: prober
+    monkeypatch.setattr(health, 'READY_REQUIRES_CONNECTIVITY', True)
+
+    # Act
+    response = client.get('/api/v1/health/ready')
+
+    # Assert
+    assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert response.json()['internet_connectivity']['status'] == 'down'
+
+
+def test_prober_reports_connectivity_errors(engine):
+    # Arrange
+    transport = httpx.MockTransport(lambda request: httpx.Response(500))
+    prober = HealthProber(
+        interval=60,
+        connectivity_url='http://stand-in',
+        timeout=1,
+        engine=engine,
+        transport=transport,
+    )
+
+    # Act
+    async def probe():
+        await prober.start()
+        await prober.stop()
+
+    asyncio.run(probe())
+
+    # Assert
+    assert prober.statuses['database'].status == 'up'
+    assert prober.statuses['internet_connectivity'].status == 'down'
+    assert prober.statuses['internet_connectivity'].error == 'Status de erro recebido: 500'
+    assert prober.is_ready(require_connectivity=False) is True
+    assert prober.is_ready(require_connectivity=True) is False
@@ -0,0 +1,109 @@
+import csv
+
+import pytest
+from sqlalchemy import select
+
+from api_books.database.books import BookDataBase
+from api_books.models import Book
+from api_books.services.update_db_from_csv import ingest, iter_csv_batches
+
+
+def _record(id, title, price=10.0, category='Poetry'):
+    return {
+        'id': id,
+        'title': title,
+        'price': price,
+        'availability': 1,
+        'rating': 3.0,
+        'category': category,
+        'image_url': f'https://example.com/{title}.jpg',
+    }
+
+
+def _books(session):
+    return {
+        book.title: (book.id, book.price, book.category)
+        for book in session.scalars(select(Book)).all()
+    }
+
+
+def test_ingest_first_load_keeps_csv_order_and_creates_version(session):
+    # Arrange
+    records = [_record(1, 'a'), _record(2, 'b'), _record(3, 'c')]
+
+    # Act
+    result = ingest(session, [records])
+
+    # Assert
+    assert (result.inserted, result.updated, result.deleted) == (3, 0, 0)
+    assert _books(session) == {
+        'a': (1, 10.0, 'Poetry'),
+        'b': (2, 10.0, 'Poetry'),
+        'c': (3, 10.0, 'Poetry'),
+    }
+    assert BookDataBase(session).get_dataset_version() == result.dataset_version
+
+
+def test_ingest_applies_only_the_delta(session):
+    # Arrange
+    first = ingest(session, [[_record(1, 'a'), _record(2, 'b'), _record(3, 'c')]])
+    records = [_record(1, 'a'), _record(2, 'b', price=12.5), _record(3, 'd', category='Art')]
+
+    # Act
+    result = ingest(session, [records[:2], records[2:]])
+
+    # Assert
+    assert (result.inserted, result.updated, result.deleted, result.unchanged) == (1, 1, 1, 1)
+    assert _books(session) == {
+        'a': (1, 10.0, 'Poetry'),
+        'b': (2, 12.5, 'Poetry'),
+        'd': (4, 10.0, 'Art'),
+    }
+    assert result.dataset_version != first.dataset_version
+    assert BookDataBase(session).get_stats_snapshot().total_books == 3  # noqa: PLR2004
+
+
+def test_ingest_without_changes_keeps_dataset_version(session):
+    # Arrange
+    records = [_record(1, 'a'), _record(2, 'b')]
+    first = ingest(session, [records])
+
+    # Act
+    result = ingest(session, [records])
+
+    # Assert
+    assert result.changed is False
+    assert result.unchanged == 2  # noqa: PLR2004
+    assert result.dataset_version == first.dataset_version
+
+
+@pytest.mark.parametrize('engine', ['pyarrow', 'pandas'])
+def test_iter_csv_batches_reads_in_fixed_size_batches(tmp_path, engine):
+    # Arrange
+    if engine == 'pyarrow':
+        pytest.importorskip('pyarrow')
+    csv_path = tmp_path / 'books.csv'
+    records = [_record(id, f'book {id}') for id in range(1, 6)]
+    with open(csv_path, 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=list(records[0]))
+        writer.writeheader()
+        writer.writerows(records)
+
+    # Act
+    batches = list(iter_csv_batches(str(csv_path), batch_size=2, engine=engine))
+
+    # Assert
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    assert [row for batch in batches for row in batch] == records
+
+
+def test_ingest_reports_progress_per_batch(session):
+    # Arrange
+    records = [_record(id, f'book {id}') for id in range(1, 6)]
+    progress = []
+
+    # Act
+    ingest(session, [records[:2], records[2:4], records[4:]], progress=progress.append)
+
+    # Assert
+    assert progress == [2, 4, 5]
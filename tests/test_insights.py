@@ -2,6 +2,8 @@ from http import HTTPStatus
 
 from factory import Iterator
 
+from api_books.database.books import BookDataBase
+
 
 def test_get_books_top_rated(client, fake_books_in_db):
     # Arrange
@@ -76,3 +78,64 @@ def test_get_stats_categories_books(client, fake_books_in_db):
     # Assert
     assert response.status_code == HTTPStatus.OK
     assert response.json() == json_expect_response
+
+
+def test_get_books_top_rated_cursor_pagination_walks_all_books(client, fake_books_in_db):
+    # Arrange
+    rates = [3.0, 5.0, 4.0, 5.0, 3.0, 4.0, 5.0]
+    fake_books_in_db(len(rates), rating=Iterator(rates))
+    expected = [(5.0, 7), (5.0, 4), (5.0, 2), (4.0, 6), (4.0, 3), (3.0, 5), (3.0, 1)]
+
+    # Act
+    walked = []
+    response = client.get('/api/v1/stats/top-rated/?limit=3')
+    walked.extend(response.json()['books'])
+    while response.json()['next_cursor']:
+        cursor = response.json()['next_cursor']
+        response = client.get(f'/api/v1/stats/top-rated/?limit=3&cursor={cursor}')
+        walked.extend(response.json()['books'])
+
+    # Assert
+    assert response.status_code == HTTPStatus.OK
+    assert [(book['rating'], book['id']) for book in walked] == expected
+
+
+def test_get_books_top_rated_invalid_cursor_must_be_bad_request(client):
+    # Act
+    response = client.get('/api/v1/stats/top-rated/?limit=3&cursor=invalido')
+
+    # Assert
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json() == {'detail': 'Invalid cursor'}
+
+
+def test_get_stats_served_from_snapshot(client, fake_books_in_db, session):
+    # Arrange
+    categories = ['Fiction', 'Children', 'Fiction']
+    prices = [10.0, 20.0, 30.0]
+    rates = [5.0, 4.0, 5.0]
+    fake_books_in_db(
+        3, category=Iterator(categories), price=Iterator(prices), rating=Iterator(rates)
+    )
+    BookDataBase(session).save_stats_snapshot('v1')
+    session.commit()
+    fake_books_in_db(2, category='Science')  # inseridos depois da ingestão
+
+    # Act
+    overview = client.get('api/v1/stats/overview/')
+    categories_stats = client.get('api/v1/stats/categories')
+
+    # Assert
+    assert overview.headers['X-Dataset-Version'] == 'v1'
+    assert overview.json() == {
+        'total_books': 3,
+        'average_price': 20.0,
+        'count_categories': 2,
+        'rating_distribuition': {'4.0': 1, '5.0': 2},
+    }
+    assert categories_stats.headers['X-Dataset-Version'] == 'v1'
+    assert categories_stats.json() == {
+        'total_categories': 2,
+        'categories_count_distribution': {'Children': 1, 'Fiction': 2},
+        'categories_avg_price_distribution': {'Children': 20.0, 'Fiction': 20.0},
+    }
@@ -0,0 +1,97 @@
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from api_books.logging_config import app_logger
+from api_books.middlewares.logging import LoggingMiddleware, skip_request_log
+
+
+@pytest.fixture
+def request_logs():
+    records = []
+    handler_id = app_logger.add(
+        lambda message: records.append(message.record['extra']['request']),
+        filter=lambda record: 'request' in record['extra'],
+    )
+    yield records
+    app_logger.remove(handler_id)
+
+
+def _app(**options):
+    app = FastAPI()
+
+    @app.get('/ok')
+    def ok():
+        return {'ok': True}
+
+    @app.get('/fail')
+    def fail():
+        raise HTTPException(status_code=404)
+
+    @app.get('/quiet')
+    @skip_request_log
+    def quiet():
+        return {'ok': True}
+
+    @app.get('/stream')
+    def stream():
+        return StreamingResponse(iter([b'a', b'b', b'c']))
+
+    app.add_middleware(LoggingMiddleware, **options)
+    return TestClient(app)
+
+
+def test_logging_middleware_records_structured_request(request_logs):
+    # Arrange
+    client = _app(sample_rate=1.0, excluded_paths=[])
+
+    # Act
+    response = client.get('/ok?page=2')
+
+    # Assert
+    assert response.status_code == 200  # noqa: PLR2004
+    assert len(request_logs) == 1
+    record = request_logs[0]
+    assert (record['method'], record['path'], record['query']) == ('GET', '/ok', 'page=2')
+    assert record['status_code'] == 200  # noqa: PLR2004
+    assert record['process_time_ms'] >= 0
+
+
+def test_logging_middleware_samples_successes_but_keeps_errors(request_logs):
+    # Arrange
+    client = _app(sample_rate=0.0, excluded_paths=[])
+
+    # Act
+    for _ in range(5):
+        client.get('/ok')
+    client.get('/fail')
+
+    # Assert
+    assert [record['status_code'] for record in request_logs] == [404]
+    assert request_logs[0]['sample_rate'] == 1.0
+
+
+def test_logging_middleware_route_and_path_opt_out(request_logs):
+    # Arrange
+    client = _app(sample_rate=1.0, excluded_paths=['/ok'])
+
+    # Act
+    client.get('/ok')
+    client.get('/quiet')
+    client.get('/stream')
+
+    # Assert
+    assert [record['path'] for record in request_logs] == ['/stream']
+
+
+def test_logging_middleware_does_not_buffer_streaming_response(request_logs):
+    # Arrange
+    client = _app(sample_rate=1.0, excluded_paths=[])
+
+    # Act
+    response = client.get('/stream')
+
+    # Assert
+    assert response.content == b'abc'
+    assert request_logs[0]['status_code'] == 200  # noqa: PLR2004
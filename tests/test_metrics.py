@@ -0,0 +1,100 @@
+import re
+from http import HTTPStatus
+
+import pytest
+from sqlalchemy import create_engine, event
+
+from api_books import metrics
+from api_books.metrics import MetricsRegistry
+
+
+def _sample(text: str, name: str, **labels) -> float:
+    """Valor de uma série no texto do /metrics (0 se ainda não existir)."""
+    label_text = ','.join(f'{key}="{value}"' for key, value in labels.items())
+    series = f'{name}{{{label_text}}}' if labels else name
+    match = re.search(rf'^{re.escape(series)} (\S+)$', text, re.MULTILINE)
+    return float(match.group(1)) if match else 0.0
+
+
+def test_metrics_counts_requests_per_route_template(client, fake_books_in_db):
+    # Arrange
+    books = fake_books_in_db(2)
+    before = client.get('/metrics').text
+    route = {'method': 'GET', 'route': '/api/v1/books/{book_id}'}
+
+    # Act
+    for book in books:
+        client.get(f'/api/v1/books/{book["id"]}')
+    response = client.get('/metrics')
+
+    # Assert
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'].startswith('text/plain; version=0.0.4')
+    text = response.text
+    served = _sample(text, 'http_requests_total', **route, status='200') - _sample(
+        before, 'http_requests_total', **route, status='200'
+    )
+    assert served == 2  # noqa: PLR2004
+    assert _sample(text, 'http_request_duration_seconds_count', **route) >= 2  # noqa: PLR2004
+    assert '# TYPE http_requests_in_flight gauge' in text
+
+
+def test_metrics_attributes_sql_queries_to_the_route(client, fake_books_in_db):
+    # Arrange
+    fake_books_in_db(3)
+    before = client.get('/metrics').text
+
+    # Act
+    client.get('/api/v1/books/')
+    text = client.get('/metrics').text
+
+    # Assert
+    queries = _sample(text, 'db_queries_total', route='/api/v1/books/') - _sample(
+        before, 'db_queries_total', route='/api/v1/books/'
+    )
+    assert queries >= 1
+    assert _sample(text, 'db_time_seconds_total', route='/api/v1/books/') > 0
+
+
+def test_metrics_registry_renders_prometheus_histogram():
+    # Arrange
+    registry = MetricsRegistry()
+    histogram = registry.histogram('latency_seconds', 'Latência.', ('route',), buckets=(0.1, 1))
+    counter = registry.counter('jobs_total', 'Jobs.')
+
+    # Act
+    histogram.labels('/a').observe(0.05)
+    histogram.labels('/a').observe(0.5)
+    histogram.labels('/a').observe(5)
+    counter.inc(3)
+    text = registry.render()
+
+    # Assert
+    assert 'latency_seconds_bucket{route="/a",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{route="/a",le="1.0"} 2' in text
+    assert 'latency_seconds_bucket{route="/a",le="+Inf"} 3' in text
+    assert 'latency_seconds_count{route="/a"} 3' in text
+    assert 'jobs_total 3.0' in text
+
+
+@pytest.mark.parametrize(
+    ('profiling', 'slow_query_seconds', 'instrumented'),
+    [(False, 0, False), (True, 0, True), (False, 0.25, True)],
+)
+def test_metrics_disabled_skips_engine_events_unless_sql_logs_need_them(
+    monkeypatch, profiling, slow_query_seconds, instrumented
+):
+    # Arrange
+    monkeypatch.setattr(metrics, 'ENABLED', False)
+    monkeypatch.setattr(metrics.settings, 'SQL_PROFILING_ENABLED', profiling)
+    monkeypatch.setattr(metrics, 'SLOW_QUERY_SECONDS', slow_query_seconds)
+    engine = create_engine('sqlite://')
+
+    # Act
+    metrics.instrument_engine(engine)
+
+    # Assert
+    assert (
+        event.contains(engine, 'after_cursor_execute', metrics._after_cursor_execute)
+        == instrumented
+    )
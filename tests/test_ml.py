@@ -0,0 +1,264 @@
+import io
+import json
+from collections import Counter
+from http import HTTPStatus
+
+import numpy as np
+import pytest
+
+from api_books.ml_model import ModelRegistry, train_price_model
+from api_books.models import Book
+from api_books.schemas import PredictionInput
+from api_books.services import training_data
+from api_books.services.training_data import split_mask
+
+
+def test_training_data_split_is_deterministic(client, fake_books_in_db):
+    # Arrange
+    fake_books_in_db(count=50)
+
+    # Act
+    first = client.get('/api/v1/ml/training-data/', params={'seed': 7})
+    second = client.get('/api/v1/ml/training-data/', params={'seed': 7})
+
+    # Assert
+    assert first.status_code == HTTPStatus.OK
+    assert first.json() == second.json()
+    assert len(first.json()['training']) + len(first.json()['test']) == 50  # noqa: PLR2004
+    assert set(first.json()['training'][0]) == {'x1_availability', 'x2_rating', 'y_label_price'}
+
+
+def test_training_data_stratified_keeps_proportion_per_category(client, fake_books_in_db):
+    # Arrange
+    pa = pytest.importorskip('pyarrow')
+    fake_books_in_db(count=40)  # 4 categorias x 10 livros
+
+    # Act
+    response = client.get(
+        '/api/v1/ml/training-data/',
+        params={'format': 'arrow', 'stratify': True, 'test_size': 0.2},
+    )
+    table = pa.ipc.open_stream(response.content).read_all().to_pydict()
+
+    # Assert
+    assert response.headers['content-type'] == 'application/vnd.apache.arrow.stream'
+    test_categories = Counter(
+        category for category, split in zip(table['category'], table['split']) if split == 'test'
+    )
+    assert set(test_categories.values()) == {2}
+    assert len(test_categories) == 4  # noqa: PLR2004
+
+
+def test_training_data_npz(client, fake_books_in_db):
+    # Arrange
+    fake_books_in_db(count=20)
+
+    # Act
+    response = client.get('/api/v1/ml/training-data/', params={'format': 'npz'})
+    arrays = np.load(io.BytesIO(response.content))
+
+    # Assert
+    assert response.status_code == HTTPStatus.OK
+    assert arrays['X_train'].shape[1] == 2  # noqa: PLR2004
+    assert len(arrays['y_train']) + len(arrays['y_test']) == 20  # noqa: PLR2004
+    assert set(arrays['id_train']).isdisjoint(arrays['id_test'])
+
+
+def test_training_data_arrow_without_pyarrow_is_not_implemented(client, monkeypatch):
+    # Arrange
+    monkeypatch.setattr(training_data, 'pa', None)
+
+    # Act
+    response = client.get('/api/v1/ml/training-data/', params={'format': 'arrow'})
+
+    # Assert
+    assert response.status_code == HTTPStatus.NOT_IMPLEMENTED
+
+
+def test_training_data_not_found(client):
+    # Act
+    response = client.get('/api/v1/ml/training-data/')
+
+    # Assert
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_split_mask_does_not_move_existing_ids_when_data_grows():
+    # Arrange
+    ids = np.arange(1, 1001)
+
+    # Act
+    small = split_mask(ids[:500], test_size=0.2, seed=1)
+    large = split_mask(ids, test_size=0.2, seed=1)
+
+    # Assert
+    assert np.array_equal(small, large[:500])
+    assert 0.15 < large.mean() < 0.25  # noqa: PLR2004
+
+
+def test_predictions_batch_columnar_matches_single_predictions(client):
+    # Arrange
+    rows = [(10, 4.0), (0, 1.0), (100, 5.0)]
+    body = {'x1_availability': [a for a, _ in rows], 'x2_rating': [r for _, r in rows]}
+
+    # Act
+    response = client.post('/api/v1/ml/predictions/batch', json=body)
+    singles = [
+        client.post('/api/v1/ml/predictions/', json={'x1_availability': a, 'x2_rating': r}).json()
+        for a, r in rows
+    ]
+
+    # Assert
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['model_version'] == 'fake'
+    assert response.json()['predicted_price'] == [row['predicted_price'] for row in singles]
+    assert response.json()['confidence'] == [row['confidence'] for row in singles]
+
+
+def test_predictions_batch_ndjson_streams_in_order(client):
+    # Arrange
+    lines = [json.dumps({'x1_availability': a, 'x2_rating': 3.0}) for a in range(20)]
+
+    # Act
+    response = client.post(
+        '/api/v1/ml/predictions/batch',
+        content='\n'.join(lines) + '\n',
+        headers={'Content-Type': 'application/x-ndjson'},
+    )
+    results = [json.loads(line) for line in response.text.splitlines()]
+
+    # Assert
+    assert response.headers['content-type'] == 'application/x-ndjson'
+    assert [row['predicted_price'] for row in results] == [55.0 + 2 * a for a in range(20)]
+
+
+def test_predictions_batch_rejects_invalid_rows(client):
+    # Act
+    response = client.post(
+        '/api/v1/ml/predictions/batch',
+        json={'x1_availability': [1, 2, 3], 'x2_rating': [3.0, 9.0, 2.0]},
+    )
+
+    # Assert
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+    assert 'rows [1]' in response.json()['detail']
+
+
+@pytest.mark.parametrize(
+    'body',
+    [
+        {'x1_availability': 5, 'x2_rating': 3},
+        {'x1_availability': None, 'x2_rating': None},
+    ],
+)
+def test_predictions_batch_rejects_non_array_columns(client, body):
+    # Act
+    response = client.post('/api/v1/ml/predictions/batch', json=body)
+
+    # Assert
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+    assert 'arrays' in response.json()['detail']
+
+
+def test_predictions_batch_rejects_too_many_rows(client, monkeypatch):
+    # Arrange
+    monkeypatch.setenv('ML_BATCH_MAX_ROWS', '2')
+
+    # Act
+    response = client.post(
+        '/api/v1/ml/predictions/batch',
+        json={'x1_availability': [1, 2, 3], 'x2_rating': [3.0, 3.0, 3.0]},
+    )
+
+    # Assert
+    assert response.status_code == HTTPStatus.REQUEST_ENTITY_TOO_LARGE
+
+
+def _linear_columns(count=60):
+    # preço = 5 + 2 * availability + 3 * rating (+ 10 na categoria Art)
+    ids = list(range(1, count + 1))
+    columns = {
+        'id': ids,
+        'availability': [id % 20 for id in ids],
+        'rating': [1.0 + id % 5 for id in ids],
+        'category': [('Art', 'Poetry', 'Travel')[id % 3] for id in ids],
+    }
+    columns['price'] = [
+        5 + 2 * availability + 3 * rating + (10 if category == 'Art' else 0)
+        for availability, rating, category in zip(
+            columns['availability'], columns['rating'], columns['category']
+        )
+    ]
+    return columns
+
+
+def test_price_model_recovers_linear_relation():
+    # Arrange
+    columns = _linear_columns()
+
+    # Act
+    model = train_price_model(columns, test_size=0.2, seed=3)
+    prediction = model.predict(PredictionInput(x1_availability=10, x2_rating=4.0, category='Art'))
+
+    # Assert
+    assert model.rmse < 1e-6  # noqa: PLR2004
+    assert prediction.predicted_price == 47.0  # noqa: PLR2004
+    assert prediction.model_version == model.version
+
+
+def test_model_registry_persists_and_promotes(model_registry, tmp_path):
+    # Arrange
+    model = model_registry.train(_linear_columns())
+    availability, rating = np.array([10.0, 0.0]), np.array([4.0, 1.0])
+
+    # Act
+    before = model_registry.predict_batch(availability, rating)
+    model_registry.promote(model.version)
+    after = model_registry.predict_batch(availability, rating, np.array(['Art', 'Unknown']))
+    reloaded = ModelRegistry(str(tmp_path / 'models')).active
+
+    # Assert
+    assert before[2] == 'fake'
+    assert after[2] == model.version
+    # categoria desconhecida recebe o efeito médio das categorias (10 / 3)
+    assert after[0].tolist() == [47.0, 11.33]
+    assert reloaded.version == model.version
+    assert np.allclose(reloaded.coef, model.coef)
+
+
+def test_train_model_endpoint_promotes_new_version(client, auth_headers, session):
+    # Arrange
+    for availability in range(1, 31):
+        session.add(
+            Book(
+                title=f'book {availability}',
+                price=5 + 2 * availability + 3 * 4.0,
+                availability=availability,
+                rating=4.0,
+                category='Poetry',
+                image_url=f'https://example.com/{availability}.jpg',
+            )
+        )
+    session.commit()
+
+    # Act
+    trained = client.post('/api/v1/ml/models/train', headers=auth_headers)
+    prediction = client.post(
+        '/api/v1/ml/predictions/', json={'x1_availability': 40, 'x2_rating': 4.0}
+    )
+    models = client.get('/api/v1/ml/models/')
+
+    # Assert
+    assert trained.status_code == HTTPStatus.CREATED
+    assert trained.json()['active'] is True
+    assert prediction.json()['model_version'] == trained.json()['version']
+    assert prediction.json()['predicted_price'] == 97.0  # noqa: PLR2004
+    assert models.json()['active_version'] == trained.json()['version']
+
+
+def test_promote_unknown_model_version(client, auth_headers):
+    # Act
+    response = client.post('/api/v1/ml/models/unknown/promote', headers=auth_headers)
+
+    # Assert
+    assert response.status_code == HTTPStatus.NOT_FOUND
@@ -0,0 +1,88 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from api_books import profiling
+from api_books.logging_config import app_logger
+from api_books.middlewares.profiling import SqlProfilingMiddleware
+from api_books.models import Book
+from api_books.profiling import RequestProfile, current_profile, statement_shape
+
+
+@pytest.fixture
+def sql_logs():
+    records = []
+    handler_id = app_logger.add(
+        lambda message: records.append(message.record['extra']['sql']),
+        filter=lambda record: 'sql' in record['extra'],
+    )
+    yield records
+    app_logger.remove(handler_id)
+
+
+def test_statement_shape_ignores_literals_and_in_list_sizes():
+    # Act
+    first = statement_shape("SELECT * FROM books\n WHERE id IN (?, ?, ?) AND title = 'a'")
+    second = statement_shape('SELECT * FROM books WHERE id IN (?) AND title = ?')
+
+    # Assert
+    assert first == second == 'SELECT * FROM books WHERE id IN (?) AND title = ?'
+
+
+def test_profile_flags_repeated_queries_and_full_scans(session, fake_books_in_db):
+    # Arrange
+    books = fake_books_in_db(3)
+    profile = RequestProfile()
+    token = current_profile.set(profile)
+
+    # Act
+    try:
+        for book in books:  # N+1: uma consulta por livro
+            session.scalar(select(Book).where(Book.id == book['id']))
+        session.scalars(select(Book).where(Book.price > 0)).all()
+    finally:
+        current_profile.reset(token)
+    report = profile.report(n_plus_one_threshold=3)
+
+    # Assert
+    assert report['query_count'] == 4  # noqa: PLR2004
+    [by_id] = report['n_plus_one']
+    assert by_id.endswith('WHERE books.id = ?')
+    assert report['n_plus_one'][by_id] == 3  # noqa: PLR2004
+    assert by_id not in report['full_scans']  # busca pela chave primária
+    assert list(report['full_scans'].values()) == [['books']]
+    assert all(query['plan'] for query in report['queries'])
+
+
+def test_profiling_middleware_adds_server_timing_and_logs_profile(
+    client, fake_books_in_db, sql_logs
+):
+    # Arrange
+    fake_books_in_db(2)
+    profiled = TestClient(SqlProfilingMiddleware(client.app, n_plus_one_threshold=2))
+
+    # Act
+    response = profiled.get('/api/v1/books/')
+
+    # Assert
+    timing = response.headers['server-timing']
+    assert timing.startswith('db;dur=')
+    assert 'serialize;dur=' in timing
+    assert 'total;dur=' in timing
+    profiles = [record for record in sql_logs if record['event'] == 'request_profile']
+    assert profiles[-1]['path'] == '/api/v1/books/'
+    assert profiles[-1]['query_count'] >= 2  # noqa: PLR2004
+
+
+def test_slow_queries_are_logged(session, sql_logs, monkeypatch):
+    # Arrange
+    monkeypatch.setattr(profiling, 'SLOW_QUERY_SECONDS', 1e-9)
+
+    # Act
+    session.scalars(select(Book)).all()
+
+    # Assert
+    slow = [record for record in sql_logs if record['event'] == 'slow_query']
+    assert slow
+    assert slow[-1]['statement'].startswith('SELECT books.id')
+    assert slow[-1]['duration_ms'] > 0
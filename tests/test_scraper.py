@@ -0,0 +1,158 @@
+import asyncio
+import csv
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from api_books.services.http_cache import CachedPage, HttpCache, content_hash
+from api_books.services.scraper import AsyncBookScraper, PipelineConfig
+from api_books.services.scraper_parsers import (
+    BookDetails,
+    ListingItem,
+    available_backends,
+    get_backend,
+)
+
+DETAIL_HTML = """
+<ul class="breadcrumb">
+  <li><a href="../index.html">Home</a></li>
+  <li><a href="../category/books_1/index.html">Books</a></li>
+  <li><a href="../category/books/{category}/index.html">{category}</a></li>
+</ul>
+<div class="carousel-inner"><img src="../../media/cache/{slug}.jpg"></div>
+<p class="instock availability">In stock ({stock} available)</p>
+"""
+
+BOOK_HTML = """
+<article class="product_pod">
+  <p class="star-rating {rating}"></p>
+  <h3><a href="{prefix}{slug}/index.html" title="{title}">{title}</a></h3>
+  <p class="price_color">£{price}</p>
+</article>
+"""
+
+# duas páginas de listagem: 2 livros na primeira e 1 na segunda
+CATALOG = [
+    [('book-a', 'Book A', '10.00', 'Three'), ('book-b', 'Book B', '20.50', 'Five')],
+    [('book-c', 'Book C', '5.25', 'One')],
+]
+
+
+def _listing_html(page: int, prefix: str) -> str:
+    books = ''.join(
+        BOOK_HTML.format(prefix=prefix, slug=slug, title=title, price=price, rating=rating)
+        for slug, title, price, rating in CATALOG[page - 1]
+    )
+    return f'<ul><li class="current">Page {page} of {len(CATALOG)}</li></ul>{books}'
+
+
+def _fake_site(requests_seen):
+    async def index(request):
+        return web.Response(text=_listing_html(1, 'catalogue/'), content_type='text/html')
+
+    async def listing(request):
+        page = int(request.match_info['page'])
+        return web.Response(text=_listing_html(page, ''), content_type='text/html')
+
+    async def detail(request):
+        slug = request.match_info['slug']
+        etag = f'"{slug}-v1"'
+        requests_seen.append(request.headers.get('If-None-Match'))
+        if request.headers.get('If-None-Match') == etag:
+            return web.Response(status=304)
+        html = DETAIL_HTML.format(category='Poetry', slug=slug, stock=len(slug))
+        return web.Response(text=html, content_type='text/html', headers={'ETag': etag})
+
+    app = web.Application()
+    app.router.add_get('/', index)
+    app.router.add_get('/catalogue/page-{page}.html', listing)
+    app.router.add_get('/catalogue/{slug}/index.html', detail)
+    return app
+
+
+async def _scrape(server, http_cache, csv_path):
+    scraper = AsyncBookScraper(
+        http_cache=http_cache,
+        pipeline=PipelineConfig(listing_workers=2, detail_workers=2, queue_size=1),
+    )
+    scraper.TARGET_URL = str(server.make_url('/'))
+    scraper.OUTPUT_CSV_FILE = str(csv_path)
+    scraper.PARSE_PROCESSES = 1
+    await scraper.run()
+    return scraper
+
+
+async def _scrape_twice(requests_seen, http_cache, csv_path):
+    async with TestServer(_fake_site(requests_seen)) as server:
+        first = await _scrape(server, http_cache, csv_path)
+        second = await _scrape(server, http_cache, csv_path)
+    return first, second
+
+
+def test_http_cache_round_trip():
+    # Arrange
+    cache = HttpCache(':memory:')
+    page = CachedPage('http://x/a', '<p>a</p>', content_hash('<p>a</p>'), etag='"e"')
+
+    # Act
+    cache.put(page)
+    cache.set_parsed('http://x/a', {'category': 'Poetry'})
+    cached = cache.get('http://x/a')
+
+    # Assert
+    assert cached.html == '<p>a</p>'
+    assert cached.parsed == {'category': 'Poetry'}
+    assert cached.conditional_headers() == {'If-None-Match': '"e"'}
+    assert cache.get('http://x/b') is None
+
+
+def test_scraper_pipeline_writes_csv_and_reuses_unchanged_details(tmp_path):
+    # Arrange
+    requests_seen = []
+    http_cache = HttpCache(':memory:')
+    csv_path = tmp_path / 'books.csv'
+
+    # Act
+    first, second = asyncio.run(_scrape_twice(requests_seen, http_cache, csv_path))
+    with open(csv_path, encoding='utf-8') as csvfile:
+        rows = sorted(csv.DictReader(csvfile), key=lambda row: int(row['id']))
+
+    # Assert
+    assert [(row['id'], row['title'], row['price']) for row in rows] == [
+        ('1', 'Book A', '10.0'),
+        ('2', 'Book B', '20.5'),
+        ('3', 'Book C', '5.25'),
+    ]
+    assert rows[0]['category'] == 'Poetry'
+    assert rows[0]['availability'] == '6'  # noqa: PLR2004
+    assert rows[0]['image_url'].endswith('/media/cache/book-a.jpg')
+    assert first.reused_details == 0
+    assert second.reused_details == len(rows)
+    assert requests_seen.count(None) == len(rows)
+
+
+@pytest.mark.parametrize('backend', available_backends())
+def test_parser_backends_extract_the_same_fields(backend):
+    # Arrange
+    parser = get_backend(backend)
+    listing_html = _listing_html(1, 'catalogue/')
+    detail_html = DETAIL_HTML.format(category='Poetry', slug='book-a', stock=3)
+
+    # Act
+    total_pages = parser.total_pages(listing_html)
+    items = parser.listing(listing_html)
+    details = parser.detail(detail_html)
+
+    # Assert
+    assert total_pages == len(CATALOG)
+    assert items == [
+        ListingItem('Book A', 10.0, 3.0, 'catalogue/book-a/index.html'),
+        ListingItem('Book B', 20.5, 5.0, 'catalogue/book-b/index.html'),
+    ]
+    assert details == BookDetails(3, 'Poetry', '../../media/cache/book-a.jpg')
+
+
+def test_unknown_parser_backend_raises():
+    with pytest.raises(ValueError, match='Unknown parser backend'):
+        get_backend('regex')
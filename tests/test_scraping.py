@@ -1,25 +1,90 @@
+import threading
+import time
 from http import HTTPStatus
 
 import pytest
 
-from api_books.security.crypt import get_hash_from_password
+from api_books.schemas import JobStatus
+from api_books.services.jobs import JobManager, get_job_manager
 
 
-@pytest.mark.skipif(condition=True, reason='processamento pesado')
-def test_scraping_trigger_suceess(client, fake_users_in_db):
+@pytest.fixture
+def fake_jobs(app_books):
+    """JobManager com um runner falso que espera `release` antes de terminar."""
+    release = threading.Event()
+
+    def runner(job):
+        with job.stage_timer('scraping'):
+            release.wait(timeout=5)
+        job.counts['books_scraped'] = 3
+        job.dataset_version = 'v1'
+
+    jobs = JobManager(runner=runner)
+    app_books.dependency_overrides[get_job_manager] = lambda: jobs
+    yield jobs, release
+    release.set()
+
+
+def _wait_finished(jobs, job_id):
+    for _ in range(100):
+        if not jobs.get(job_id).active:
+            return
+        time.sleep(0.01)
+
+
+def test_scraping_trigger_returns_job_and_coalesces(client, auth_headers, fake_jobs):
     # Arrange
-    username = 'newuser'
-    plain_password = 'secret'
-    hashed_password = get_hash_from_password(plain_password)
-    fake_users_in_db(count=1, exclude={}, username=username, password=hashed_password)
+    jobs, release = fake_jobs
 
     # Act
-    response = client.post(
-        '/api/v1/auth/token',
-        data={'username': username, 'password': plain_password},
-    )
-    token = response.json()['access_token']
-    response = client.post('api/v1/scraping/trigger', headers={'Authorization': f'Bearer {token}'})
+    first = client.post('/api/v1/scraping/trigger', headers=auth_headers)
+    second = client.post('/api/v1/scraping/trigger', headers=auth_headers)
+    release.set()
+    _wait_finished(jobs, first.json()['job_id'])
+    job = client.get(first.headers['Location'], headers=auth_headers)
+
+    # Assert
+    assert first.status_code == HTTPStatus.ACCEPTED
+    assert first.json()['coalesced'] is False
+    assert second.json()['job_id'] == first.json()['job_id']
+    assert second.json()['coalesced'] is True
+    assert job.status_code == HTTPStatus.OK
+    assert job.json()['status'] == JobStatus.SUCCEEDED
+    assert job.json()['stage'] == 'done'
+    assert job.json()['counts'] == {'books_scraped': 3}
+    assert 'scraping' in job.json()['timings']
+    assert job.json()['dataset_version'] == 'v1'
+
+
+def test_scraping_job_failure_is_reported(client, auth_headers, app_books):
+    # Arrange
+    def runner(job):
+        raise RuntimeError('boom')
+
+    jobs = JobManager(runner=runner)
+    app_books.dependency_overrides[get_job_manager] = lambda: jobs
+
+    # Act
+    job_id = client.post('/api/v1/scraping/trigger', headers=auth_headers).json()['job_id']
+    _wait_finished(jobs, job_id)
+    response = client.get(f'/api/v1/scraping/jobs/{job_id}', headers=auth_headers)
+
+    # Assert
+    assert response.json()['status'] == JobStatus.FAILED
+    assert response.json()['error'] == 'boom'
+
+
+def test_scraping_job_not_found(client, auth_headers):
+    # Act
+    response = client.get('/api/v1/scraping/jobs/unknown', headers=auth_headers)
+
+    # Assert
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_scraping_trigger_requires_authentication(client):
+    # Act
+    response = client.post('/api/v1/scraping/trigger')
+
     # Assert
-    assert response.status_code == HTTPStatus.CREATED
-    assert response.json() == {'message': 'Data updated successfully'}
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
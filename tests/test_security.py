@@ -1,10 +1,27 @@
+import asyncio
+import threading
 from http import HTTPStatus
 
+import httpx
 import pytest
 from jwt import decode
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 
+from api_books.database.connection import get_async_database_url, get_async_write_session
+from api_books.endpoints import auth
+from api_books.main import app
+from api_books.models import User
 from api_books.security.auth import create_access_token
-from api_books.security.crypt import get_hash_from_password
+from api_books.security.crypt import (
+    HashingPoolBusyException,
+    PasswordHashingPool,
+    build_password_hash,
+    calibrate_argon2,
+    get_hash_from_password,
+    pwd_context,
+)
+from api_books.security.principals import Principal, PrincipalCache, principal_cache
 from api_books.settings import Settings
 
 settings = Settings()
@@ -100,3 +117,186 @@ def test_jwt_expired_token(client):
     # Assert
     assert response.status_code == HTTPStatus.UNAUTHORIZED
     assert response.json() == {'detail': 'Expired token'}
+
+
+def test_protected_route_uses_principal_cache(client, auth_headers, session):
+    # Arrange
+    client.get('/api/v1/users/', headers=auth_headers)  # carrega o cache
+    session.execute(delete(User))  # sem usuário no banco, só o cache autentica
+    session.commit()
+
+    # Act
+    cached = client.get('/api/v1/users/', headers=auth_headers)
+    principal_cache.invalidate('newuser')
+    invalidated = client.get('/api/v1/users/', headers=auth_headers)
+
+    # Assert
+    assert cached.status_code == HTTPStatus.OK
+    assert invalidated.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_invalidate_principals_requires_admin(client, auth_headers, fake_users_in_db):
+    # Arrange
+    fake_users_in_db(
+        count=1, username='admin', password=get_hash_from_password('secret'), is_admin=True
+    )
+    admin_token = client.post(
+        '/api/v1/auth/login', data={'username': 'admin', 'password': 'secret'}
+    ).json()['access_token']
+
+    # Act
+    forbidden = client.delete('/api/v1/auth/principals', headers=auth_headers)
+    response = client.delete(
+        '/api/v1/auth/principals',
+        params={'username': 'newuser'},
+        headers={'Authorization': f'Bearer {admin_token}'},
+    )
+
+    # Assert
+    assert forbidden.status_code == HTTPStatus.FORBIDDEN
+    assert response.status_code == HTTPStatus.OK
+    assert principal_cache.get('newuser') is None
+    assert principal_cache.get('admin') is not None
+
+
+def test_principal_cache_evicts_lru_and_expired_entries():
+    # Arrange
+    cache = PrincipalCache(max_entries=2, ttl=60)
+    expired = PrincipalCache(max_entries=2, ttl=0)
+    principals = {name: Principal(1, name, f'{name}@x.com', False) for name in 'abc'}
+
+    # Act
+    cache.put('a', principals['a'])
+    cache.put('b', principals['b'])
+    cache.get('a')
+    cache.put('c', principals['c'])
+    expired.put('a', principals['a'])
+
+    # Assert
+    assert cache.get('a') == principals['a']
+    assert cache.get('b') is None
+    assert cache.get('c') == principals['c']
+    assert expired.get('a') is None
+
+
+def test_login_rehashes_password_with_outdated_parameters(client, fake_users_in_db, session):
+    # Arrange
+    weak_hash = build_password_hash(time_cost=1, memory_cost=8_192, parallelism=1).hash('secret')
+    fake_users_in_db(count=1, username='olduser', password=weak_hash)
+
+    # Act
+    response = client.post(
+        '/api/v1/auth/login', data={'username': 'olduser', 'password': 'secret'}
+    )
+    stored_hash = session.scalar(select(User.password).where(User.username == 'olduser'))
+
+    # Assert
+    assert response.status_code == HTTPStatus.OK
+    assert stored_hash != weak_hash
+    assert pwd_context.verify_and_update('secret', stored_hash) == (True, None)
+
+
+def test_password_hashing_pool_rejects_when_queue_is_full():
+    # Arrange
+    release = threading.Event()
+    pool = PasswordHashingPool(pwd_context, max_workers=1, max_pending=2)
+
+    # Act
+    running = pool.submit(release.wait, 5)
+    queued = pool.submit(release.wait, 5)
+    with pytest.raises(HashingPoolBusyException):
+        pool.submit(release.wait, 5)
+    stats = pool.stats()
+    release.set()
+    running.result(timeout=5)
+    queued.result(timeout=5)
+    pool.shutdown()
+
+    # Assert
+    assert stats == {'workers': 1, 'running': 1, 'queued': 1, 'completed': 0, 'rejected': 1}
+    assert pool.stats()['completed'] == 2  # noqa: PLR2004
+
+
+def test_password_hashing_pool_releases_slot_of_cancelled_job():
+    # Arrange
+    release = threading.Event()
+    pool = PasswordHashingPool(pwd_context, max_workers=1, max_pending=2)
+
+    async def cancel_queued_job():
+        running = asyncio.ensure_future(pool._run(release.wait, 5))
+        queued = asyncio.ensure_future(pool._run(release.wait, 5))
+        await asyncio.sleep(0.05)
+        queued.cancel()
+        await asyncio.sleep(0.05)
+        stats = pool.stats()
+        release.set()
+        await running
+        return stats
+
+    # Act
+    stats = asyncio.run(cancel_queued_job())
+    accepted = pool.submit(release.wait, 5)
+    accepted.result(timeout=5)
+    pool.shutdown()
+
+    # Assert
+    assert stats['running'] == 1
+    assert stats['queued'] == 0
+    assert pool.stats()['completed'] == 2  # noqa: PLR2004
+
+
+class _BarrierHasher:
+    """Só responde quando `parties` verificações estão rodando ao mesmo tempo."""
+
+    def __init__(self, parties: int):
+        self.barrier = threading.Barrier(parties, timeout=5)
+
+    def verify_and_update(self, plain_password, hashed_password):
+        self.barrier.wait()
+        return True, None
+
+
+def test_concurrent_logins_hash_in_parallel(client, fake_users_in_db, database_url, monkeypatch):
+    # Arrange
+    fake_users_in_db(1, username='alice', password='hash')
+    fake_users_in_db(1, username='bob', password='hash')
+    pool = PasswordHashingPool(_BarrierHasher(2), max_workers=2, max_pending=4)
+    monkeypatch.setattr(auth, 'password_hasher', pool)
+
+    async def login_both():
+        # writer com uma única conexão, como o da aplicação
+        writer = create_async_engine(
+            get_async_database_url(database_url), pool_size=1, max_overflow=0
+        )
+
+        async def get_writer_session():
+            async with AsyncSession(writer, expire_on_commit=False) as session:
+                yield session
+
+        app.dependency_overrides[get_async_write_session] = get_writer_session
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as http:
+            responses = await asyncio.gather(
+                *(
+                    http.post('/api/v1/auth/login', data={'username': name, 'password': 'x'})
+                    for name in ('alice', 'bob')
+                )
+            )
+        await writer.dispose()
+        return responses
+
+    # Act
+    responses = asyncio.run(login_both())
+    pool.shutdown()
+
+    # Assert
+    assert [response.status_code for response in responses] == [HTTPStatus.OK] * 2
+
+
+def test_calibrate_argon2_stays_within_target():
+    # Act
+    params = calibrate_argon2(target_ms=1_000, memory_cost=1_024, parallelism=1, max_time_cost=3)
+
+    # Assert
+    assert 1 <= params['time_cost'] <= 3  # noqa: PLR2004
+    assert params['memory_cost'] == 1_024  # noqa: PLR2004
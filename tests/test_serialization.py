@@ -0,0 +1,64 @@
+import json
+
+import pytest
+from factory import Iterator
+
+from api_books import serialization
+from api_books.database.books import BookDataBase
+from api_books.schemas import BooksList, StatsPriceRange
+
+
+def fastapi_json(model, content) -> bytes:
+    """Corpo gerado pelo caminho padrão: validação do response_model + JSONResponse."""
+    value = model.model_validate(content).model_dump(mode='json')
+    return json.dumps(
+        value, ensure_ascii=False, allow_nan=False, indent=None, separators=(',', ':')
+    ).encode('utf-8')
+
+
+def test_book_list_response_matches_response_model(session, fake_books_in_db):
+    # Arrange
+    fake_books_in_db(
+        4,
+        title=Iterator(['Ação', 'Café & Crème', 'Plain', '日本語']),
+        price=Iterator([10.0, 12.5, 0.1, 51.77]),
+    )
+    db = BookDataBase(session)
+    total, books, next_cursor = db.get_books(limit=3)
+    _, rows, _ = db.get_books(limit=3, as_rows=True)
+
+    # Act
+    response = serialization.book_list_response(total, rows, next_cursor=next_cursor)
+
+    # Assert
+    assert response.media_type == 'application/json'
+    assert response.body == fastapi_json(
+        BooksList, {'total': total, 'books': books, 'next_cursor': next_cursor}
+    )
+
+
+def test_price_range_response_matches_response_model(session, fake_books_in_db):
+    # Arrange
+    fake_books_in_db(5, price=Iterator([10.0, 10.25, 12.0, 18.3, 25.0]))
+    db = BookDataBase(session)
+    total, books = db.get_stats_by_price_range(10.25, 20.0)
+    _, rows = db.get_stats_by_price_range(10.25, 20.0, as_rows=True)
+
+    # Act
+    response = serialization.book_list_response(total, rows)
+
+    # Assert
+    assert response.body == fastapi_json(StatsPriceRange, {'total': total, 'books': books})
+
+
+def test_dumps_without_orjson_gives_same_bytes(monkeypatch):
+    # Arrange
+    pytest.importorskip('orjson')
+    content = {'total': 1, 'books': [{'title': 'Ação', 'price': 51.77, 'image_url': None}]}
+    expected = serialization.dumps(content)
+
+    # Act
+    monkeypatch.setattr(serialization, 'orjson', None)
+
+    # Assert
+    assert serialization.dumps(content) == expected
@@ -2,6 +2,9 @@ from http import HTTPStatus
 
 import pytest
 
+from api_books.database.users import UserDataBase
+from api_books.security.crypt import get_hash_from_password
+
 
 def test_create_users(client, fake_users):
     # Arrange
@@ -42,3 +45,31 @@ def test_create_existing_users_must_be_conflict_username(client, fake_users_in_d
     # Assert
     assert response.status_code == HTTPStatus.CONFLICT
     assert response.json() == {'detail': http_message}
+
+
+def test_create_user_with_taken_username_raises_value_error(session):
+    # Arrange
+    db = UserDataBase(session)
+    db.create_user(username='ana', hashed_password='h', email='ana@example.com', is_admin=False)
+
+    # Act / Assert
+    with pytest.raises(ValueError, match='already exists'):
+        db.create_user(username='ana', hashed_password='h', email='b@example.com', is_admin=False)
+
+
+def test_get_users_must_not_expose_password(client, fake_users_in_db):
+    # Arrange
+    plain_password = 'secret'
+    fake_users_in_db(1, username='admin', password=get_hash_from_password(plain_password))
+    fake_users_in_db(2)
+    token = client.post(
+        '/api/v1/auth/login', data={'username': 'admin', 'password': plain_password}
+    ).json()['access_token']
+
+    # Act
+    response = client.get('/api/v1/users/', headers={'Authorization': f'Bearer {token}'})
+
+    # Assert
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['total'] == 3  # noqa
+    assert all('password' not in user for user in response.json()['users'])